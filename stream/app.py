@@ -1,23 +1,110 @@
-import streamlit as st
+import os
+
 import pandas as pd
+import streamlit as st
+
+from data_io import INPUT_TYPES, file_format_from_name
+from dataset_store import get_store
+from dtypes import compact_dtypes
+from parse_cache import get_parse_cache, hash_bytes
+
+# Copy-on-Write lets every dataset version share column buffers with the
+# previous one; a column is only copied when a page writes to it. It is
+# always enabled from pandas 3.0 onwards. Datasets are only loaded on this
+# page, so enabling it here covers every page that works on one.
+if int(pd.__version__.split(".")[0]) == 2:
+    pd.set_option("mode.copy_on_write", True)
+
+def get_upload_digest(uploaded_file):
+    # Hash each upload only once per session; reruns reuse the stored digest
+    digests = st.session_state.setdefault("upload_digests", {})
+    if uploaded_file.file_id not in digests:
+        digests[uploaded_file.file_id] = hash_bytes(uploaded_file.getbuffer())
+    return digests[uploaded_file.file_id]
+
+def display_dataset_history(store):
+    st.subheader("Dataset Versions")
+    st.write(f"Current dataset: **{store.name}** (version {store.version})")
+    for version, step, changed_columns, frame, *_ in reversed(store.history):
+        st.write(f"Version {version}: {step} - shape {frame.shape}, "
+                 f"changed columns: {', '.join(map(str, changed_columns)) or 'none'}")
+
+    if len(store.history) > 1:
+        st.button("Undo last step", on_click=store.undo)
+
+def display_pipeline(store):
+    st.subheader("Recorded Pipeline")
+    if not len(store.pipeline):
+        st.write("No steps recorded yet. Steps are recorded when a page's result is used for the next steps.")
+        return
+    st.write(store.pipeline.describe())
+    st.download_button("Download pipeline", data=store.pipeline.to_bytes,
+                       file_name=f"{os.path.splitext(store.name)[0]}_pipeline.pkl",
+                       mime="application/octet-stream", on_click="ignore")
+    st.caption("Replay it on new data without the app: `python pipeline.py pipeline.pkl input.csv output.csv`. "
+               "Pipeline files are pickles that can run code when loaded, so only replay files you trust.")
+
+def get_ingest_options():
+    st.sidebar.subheader("Ingest Options")
+    engine = st.sidebar.selectbox("CSV parser engine", ["pyarrow", "c"])
+    arrow_dtypes = st.sidebar.checkbox("Arrow-backed dtypes", value=True)
+    compact = st.sidebar.checkbox("Compact dtypes on ingest", value=False,
+                                  help="Downcast numeric columns to the smallest safe width and store "
+                                       "low-cardinality text columns as 'category'.")
+    float32 = st.sidebar.checkbox("Float32 compute mode", value=False, disabled=not compact,
+                                  help="Store every float column as float32, even where precision is lost.")
+    parse_options = {"engine": engine, "dtype_backend": "pyarrow" if arrow_dtypes else None}
+    compaction = {"compact": compact, "float32": compact and float32}
+    return parse_options, compaction
 
 def main():
-    st.title("Upload CSV File")
+    st.title("Upload Data File")
+
+    # Parse cache shared by all sessions, with a configurable memory budget
+    cache = get_parse_cache()
+    budget_mb = st.sidebar.number_input("Parse cache budget (MB)", min_value=0,
+                                        value=cache.max_bytes // (1024 * 1024), step=256)
+    cache.set_budget(int(budget_mb) * 1024 * 1024)
+
+    options, compaction = get_ingest_options()
+    store = get_store()
 
     # Create a file uploader widget
-    uploaded_file = st.file_uploader("Upload a CSV file", type=["csv"])
+    uploaded_file = st.file_uploader("Upload a CSV, Parquet, Feather or Arrow IPC file", type=INPUT_TYPES)
 
     if uploaded_file is not None:
-        # Read the uploaded CSV file into a DataFrame
-        df = pd.read_csv(uploaded_file)
+        digest = get_upload_digest(uploaded_file)
+        source = (digest, tuple(sorted(options.items())), tuple(sorted(compaction.items())))
 
-        # Store the DataFrame in session state
-        st.session_state.df = df
+        # Only a new file (or new ingest options) replaces the dataset; reruns keep the committed versions
+        if store.source != source:
+            # Read the uploaded file into a DataFrame, reusing an earlier parse of the same bytes
+            try:
+                file_format = file_format_from_name(uploaded_file.name)
+                df = cache.read_file(uploaded_file.getbuffer(), file_format, digest=digest, **options)
+            except Exception as e:
+                st.error(f"Error reading file: {e}")
+                return
+
+            # Optionally store every column in its smallest safe dtype
+            metadata = {}
+            if compaction["compact"]:
+                df, metadata["memory_report"] = compact_dtypes(df, float32=compaction["float32"])
+
+            # Store the DataFrame as the first version of the shared dataset
+            store.load(df, uploaded_file.name, source=source, metadata=metadata)
 
         st.success("File uploaded successfully!")
+        st.sidebar.caption(f"Parse cache: {len(cache)} file(s), "
+                           f"{cache.current_bytes / (1024 * 1024):.1f} MB, "
+                           f"{cache.hits} hit(s) / {cache.misses} miss(es)")
 
         # Link to navigate to the display page
         #st.markdown("[Go to Display Page](/dis)")
 
+    if store.loaded:
+        display_dataset_history(store)
+        display_pipeline(store)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,286 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from dtypes import fill_column
+from running_stats import DEFAULT_CHUNKSIZE, RunningStats, numeric_values
+from scalers import IncrementalScaler
+
+# Column-independent operations that can run over a file chunk by chunk
+OPERATIONS = {
+    "null_counts": "Null value counts (01 / 04)",
+    "fill_mean": "Fill missing values with mean (05)",
+    "fill_median": "Fill missing values with median (05)",
+    "cap_zscore": "Z-score capping (10)",
+    "cap_iqr": "IQR capping (12)",
+    "cap_percentile": "Percentile capping (13)",
+    "standardize": "Standardization (16)",
+    "minmax": "Min-Max normalization (17)",
+    "robust": "Robust scaling (18, approximate quartiles)",
+    "bool_to_int": "Boolean to integer conversion (21)",
+}
+
+
+# Operations fitted by an IncrementalScaler, by name: scaling method
+SCALE_OPERATIONS = {"standardize": "standard", "minmax": "minmax", "robust": "robust"}
+
+
+def read_chunks(path, chunksize=DEFAULT_CHUNKSIZE, usecols=None):
+    """
+    Iterate over a CSV file as DataFrames of at most chunksize rows.
+    """
+    return pd.read_csv(path, chunksize=chunksize, usecols=usecols)
+
+
+def detect_numeric_columns(path, nrows=1000):
+    """
+    Detect numeric columns from the first rows of the file.
+    """
+    head = pd.read_csv(path, nrows=nrows)
+    return [col for col in head.columns
+            if pd.api.types.is_numeric_dtype(head[col]) and not pd.api.types.is_bool_dtype(head[col])]
+
+
+def collect_stats(path, columns=None, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    First pass over a file: null counts for every column and running
+    statistics for the numeric ones.
+
+    Returns:
+    Tuple: A tuple containing the following:
+        - total_rows (int): Number of rows in the file.
+        - null_counts (Series): Null count of each column.
+        - stats (dict): RunningStats of each numeric column.
+    """
+    total_rows = 0
+    null_counts = None
+    stats = {}
+
+    for chunk in read_chunks(path, chunksize, usecols=columns):
+        total_rows += len(chunk)
+        chunk_nulls = chunk.isnull().sum()
+        null_counts = chunk_nulls if null_counts is None else null_counts.add(chunk_nulls, fill_value=0)
+
+        for col in chunk.columns:
+            if pd.api.types.is_numeric_dtype(chunk[col]) and not pd.api.types.is_bool_dtype(chunk[col]):
+                stats.setdefault(col, RunningStats()).update(numeric_values(chunk, col))
+
+    if null_counts is None:
+        null_counts = pd.Series(dtype="int64")
+    return total_rows, null_counts.astype("int64"), stats
+
+
+def null_summary(total_rows, null_counts):
+    """
+    Null counts and percentages in the layout of calculate_null_percentages.
+    """
+    return pd.DataFrame({
+        'Column': null_counts.index,
+        'Null Count': null_counts.values,
+        'Null Percentage': (null_counts.values / max(total_rows, 1)) * 100
+    })
+
+
+# Exact quantiles are found 16 bits of the values at a time, and the values
+# of a bin are collected once at most this many are left in it
+RADIX_BITS = 16
+MAX_COLLECTED_VALUES = 1_000_000
+
+_SIGN_BIT = np.uint64(1 << 63)
+
+
+def _sortable_keys(values):
+    # Unsigned integers ordered like the float64 values they come from
+    bits = values.view(np.uint64)
+    return np.where(bits & _SIGN_BIT, ~bits, bits | _SIGN_BIT)
+
+
+def _key_value(key):
+    key = np.uint64(key)
+    bits = key & ~_SIGN_BIT if key & _SIGN_BIT else ~key
+    return float(np.array([bits], dtype=np.uint64).view(np.float64)[0])
+
+
+def exact_quantiles(path, stats, probs, chunksize=DEFAULT_CHUNKSIZE, max_values=MAX_COLLECTED_VALUES):
+    """
+    Exact quantiles of numeric columns with bounded memory.
+
+    Every needed rank is located by a radix select over the bit patterns
+    of the values: each pass counts the values sharing the bits found so
+    far by their next RADIX_BITS bits and keeps the bin holding the rank.
+    Once a bin holds at most max_values values they are collected in one
+    more pass. At most five passes are made however skewed the values are,
+    and memory is bounded by the bins and max_values per rank. Results
+    match Series.quantile with linear interpolation.
+
+    Parameters:
+    path (str): CSV file to read.
+    stats (dict): RunningStats of the columns, as returned by collect_stats.
+    probs (list): Quantiles to compute, between 0 and 1.
+    max_values (int): Values of a bin collected in memory for each rank.
+
+    Returns:
+    dict: Mapping of column name to a dict of quantile to value.
+    """
+    columns = [col for col, col_stats in stats.items() if col_stats.count > 0]
+    results = {col: {q: np.nan for q in probs} for col in stats}
+    if not columns:
+        return results
+
+    # Ranks (0-based) needed for linear interpolation of every quantile
+    positions = {col: {q: (stats[col].count - 1) * q for q in probs} for col in columns}
+    # Search state of every rank: the leading bits of its value found so far,
+    # how many of them, the values below that bin and the values in it
+    searches = {(col, rank): {"prefix": 0, "bits": 0, "below": 0, "count": stats[col].count}
+                for col in columns
+                for rank in {int(np.floor(h)) for h in positions[col].values()} |
+                            {int(np.ceil(h)) for h in positions[col].values()}}
+    values_at = {}
+
+    while len(values_at) < len(searches):
+        pending = {target: search for target, search in searches.items() if target not in values_at}
+        for search in pending.values():
+            if search["count"] <= max_values:
+                search["collected"] = []
+            else:
+                search["counts"] = np.zeros(2 ** RADIX_BITS, dtype=np.int64)
+
+        for chunk in read_chunks(path, chunksize, usecols=list({col for col, _ in pending})):
+            keys = {col: _sortable_keys(numeric_values(chunk, col)) for col, _ in pending}
+            for (col, _), search in pending.items():
+                in_bin = keys[col]
+                if search["bits"]:
+                    in_bin = in_bin[(in_bin >> np.uint64(64 - search["bits"])) == np.uint64(search["prefix"])]
+                if "collected" in search:
+                    search["collected"].append(in_bin)
+                else:
+                    digits = (in_bin >> np.uint64(64 - search["bits"] - RADIX_BITS)) & np.uint64(2 ** RADIX_BITS - 1)
+                    search["counts"] += np.bincount(digits.astype(np.int64), minlength=2 ** RADIX_BITS)
+
+        for (col, rank), search in pending.items():
+            offset = rank - search["below"]
+            if "collected" in search:
+                keys = np.concatenate(search.pop("collected"))
+                values_at[(col, rank)] = _key_value(np.partition(keys, offset)[offset])
+                continue
+            cumulative = np.cumsum(search.pop("counts"))
+            digit = int(np.searchsorted(cumulative, offset, side="right"))
+            search["below"] += int(cumulative[digit - 1]) if digit > 0 else 0
+            search["count"] = int(cumulative[digit]) - (int(cumulative[digit - 1]) if digit > 0 else 0)
+            search["prefix"] = (search["prefix"] << RADIX_BITS) | digit
+            search["bits"] += RADIX_BITS
+            if search["bits"] == 64:
+                # Every value left in the bin has the same bits
+                values_at[(col, rank)] = _key_value(search["prefix"])
+
+    for col in columns:
+        for q, h in positions[col].items():
+            lower = values_at[(col, int(np.floor(h)))]
+            upper = values_at[(col, int(np.ceil(h)))]
+            results[col][q] = lower + (upper - lower) * (h - np.floor(h))
+    return results
+
+
+def fit_operation(path, operation, columns, chunksize=DEFAULT_CHUNKSIZE, lower_percentile=0.1, upper_percentile=99.9):
+    """
+    Gather the statistics an operation needs from one or more passes over the file.
+
+    Returns:
+    dict: Mapping of column name to the parameters used when transforming chunks.
+    """
+    if operation == "bool_to_int":
+        return {}
+
+    if operation in SCALE_OPERATIONS:
+        # Scaling is fitted by the scalers of pages 16-18, chunk by chunk
+        scaler = IncrementalScaler(SCALE_OPERATIONS[operation]).fit_chunks(read_chunks(path, chunksize, usecols=columns))
+        center, scale = scaler.parameters()
+        rank_error = {"rank_error": scaler.rank_error()} if operation == "robust" else {}
+        return {col: {"center": center[col], "scale": scale[col], **rank_error} for col in columns}
+
+    total_rows, null_counts, stats = collect_stats(path, columns, chunksize)
+    fitted = {}
+
+    if operation in ("fill_mean", "cap_zscore"):
+        for col in columns:
+            col_stats = stats[col]
+            if operation == "fill_mean":
+                fitted[col] = {"value": col_stats.mean if col_stats.count else np.nan}
+            else:
+                std = col_stats.std(ddof=1)
+                fitted[col] = {"lower": col_stats.mean - 3 * std, "upper": col_stats.mean + 3 * std}
+        return fitted
+
+    if operation == "fill_median":
+        probs = [0.5]
+    elif operation == "cap_percentile":
+        probs = [lower_percentile / 100, upper_percentile / 100]
+    else:
+        probs = [0.25, 0.75]
+    quantiles = exact_quantiles(path, {col: stats[col] for col in columns}, probs, chunksize)
+
+    for col in columns:
+        q = quantiles[col]
+        if operation == "fill_median":
+            fitted[col] = {"value": q[0.5]}
+        elif operation == "cap_percentile":
+            fitted[col] = {"lower": q[probs[0]], "upper": q[probs[1]]}
+        else:
+            iqr = q[0.75] - q[0.25]
+            fitted[col] = {"lower": q[0.25] - 1.5 * iqr, "upper": q[0.75] + 1.5 * iqr}
+    return fitted
+
+
+def apply_operation(chunk, operation, fitted):
+    """
+    Transform one chunk with statistics gathered by fit_operation.
+    """
+    if operation == "bool_to_int":
+        boolean_cols = chunk.select_dtypes(include='bool').columns
+        chunk[boolean_cols] = chunk[boolean_cols].astype(int)
+        return chunk
+
+    for col, params in fitted.items():
+        if operation in ("fill_mean", "fill_median"):
+            chunk[col] = fill_column(chunk[col], params["value"])
+        elif operation in ("cap_zscore", "cap_iqr", "cap_percentile"):
+            chunk[col] = chunk[col].clip(lower=params["lower"], upper=params["upper"])
+        else:
+            chunk[col] = (chunk[col] - params["center"]) / params["scale"]
+    return chunk
+
+
+def process_file(in_path, out_path, operation, columns, chunksize=DEFAULT_CHUNKSIZE, **params):
+    """
+    Apply a column-independent operation to a CSV file of any size.
+
+    Statistics are gathered in a first pass (plus the quantile passes for
+    median, IQR and percentile operations), then the file is read
+    again chunk by chunk and each transformed chunk is appended to the
+    output, so peak memory depends on chunksize rather than on file size.
+
+    Parameters:
+    in_path (str): CSV file to read.
+    out_path (str): CSV file to write.
+    operation (str): One of the keys of OPERATIONS other than 'null_counts'.
+    columns (list): Numeric columns to transform.
+    chunksize (int): Number of rows held in memory at a time.
+    **params: Operation parameters, e.g. lower_percentile and upper_percentile.
+
+    Returns:
+    dict: Fitted statistics, number of rows and chunks written, and elapsed seconds.
+    """
+    start = time.perf_counter()
+    fitted = fit_operation(in_path, operation, columns, chunksize, **params)
+
+    rows = 0
+    chunks = 0
+    with open(out_path, "w", newline="") as out_file:
+        for chunk in read_chunks(in_path, chunksize):
+            chunk = apply_operation(chunk, operation, fitted)
+            chunk.to_csv(out_file, header=(chunks == 0), index=False)
+            rows += len(chunk)
+            chunks += 1
+
+    return {"fitted": fitted, "rows": rows, "chunks": chunks, "seconds": time.perf_counter() - start}
@@ -0,0 +1,284 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from dataset_store import get_store
+from dtypes import is_categorical
+from kde import BinnedData
+from parse_cache import hash_bytes
+from power import fit_lambdas
+from quantile_sketch import DEFAULT_FAILURE_PROBABILITY, DEFAULT_TAIL_VALUES, sketch_values
+from sorted_index import SortedColumn
+
+# Quantiles computed together with the other statistics of a numeric column
+DEFAULT_QUANTILES = (0.25, 0.5, 0.75)
+
+# Datasets with at least this many rows use approximate quantiles by default
+APPROXIMATE_MIN_ROWS = 1_000_000
+
+
+class ColumnProfile:
+    """
+    Statistics of one column, computed in a single pass over its values.
+
+    Numeric columns get count, mean, variance, standard deviation, minimum,
+    maximum and quartiles; text columns get value counts and mode. The
+    sorted index answering other quantiles and threshold queries, the
+    quantile sketch answering approximate quantile queries and the binned
+    data behind density plots are computed on first use and remembered, as
+    are the power transform lambdas fitted for the column.
+    """
+
+    def __init__(self, series):
+        self.name = series.name
+        self.dtype = series.dtype
+        self.rows = len(series)
+        self.null_count = int(series.isnull().sum())
+        self.numeric = pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+        self._series = series
+        self._quantiles = {}
+        self._value_counts = None
+        self._binned = None
+        self._sketch = None
+        self._sorted = None
+        self._lambdas = {}  # Fitted power transform lambdas, by method and sample size
+        self._fingerprint = None
+
+        if self.numeric:
+            values = series.to_numpy(dtype=float, na_value=np.nan)
+            values = values[~np.isnan(values)]
+            self.count = len(values)
+            self.mean = float(values.mean()) if self.count else np.nan
+            self.var = float(values.var(ddof=1)) if self.count > 1 else np.nan
+            self.std = float(np.sqrt(self.var))
+            self.min = float(values.min()) if self.count else np.nan
+            self.max = float(values.max()) if self.count else np.nan
+            quantiles = np.quantile(values, DEFAULT_QUANTILES) if self.count else [np.nan] * len(DEFAULT_QUANTILES)
+            self._quantiles = dict(zip(DEFAULT_QUANTILES, (float(q) for q in quantiles)))
+        else:
+            self.count = self.rows - self.null_count
+
+    @property
+    def null_percentage(self):
+        return (self.null_count / self.rows) * 100 if self.rows else np.nan
+
+    @property
+    def median(self):
+        return self.quantile(0.5)
+
+    def quantile(self, q):
+        if q not in self._quantiles:
+            self._quantiles[q] = self.sorted.quantile(q) if self.numeric else float(self._series.quantile(q))
+        return self._quantiles[q]
+
+    @property
+    def sorted(self):
+        # None for non-numeric columns
+        if self._sorted is None and self.numeric:
+            self._sorted = SortedColumn.from_series(self._series, self.mean, self.std)
+        return self._sorted
+
+    @property
+    def sketch(self):
+        # None for non-numeric columns
+        if self._sketch is None and self.numeric:
+            self._sketch = sketch_values(self._series.to_numpy(dtype=float, na_value=np.nan))
+        return self._sketch
+
+    def approx_quantile(self, q):
+        # Quantiles in the tails the sketch cannot resolve, beyond its exact
+        # smallest and largest values, come from the sorted index
+        if self.sketch.in_tail(q):
+            return self.quantile(q)
+        return self.sketch.quantile(q)
+
+    @property
+    def value_counts(self):
+        if self._value_counts is None:
+            self._value_counts = self._series.value_counts()
+        return self._value_counts
+
+    @property
+    def fingerprint(self):
+        # Content hash of the column, e.g. to key rendered figures across sessions
+        if self._fingerprint is None:
+            hashes = pd.util.hash_pandas_object(self._series, index=True).to_numpy()
+            self._fingerprint = (str(self.name), str(self.dtype), hash_bytes(hashes))
+        return self._fingerprint
+
+    @property
+    def binned(self):
+        # None for non-numeric columns and columns with fewer than two distinct values
+        if self._binned is None and self.numeric:
+            self._binned = BinnedData.from_series(self._series)
+        return self._binned
+
+    @property
+    def mode(self):
+        # Like Series.mode().iloc[0]: the smallest of the most frequent values
+        counts = self.value_counts
+        if counts.empty:
+            return np.nan
+        most_frequent = counts.index[counts.to_numpy() == counts.iloc[0]]
+        try:
+            return most_frequent.sort_values()[0]
+        except TypeError:
+            return most_frequent[0]
+
+
+class DatasetProfile:
+    """
+    Column profiles of a dataset, computed lazily and reused across reruns.
+
+    When bound to the shared dataset store, a column profile is kept for as
+    long as the column's version does not change, so a step that changes a
+    few columns only invalidates the profiles of those columns.
+    """
+
+    def __init__(self, df=None):
+        self._df = df
+        self._version = None
+        self._versions = {}
+        self._profiles = {}
+        self._derived = {}  # Binned data of frames derived from this version, by key
+
+    def bind(self, df, column_versions, version=None):
+        """
+        Point the profile at a new dataset version, dropping the profiles of
+        columns that were changed or removed.
+        """
+        self._df = df
+        for col in list(self._profiles):
+            if col not in df.columns or column_versions.get(col) != self._versions.get(col):
+                del self._profiles[col]
+        self._versions = dict(column_versions)
+        if version != self._version:
+            self._derived = {}
+        self._version = version
+        return self
+
+    def column(self, col):
+        if col not in self._profiles:
+            self._profiles[col] = ColumnProfile(self._df[col])
+        return self._profiles[col]
+
+    def __getitem__(self, col):
+        return self.column(col)
+
+    def _series(self, columns, attribute):
+        columns = list(self._df.columns) if columns is None else columns
+        return pd.Series([getattr(self.column(col), attribute) for col in columns], index=columns, dtype=float)
+
+    def null_counts(self, columns=None):
+        return self._series(columns, "null_count").astype("int64")
+
+    def null_percentages(self, columns=None):
+        return self._series(columns, "null_percentage")
+
+    def means(self, columns=None):
+        return self._series(columns, "mean")
+
+    def medians(self, columns=None):
+        return self._series(columns, "median")
+
+    def stds(self, columns=None):
+        return self._series(columns, "std")
+
+    def variances(self, columns=None):
+        return self._series(columns, "var")
+
+    def quantiles(self, q, columns=None, approximate=False):
+        """
+        Quantile q of each column; with approximate, read from the columns'
+        quantile sketches, built once and reused for any later quantile.
+        """
+        columns = list(self._df.columns) if columns is None else columns
+        quantile = ColumnProfile.approx_quantile if approximate else ColumnProfile.quantile
+        return pd.Series([quantile(self.column(col), q) for col in columns], index=columns, dtype=float)
+
+    def quantile_bounds(self, probs, columns):
+        """
+        Approximate quantiles of the columns with the range holding the exact
+        value, and the rank error of each column's sketch. Tail quantiles
+        computed exactly by approx_quantile have no range around them.
+        """
+        rows = []
+        for col in columns:
+            column = self.column(col)
+            sketch = column.sketch
+            for q in probs:
+                if sketch.in_tail(q):
+                    estimate = lower = upper = column.quantile(q)
+                else:
+                    estimate, (lower, upper) = sketch.quantile(q), sketch.quantile_bounds(q)
+                rows.append({"Column": col, "Quantile": q, "Estimate": estimate,
+                             "Lower bound": lower, "Upper bound": upper, "Rank error": sketch.rank_error()})
+        return pd.DataFrame(rows)
+
+    def power_lambdas(self, columns, method="boxcox", sample_rows=None):
+        """
+        Power transform lambdas of the columns, kept with each column's
+        profile; only columns without one for this method and sample size
+        are fitted.
+        """
+        key = (method, sample_rows)
+        missing = [col for col in columns if key not in self.column(col)._lambdas]
+        for col, lmbda in fit_lambdas(self._df, missing, method, sample_rows).items():
+            self.column(col)._lambdas[key] = lmbda
+        return {col: self.column(col)._lambdas[key] for col in columns}
+
+    def modes(self, columns):
+        return pd.Series([self.column(col).mode for col in columns], index=columns, dtype=object)
+
+    def binned(self, col, variant=None, series=None):
+        """
+        Binned data of a column for density plots.
+
+        Without a variant this is the column of the dataset itself. A variant
+        names a frame derived from the current version (e.g. the rows kept
+        after dropping missing values) whose column is given as `series`; it
+        is binned once and reused until the dataset version changes.
+        """
+        if variant is None:
+            return self.column(col).binned
+        key = (col, variant)
+        if key not in self._derived:
+            self._derived[key] = BinnedData.from_series(series)
+        return self._derived[key]
+
+    def categorical_columns(self):
+        return [col for col in self._df.columns if is_categorical(self._df[col])]
+
+
+def profile_of(df, profile=None):
+    """
+    Return the given profile, or an ad-hoc one for frames outside the store.
+    """
+    return profile if profile is not None else DatasetProfile(df)
+
+
+def get_profile():
+    """
+    Return the profile of the current version of the shared dataset.
+    """
+    store = get_store()
+    if "dataset_profile" not in st.session_state:
+        st.session_state.dataset_profile = DatasetProfile()
+    return st.session_state.dataset_profile.bind(store.current(), store.column_versions, store.version)
+
+
+def show_quantile_bounds(profile, probs, columns, container=st):
+    """
+    Show how far the approximate quantiles used on a page can be from the exact ones.
+    """
+    bounds = profile.quantile_bounds(probs, columns)
+    expander = container.expander("Accuracy of the approximate quantiles")
+    expander.write(f"Quantiles are read from a mergeable sketch of each column, built once per column version. "
+                   f"Each is off by at most {bounds['Rank error'].max():.2%} of the rows in rank, and the exact "
+                   f"value lies between the bounds, except with probability {DEFAULT_FAILURE_PROBABILITY:g}. "
+                   f"The smallest and largest {DEFAULT_TAIL_VALUES:,} values of each column are kept exactly, so tail "
+                   f"quantiles among them (e.g. the 0.1th and 99.9th percentiles of up to "
+                   f"{DEFAULT_TAIL_VALUES * 1000:,} rows) are exact and fast; tail quantiles beyond them and closer "
+                   f"to either end than that rank error are computed exactly from the sorted column, which is not "
+                   f"faster than the exact mode.")
+    expander.dataframe(bounds.drop(columns="Rank error"), hide_index=True)
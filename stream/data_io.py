@@ -0,0 +1,155 @@
+import gzip
+import io
+import os
+import tempfile
+import zipfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from dtypes import dense_rows
+
+# File types accepted by the uploader
+INPUT_TYPES = ["csv", "parquet", "feather", "arrow"]
+
+# Formats offered at every download point: label -> (file extension, MIME type)
+DOWNLOAD_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    "CSV (zip)": ("zip", "application/zip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+# Rows serialized at a time when exporting, so no full-size text copy of the frame is built
+EXPORT_CHUNK_ROWS = 100_000
+
+
+def file_format_from_name(filename):
+    """
+    Return the input format of an uploaded file from its extension.
+    """
+    extension = os.path.splitext(filename)[1].lower().lstrip(".")
+    if extension in ("arrow", "ipc", "arrows"):
+        return "arrow"
+    if extension in INPUT_TYPES:
+        return extension
+    raise ValueError(f"Unsupported file type: '{extension}'. Supported types: {', '.join(INPUT_TYPES)}")
+
+
+def read_bytes(data, file_format="csv", engine="pyarrow", dtype_backend="pyarrow"):
+    """
+    Parse an uploaded file into a DataFrame.
+
+    Parameters:
+    data (bytes): Raw content of the file.
+    file_format (str): One of INPUT_TYPES.
+    engine (str): CSV parser engine, 'pyarrow' or 'c'.
+    dtype_backend (str): 'pyarrow' for Arrow-backed columns, 'numpy_nullable' or None for NumPy dtypes.
+
+    Returns:
+    DataFrame: The parsed data.
+    """
+    buffer = io.BytesIO(data)
+    backend = {"dtype_backend": dtype_backend} if dtype_backend else {}
+
+    if file_format == "csv":
+        return pd.read_csv(buffer, engine=engine, **backend)
+    if file_format == "parquet":
+        return pd.read_parquet(buffer, **backend)
+    if file_format == "feather":
+        return pd.read_feather(buffer, **backend)
+    if file_format == "arrow":
+        # Arrow IPC comes in a file (random access) and a stream flavour
+        try:
+            table = pa.ipc.open_file(buffer).read_all()
+        except pa.ArrowInvalid:
+            buffer.seek(0)
+            table = pa.ipc.open_stream(buffer).read_all()
+        if dtype_backend == "pyarrow":
+            return table.to_pandas(types_mapper=pd.ArrowDtype)
+        return table.to_pandas()
+    raise ValueError(f"Unsupported file format: '{file_format}'")
+
+
+def _write_csv_chunks(df, binary_file, chunk_rows):
+    text_file = io.TextIOWrapper(binary_file, encoding="utf-8", newline="", write_through=True)
+    for start in range(0, max(len(df), 1), chunk_rows):
+        df.iloc[start:start + chunk_rows].to_csv(text_file, header=(start == 0), index=False)
+    text_file.flush()
+    text_file.detach()  # Leave the underlying file open for the caller
+
+
+def _write_parquet_chunks(df, binary_file, chunk_rows):
+    # Parquet has no sparse columns, so they are stored densely one row group at a time
+    writer = None
+    for start in range(0, max(len(df), 1), chunk_rows):
+        table = pa.Table.from_pandas(dense_rows(df.iloc[start:start + chunk_rows]), preserve_index=False,
+                                     schema=writer.schema if writer is not None else None)
+        if writer is None:
+            writer = pq.ParquetWriter(binary_file, table.schema)
+        writer.write_table(table)
+    writer.close()
+
+
+def write_dataframe(df, binary_file, file_format="csv", member_name="data.csv", chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Serialize a DataFrame into an open binary file.
+
+    CSV output (plain, gzip or zip) is written chunk_rows rows at a time and
+    compressed as it is written, so memory use does not grow with the frame.
+
+    Parameters:
+    df (DataFrame): Data to export.
+    binary_file (file): Writable binary file object.
+    file_format (str): 'csv', 'csv.gz', 'zip' or 'parquet'.
+    member_name (str): Name of the CSV file inside a zip archive.
+    chunk_rows (int): Rows serialized at a time (also the Parquet row group size).
+    """
+    if file_format == "csv":
+        _write_csv_chunks(df, binary_file, chunk_rows)
+    elif file_format == "csv.gz":
+        with gzip.GzipFile(fileobj=binary_file, mode="wb") as gzip_file:
+            _write_csv_chunks(df, gzip_file, chunk_rows)
+    elif file_format == "zip":
+        with zipfile.ZipFile(binary_file, "w", zipfile.ZIP_DEFLATED) as archive:
+            with archive.open(member_name, "w", force_zip64=True) as member:
+                _write_csv_chunks(df, member, chunk_rows)
+    elif file_format == "parquet":
+        if any(isinstance(dtype, pd.SparseDtype) for dtype in df.dtypes):
+            _write_parquet_chunks(df, binary_file, chunk_rows)
+        else:
+            df.to_parquet(binary_file, index=False, row_group_size=chunk_rows)
+    else:
+        raise ValueError(f"Unsupported download format: '{file_format}'")
+
+
+def dataframe_to_file(df, file_format="csv", member_name="data.csv"):
+    """
+    Serialize a DataFrame for download in one of the DOWNLOAD_FORMATS into
+    an anonymous temporary file.
+
+    The export is built on disk rather than in a growing in-memory buffer,
+    so the only full-size copy in memory is the one read back from the
+    file. The file is deleted once closed.
+
+    Returns:
+    file: Unbuffered binary file positioned at the start of the export.
+    """
+    buffered = tempfile.TemporaryFile()
+    try:
+        write_dataframe(df, buffered, file_format, member_name)
+    except BaseException:
+        buffered.close()
+        raise
+    # Hand over the raw file, which the download button reads in one call
+    raw_file = buffered.detach()
+    raw_file.seek(0)
+    return raw_file
+
+
+def download_filename(filename, file_format):
+    """
+    Replace the extension of a download file name with the chosen format's.
+    """
+    return f"{os.path.splitext(filename)[0]}.{file_format}"
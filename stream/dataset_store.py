@@ -0,0 +1,198 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from pipeline import Pipeline
+
+
+def _buffer_signature(series):
+    """
+    Describe where the values of a column live in memory, or return None
+    when the column type does not expose its buffers.
+    """
+    if isinstance(series.dtype, np.dtype):
+        values = series.to_numpy(copy=False)
+        return ("numpy", values.__array_interface__["data"][0], values.strides, values.shape)
+
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy(copy=False)
+        return ("category", codes.__array_interface__["data"][0], codes.strides, codes.shape,
+                id(series.cat.categories))
+
+    if hasattr(series.array, "__arrow_array__"):
+        chunked = series.array.__arrow_array__()
+        addresses = tuple(
+            (chunk.offset, len(chunk), tuple(buf.address if buf is not None else 0 for buf in chunk.buffers()))
+            for chunk in getattr(chunked, "chunks", [chunked])
+        )
+        return ("arrow", addresses)
+
+    return None
+
+
+def column_unchanged(old, new):
+    """
+    Check whether a column was carried over unchanged between two versions.
+
+    Columns that still point at the same buffers are recognised without
+    reading their values; anything else falls back to a full comparison.
+    """
+    if old.dtype != new.dtype or len(old) != len(new):
+        return False
+    if not old.index.equals(new.index):
+        return False
+
+    old_signature = _buffer_signature(old)
+    if old_signature is not None and old_signature == _buffer_signature(new):
+        return True
+
+    return old.equals(new)
+
+
+class DatasetStore:
+    """
+    Versioned store for the dataset shared by every page.
+
+    Each commit records a new version of the frame together with the
+    columns it changed. Versions share the buffers of unchanged columns,
+    so keeping a short history for undo costs little memory. Commits that
+    describe their transformation also extend the replayable pipeline.
+    """
+
+    def __init__(self, max_history=5):
+        self.max_history = max_history
+        self.name = None
+        self.source = None
+        self.metadata = {}  # Ingest information such as the dtype compaction report
+        self.last_version = 0  # Version numbers are never reused, even after undo
+        self.column_versions = {}
+        self.pipeline = Pipeline()  # Every recorded step since the upload, for headless replay
+        # List of (version, step, changed columns, frame, column versions, pipeline length)
+        self.history = []
+
+    @property
+    def loaded(self):
+        return bool(self.history)
+
+    @property
+    def version(self):
+        return self.history[-1][0] if self.history else 0
+
+    def current(self):
+        """
+        Return the current version of the dataset.
+
+        The result is a shallow copy: pages can add, replace or modify
+        columns freely and only the columns they touch get copied.
+        """
+        if not self.history:
+            return None
+        return self.history[-1][3].copy(deep=False)
+
+    def load(self, df, name, source=None, metadata=None):
+        """
+        Start a new dataset, discarding the history of the previous one.
+        """
+        self.name = name
+        self.source = source
+        self.metadata = metadata or {}
+        self.history = []
+        self.column_versions = {}
+        self.pipeline = Pipeline()
+        return self._record(df, "Upload", list(df.columns))
+
+    def commit(self, df, step, pipeline_step=None):
+        """
+        Store the result of a page as the next version of the dataset.
+
+        Parameters:
+        df (DataFrame): Result produced by the page.
+        step (str): Short description of the step shown in the history.
+        pipeline_step (PipelineStep): Transformation that produced df; it is
+            fitted on the previous version and added to the pipeline.
+
+        Returns:
+        list: Columns that were added or changed by this step.
+        """
+        previous = self.history[-1][3]
+        if pipeline_step is not None:
+            # Fit a copy, so committing the same result twice records two steps;
+            # steps the page already fitted are recorded as they are
+            pipeline_step = copy.copy(pipeline_step)
+            if pipeline_step.fitted is None:
+                pipeline_step.fit(previous)
+            self.pipeline.append(pipeline_step)
+        changed_columns = [
+            col for col in df.columns
+            if col not in previous.columns or not column_unchanged(previous[col], df[col])
+        ]
+        return self._record(df, step, changed_columns)
+
+    def undo(self):
+        """
+        Return to the previous version, if there is one.
+        """
+        if len(self.history) < 2:
+            return False
+        self.history.pop()
+        self.column_versions = dict(self.history[-1][4])
+        del self.pipeline.steps[self.history[-1][5]:]
+        return True
+
+    def column_version(self, col):
+        """
+        Version in which the given column was last changed.
+        """
+        return self.column_versions.get(col)
+
+    def _record(self, df, step, changed_columns):
+        self.last_version += 1
+        for col in changed_columns:
+            self.column_versions[col] = self.last_version
+
+        # Forget columns that the new version no longer has
+        for col in list(self.column_versions):
+            if col not in df.columns:
+                del self.column_versions[col]
+
+        self.history.append((self.last_version, step, changed_columns, df.copy(deep=False),
+                             dict(self.column_versions), len(self.pipeline)))
+        if len(self.history) > self.max_history:
+            self.history.pop(0)
+        return changed_columns
+
+
+def get_store():
+    """
+    Return the dataset store of the current session.
+    """
+    if "dataset_store" not in st.session_state:
+        st.session_state.dataset_store = DatasetStore()
+    return st.session_state.dataset_store
+
+
+def require_dataset():
+    """
+    Return the current dataset, or show a warning when nothing was uploaded yet.
+    """
+    store = get_store()
+    if not store.loaded:
+        st.warning("Please upload a CSV file first on the input page.")
+        return None
+    return store.current()
+
+
+def commit_button(df, step, label="Use this result for the next steps", key=None, container=st,
+                  pipeline_step=None):
+    """
+    Show a button that stores a page's result as the next dataset version.
+
+    The commit runs as a button callback with the frame captured in this
+    run, so the button also works inside sections shown by other buttons.
+    The optional pipeline step is only fitted when the button is clicked.
+    """
+    store = get_store()
+    return container.button(label, key=key or f"commit_{step}", on_click=store.commit,
+                            args=(df, step, pipeline_step))
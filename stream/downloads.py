@@ -0,0 +1,33 @@
+import os
+
+import streamlit as st
+
+from data_io import DOWNLOAD_FORMATS, download_filename, dataframe_to_file
+
+
+def download_format_choice(container=st, key=None):
+    """
+    Let the user pick one of the DOWNLOAD_FORMATS.
+    """
+    return container.radio("Download format", list(DOWNLOAD_FORMATS), horizontal=True, key=key)
+
+
+def download_button(df, filename, download_format="CSV", label="Download", key=None, container=st):
+    """
+    Show a button that downloads a DataFrame in the chosen format.
+
+    Nothing is serialized while the page runs: the frame is only written
+    out, to a temporary file, when the button is clicked, and clicking does
+    not rerun the page.
+    """
+    file_format, mime = DOWNLOAD_FORMATS[download_format]
+    file_name = download_filename(filename, file_format)
+    member_name = f"{os.path.splitext(os.path.basename(filename))[0]}.csv"
+    return container.download_button(
+        label=f"{label} ({download_format})",
+        data=lambda: dataframe_to_file(df, file_format, member_name),
+        file_name=file_name,
+        mime=mime,
+        key=key or f"download_{filename}",
+        on_click="ignore",
+    )
@@ -0,0 +1,178 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Text columns are 'object' with the default parser, 'string' when the data
+# is Arrow-backed and 'category' after dtype compaction
+CATEGORICAL_DTYPES = ['object', 'string', 'category']
+
+# Integer widths tried, smallest first, when compacting integer columns
+INTEGER_BITS = [8, 16, 32]
+
+
+def categorical_columns(df):
+    """
+    Names of the text (categorical) columns, whatever backend stores them.
+    """
+    return df.select_dtypes(include=CATEGORICAL_DTYPES).columns.tolist()
+
+
+def is_categorical(series):
+    """
+    Check whether a single column holds text (categorical) values.
+    """
+    return (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+            or isinstance(series.dtype, pd.CategoricalDtype))
+
+
+def numeric_columns(df):
+    """
+    Names of the numerical columns of any width (int8 to int64, float32, float64).
+    """
+    return df.select_dtypes(include='number').columns.tolist()
+
+
+def widen(series):
+    """
+    Return integer columns as 64-bit integers, so that arithmetic on
+    compacted columns (e.g. x + 1 or x ** 2) cannot overflow.
+    """
+    if pd.api.types.is_integer_dtype(series) and series.dtype.itemsize < 8:
+        return series.astype(_same_backend_dtype(series.dtype, np.dtype('int64')))
+    return series
+
+
+def like_column(values, series):
+    """
+    Return float values computed from a numeric column as a Series in the
+    column's dtype and backend, or as 64-bit floats of the same backend
+    when an integer column gets fractional values. NaN becomes missing.
+    """
+    dtype = series.dtype
+    if pd.api.types.is_integer_dtype(dtype):
+        observed = values[~np.isnan(values)]
+        if not np.array_equal(observed, np.trunc(observed)):
+            dtype = _same_backend_dtype(dtype, np.dtype('float64'))
+    return pd.Series(values, index=series.index, name=series.name).astype(dtype)
+
+
+def fill_column(series, value):
+    """
+    Fill the missing values of a column with value. Integer columns are
+    first turned into 64-bit floats of the same backend when value is not
+    a whole number (e.g. a mean), as Arrow-backed integer columns would
+    truncate it and nullable ones reject it.
+    """
+    if (pd.api.types.is_integer_dtype(series) and pd.api.types.is_number(value) and np.isfinite(value)
+            and not float(value).is_integer()):
+        series = series.astype(_same_backend_dtype(series.dtype, np.dtype('float64')))
+    return series.fillna(value)
+
+
+def dense_rows(rows):
+    """
+    Store the sparse columns of some rows densely, for writers and viewers
+    that only take dense columns.
+    """
+    sparse_cols = {col: dtype.subtype for col, dtype in rows.dtypes.items() if isinstance(dtype, pd.SparseDtype)}
+    return rows.astype(sparse_cols) if sparse_cols else rows
+
+
+def float_dtype(series):
+    """
+    The float dtype arithmetic on a numeric column gives: float32 for
+    float32 columns and 64-bit floats otherwise, in the column's backend.
+    """
+    float32 = getattr(series.dtype, 'numpy_dtype', series.dtype) == np.float32
+    return _same_backend_dtype(series.dtype, np.dtype('float32' if float32 else 'float64'))
+
+
+def _same_backend_dtype(dtype, numpy_dtype):
+    # Express a NumPy dtype in the backend (NumPy, nullable or Arrow) of an existing column
+    if isinstance(dtype, pd.ArrowDtype):
+        return pd.ArrowDtype(pa.from_numpy_dtype(numpy_dtype))
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype):
+        return pd.api.types.pandas_dtype(numpy_dtype.name.capitalize().replace("Ui", "UI"))
+    return numpy_dtype
+
+
+def _compact_integer(series):
+    if series.isnull().all():
+        return None
+    lowest, highest = series.min(), series.max()
+    prefix = 'uint' if lowest >= 0 else 'int'
+    for bits in INTEGER_BITS:
+        info = np.iinfo(f'{prefix}{bits}')
+        if info.min <= lowest and highest <= info.max:
+            if bits < series.dtype.itemsize * 8:
+                return _same_backend_dtype(series.dtype, np.dtype(f'{prefix}{bits}'))
+            return None
+    return None
+
+
+def _compact_float(series, float32):
+    if series.dtype.itemsize <= 4:
+        return None
+    if not float32:
+        # Only downcast when every value survives the round trip through float32
+        values = series.to_numpy(dtype='float64', na_value=np.nan)
+        with np.errstate(over='ignore'):
+            round_trip = values.astype(np.float32).astype(np.float64)
+        if not np.array_equal(round_trip, values, equal_nan=True):
+            return None
+    return _same_backend_dtype(series.dtype, np.dtype('float32'))
+
+
+def compact_dtypes(df, category_threshold=0.5, float32=False):
+    """
+    Store every column in the smallest dtype that holds its values.
+
+    Parameters:
+    df (DataFrame): Input DataFrame.
+    category_threshold (float): Text columns whose share of distinct values
+        is at most this fraction are converted to 'category'.
+    float32 (bool): Float32 compute mode: store every float column as
+        float32, even when some values lose precision.
+
+    Returns:
+    Tuple: A tuple containing the following:
+        - compacted_df (DataFrame): DataFrame with the compacted dtypes.
+        - report (DataFrame): Memory used by each column before and after.
+    """
+    compacted_df = df.copy(deep=False)
+
+    for col in df.columns:
+        series = df[col]
+        new_dtype = None
+
+        if pd.api.types.is_bool_dtype(series):
+            continue
+        if pd.api.types.is_integer_dtype(series):
+            new_dtype = _compact_integer(series)
+        elif pd.api.types.is_float_dtype(series):
+            new_dtype = _compact_float(series, float32)
+        elif is_categorical(series) and not isinstance(series.dtype, pd.CategoricalDtype):
+            if len(series) and series.nunique() <= category_threshold * len(series):
+                new_dtype = 'category'
+
+        if new_dtype is not None:
+            compacted_df[col] = series.astype(new_dtype)
+
+    return compacted_df, memory_report(df, compacted_df)
+
+
+def memory_report(before_df, after_df):
+    """
+    Compare the memory used by each column of two versions of a DataFrame.
+    """
+    before = before_df.memory_usage(index=False, deep=True)
+    after = after_df.memory_usage(index=False, deep=True)
+    report = pd.DataFrame({
+        'Column': before.index,
+        'Dtype Before': [str(dtype) for dtype in before_df.dtypes],
+        'Dtype After': [str(after_df[col].dtype) if col in after_df.columns else '' for col in before.index],
+        'Memory Before (KB)': before.values / 1024,
+        'Memory After (KB)': after.reindex(before.index).values / 1024,
+    })
+    report['Saved (%)'] = (1 - report['Memory After (KB)'] / report['Memory Before (KB)'].where(report['Memory Before (KB)'] > 0)) * 100
+    return report
@@ -0,0 +1,208 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import seaborn as sns
+import streamlit as st
+from matplotlib.figure import Figure
+
+# Default memory budget for rendered figures, overridable through the environment
+DEFAULT_BUDGET_MB = int(os.environ.get("TRIM_FIGURE_CACHE_MB", "128"))
+
+# Worker processes used when several figures miss the cache; 1 renders in the app process
+DEFAULT_WORKERS = int(os.environ.get("TRIM_FIGURE_WORKERS", "1"))
+
+# Same output as st.pyplot: cropped to the drawn area, sharp on high-DPI screens
+DEFAULT_FORMAT = "png"
+DEFAULT_DPI = 200
+
+
+def render_figure(draw, args=(), file_format=DEFAULT_FORMAT, dpi=DEFAULT_DPI):
+    """
+    Draw a figure and return it encoded as PNG or SVG bytes.
+
+    The figure is created without pyplot, so it is never registered in
+    pyplot's list of open figures and is released as soon as it has been
+    encoded.
+
+    Parameters:
+    draw (callable): Module-level function called as draw(ax, *args).
+    args (tuple): Arguments of the draw function.
+    file_format (str): 'png' or 'svg'.
+    dpi (int): Resolution of PNG output.
+
+    Returns:
+    bytes: The encoded figure.
+    """
+    fig = Figure()
+    try:
+        draw(fig.subplots(), *args)
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=file_format, dpi=dpi, bbox_inches="tight")
+    finally:
+        fig.clear()
+    return buffer.getvalue()
+
+
+class FigureJob:
+    """
+    One figure to show: its cache key, the function drawing it, and a
+    callable building the draw arguments.
+
+    The arguments are only built when the figure is not cached, so the
+    work of preparing the plotted data is skipped on a cache hit too. The
+    key should identify everything the figure depends on, e.g. the
+    fingerprints of the plotted columns, the plot type and its parameters.
+    """
+
+    def __init__(self, key, draw, build_args, file_format=DEFAULT_FORMAT):
+        self.key = (key, draw.__name__, file_format)
+        self.draw = draw
+        self.build_args = build_args
+        self.file_format = file_format
+
+
+class FigureCache:
+    """
+    Least-recently-used cache of rendered figures with a memory budget.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_BUDGET_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= len(self._entries.pop(key))
+            if len(data) > self.max_bytes:
+                return
+            self._entries[key] = data
+            self.current_bytes += len(data)
+            # Drop least recently used entries until the cache fits the budget
+            while self.current_bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def render(self, jobs, workers=None):
+        """
+        Return the encoded figures of the jobs, in order, rendering the ones
+        that are not cached. With more than one worker, missing figures are
+        rendered in parallel by a pool of worker processes.
+        """
+        results = [self.get(job.key) for job in jobs]
+        missing = [i for i, data in enumerate(results) if data is None]
+        if not missing:
+            return results
+
+        tasks = [(jobs[i].draw, tuple(jobs[i].build_args()), jobs[i].file_format) for i in missing]
+        workers = DEFAULT_WORKERS if workers is None else workers
+        if workers > 1 and len(tasks) > 1:
+            futures = [_get_pool(workers).submit(render_figure, draw, args, file_format)
+                       for draw, args, file_format in tasks]
+            rendered = [future.result() for future in futures]
+        else:
+            rendered = [render_figure(draw, args, file_format) for draw, args, file_format in tasks]
+
+        for i, data in zip(missing, rendered):
+            self.put(jobs[i].key, data)
+            results[i] = data
+        return results
+
+
+_shared_cache = None
+_pool = None
+_pool_workers = None
+_shared_lock = threading.Lock()
+
+
+def get_figure_cache():
+    """
+    Return the process-wide figure cache shared by all sessions.
+    """
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = FigureCache()
+        return _shared_cache
+
+
+def _get_pool(workers):
+    global _pool, _pool_workers
+    with _shared_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _pool_workers = workers
+        return _pool
+
+
+def show_figures(jobs, container=st, workers=None):
+    """
+    Display figures through the cache, rendering the missing ones first.
+    """
+    for job, data in zip(jobs, get_figure_cache().render(jobs, workers)):
+        if job.file_format == "svg":
+            container.image(data.decode("utf-8"), width="stretch")
+        else:
+            container.image(data, width="stretch")
+
+
+def density_curves(curves):
+    """
+    Evaluate (binned, label, linestyle) entries into the (x, y, label,
+    linestyle) curves drawn by draw_density_comparison, skipping columns
+    without a density estimate.
+    """
+    return [binned.density() + (label, linestyle) for binned, label, linestyle in curves if binned is not None]
+
+
+# Draw functions. They live here rather than in the pages so that worker
+# processes can import them; their arguments must be picklable.
+
+def draw_density_comparison(ax, curves, title, xlabel):
+    """
+    Density curves of one column, given as (x, y, label, linestyle) tuples.
+    """
+    for x, y, label, linestyle in curves:
+        ax.plot(x, y, label=label, linestyle=linestyle)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel("Density")
+    if curves:
+        ax.legend()
+
+
+def draw_boxplot_comparison(ax, data, title, xlabel):
+    """
+    Side-by-side box plots of the columns of a DataFrame.
+    """
+    sns.boxplot(data=data, ax=ax, palette='Set3', width=0.5)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel("Value")
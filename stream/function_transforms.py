@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from dtypes import float_dtype, widen
+
+# Function transforms, by name: label
+FUNCTION_TRANSFORMS = {"log": "Log", "reciprocal": "Reciprocal", "square": "Square", "sqrt": "Square Root"}
+
+# Columns are transformed this many values at a time, so that every operation
+# of a transform runs on values still in the CPU cache
+BLOCK_ROWS = 16_384
+
+
+def _log(block):
+    # Adding 1 to handle zero values
+    np.log(np.add(block, 1, out=block), out=block)
+
+
+def _reciprocal(block):
+    np.divide(1, np.add(block, 1, out=block), out=block)
+
+
+def _square(block):
+    np.square(block, out=block)
+
+
+def _sqrt(block):
+    np.sqrt(block, out=block)
+
+
+_OPERATIONS = {"log": _log, "reciprocal": _reciprocal, "square": _square, "sqrt": _sqrt}
+
+
+def transform_values(series, transform):
+    """
+    Transform a numeric column with one of FUNCTION_TRANSFORMS.
+
+    The values are copied once into the output buffer and transformed in
+    place, block by block, so no intermediate column is ever allocated.
+    Squares of integer columns are 64-bit integers; any other result is
+    float, float32 for float32 columns, in the column's backend.
+
+    Returns:
+    Series: The transformed values, with the index of the column.
+    """
+    if transform not in _OPERATIONS:
+        raise ValueError(f"Unknown function transform: {transform}")
+    if transform == "square" and pd.api.types.is_integer_dtype(series):
+        # Squares of integer columns stay integers, in 64 bits so they cannot overflow
+        dtype = widen(series.head(0)).dtype
+        compute_dtype = np.float64 if series.hasnans else np.int64
+    else:
+        dtype = float_dtype(series)
+        compute_dtype = getattr(dtype, "numpy_dtype", dtype)
+    values = series.to_numpy(dtype=compute_dtype, na_value=np.nan, copy=True)
+
+    operation = _OPERATIONS[transform]
+    with np.errstate(all="ignore"):
+        for start in range(0, len(values), BLOCK_ROWS):
+            operation(values[start:start + BLOCK_ROWS])
+    return pd.Series(values, index=series.index, name=series.name).astype(dtype)
+
+
+def apply_function_transform(df, columns, transform):
+    """
+    Add the transformed column '<col>_<transform>' for every column; the
+    columns of df are shared, not copied.
+    """
+    df = df.copy(deep=False)
+    for col in columns:
+        df[f"{col}_{transform}"] = transform_values(df[col], transform)
+    return df
@@ -0,0 +1,155 @@
+import numpy as np
+from scipy.signal import fftconvolve
+
+# Same defaults as seaborn's kdeplot: Scott's rule bandwidth, 200 evaluation
+# points, and a curve extending 3 bandwidths beyond the data on both sides
+DEFAULT_GRIDSIZE = 200
+DEFAULT_CUT = 3
+
+# The binning grid is at least BINS_PER_BANDWIDTH bins per bandwidth wide,
+# which keeps the binned estimate within plotting accuracy of the exact one
+BINS_PER_BANDWIDTH = 4
+MIN_BINS = 512
+MAX_BINS = 65536
+
+# Kernel truncation, in bandwidths
+KERNEL_RADIUS = 4
+
+
+def numeric_array(series):
+    """
+    Non-null values of a numeric column as a float ndarray.
+    """
+    values = series.to_numpy(dtype=float, na_value=np.nan)
+    return values[~np.isnan(values)]
+
+
+def scott_bandwidth(count, std):
+    return std * count ** (-1 / 5)
+
+
+class BinnedData:
+    """
+    Linearly binned values of a column, from which Gaussian KDE curves are
+    computed by FFT convolution on the bin grid.
+
+    Binning costs one pass over the values; every density computed
+    afterwards only depends on the number of bins, not on the number of
+    rows. Count, mean and variance are kept exactly, so the bandwidth is
+    the same as gaussian_kde's.
+    """
+
+    def __init__(self, start, step, weights, count, mean, m2):
+        self.start = start
+        self.step = step
+        self.weights = weights
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self._densities = {}
+
+    @classmethod
+    def from_values(cls, values):
+        """
+        Bin a float ndarray without missing values. Returns None when there are
+        too few distinct values for a density estimate.
+        """
+        count = len(values)
+        if count < 2:
+            return None
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        low, high = float(values.min()), float(values.max())
+        if high == low:
+            return None
+
+        bandwidth = scott_bandwidth(count, np.sqrt(m2 / (count - 1)))
+        bins = int(np.clip(np.ceil((high - low) / bandwidth * BINS_PER_BANDWIDTH) + 1, MIN_BINS, MAX_BINS))
+        step = (high - low) / (bins - 1)
+
+        weights = np.zeros(bins)
+        _add_linear(weights, (values - low) / step, 1.0)
+        return cls(low, step, weights, count, mean, m2)
+
+    @classmethod
+    def from_series(cls, series):
+        return cls.from_values(numeric_array(series))
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / (self.count - 1))
+
+    @property
+    def bandwidth(self):
+        return scott_bandwidth(self.count, self.std)
+
+    def with_point_mass(self, value, weight):
+        """
+        Return the binned data with `weight` extra copies of `value` added,
+        e.g. the mean or median used to fill missing values. The value must
+        lie within the range of the binned values.
+        """
+        if weight == 0:
+            return self
+        weights = self.weights.copy()
+        _add_linear(weights, np.array([(value - self.start) / self.step]), float(weight))
+
+        # Merge the point mass into the running mean and variance
+        count = self.count + weight
+        delta = value - self.mean
+        mean = self.mean + delta * weight / count
+        m2 = self.m2 + delta ** 2 * self.count * weight / count
+        return BinnedData(self.start, self.step, weights, count, mean, m2)
+
+    def density(self, gridsize=DEFAULT_GRIDSIZE, cut=DEFAULT_CUT):
+        """
+        Evaluate the Gaussian KDE on `gridsize` points spanning the data
+        range extended by `cut` bandwidths on both sides.
+
+        Returns:
+        Tuple: A tuple containing the following:
+            - x (ndarray): Evaluation points.
+            - y (ndarray): Estimated density at those points.
+        """
+        key = (gridsize, cut)
+        if key not in self._densities:
+            self._densities[key] = self._density(gridsize, cut)
+        return self._densities[key]
+
+    def _density(self, gridsize, cut):
+        bandwidth = self.bandwidth
+        bins = len(self.weights)
+
+        # Pad the grid so the curve can extend cut bandwidths beyond the data
+        pad = int(np.ceil(cut * bandwidth / self.step)) + 1
+        weights = np.concatenate([np.zeros(pad), self.weights, np.zeros(pad)])
+
+        radius = int(np.ceil(KERNEL_RADIUS * bandwidth / self.step))
+        offsets = np.arange(-radius, radius + 1) * self.step / bandwidth
+        kernel = np.exp(-0.5 * offsets ** 2) / (np.sqrt(2 * np.pi) * bandwidth * self.count)
+
+        smoothed = fftconvolve(weights, kernel, mode="same") if radius else weights * kernel[0]
+        smoothed = np.maximum(smoothed, 0)  # FFT round-off can leave tiny negative values
+
+        grid = self.start + (np.arange(len(weights)) - pad) * self.step
+        low = self.start - cut * bandwidth
+        high = self.start + (bins - 1) * self.step + cut * bandwidth
+        x = np.linspace(low, high, gridsize)
+        return x, np.interp(x, grid, smoothed)
+
+
+def _add_linear(weights, positions, weight):
+    # Linear binning: split each value between its two neighbouring grid points
+    positions = np.clip(positions, 0, len(weights) - 1)
+    lower = np.minimum(np.floor(positions).astype(np.int64), len(weights) - 2)
+    fraction = positions - lower
+    weights += np.bincount(lower, weights=(1 - fraction) * weight, minlength=len(weights))
+    weights += np.bincount(lower + 1, weights=fraction * weight, minlength=len(weights))
+
+
+def kde_curve(series, gridsize=DEFAULT_GRIDSIZE, cut=DEFAULT_CUT):
+    """
+    Binned KDE of a column, or None when it has too few distinct values.
+    """
+    binned = BinnedData.from_series(series)
+    return None if binned is None else binned.density(gridsize, cut)
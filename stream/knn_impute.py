@@ -0,0 +1,192 @@
+import numpy as np
+from sklearn.impute import KNNImputer
+from sklearn.neighbors import NearestNeighbors
+
+# Up to this many rows, KNNImputer's dense distance computation is fast enough
+DENSE_MAX_ROWS = 10_000
+
+# Rows with missing values whose neighbors are looked up at once, bounding
+# the memory used for distances to n_neighbors per row and donor pattern
+DEFAULT_BLOCK_ROWS = 10_000
+
+# The indexed search queries every donor group for every pattern of rows to
+# impute; with more patterns than this on either side (scattered missing
+# values) it is slower than KNNImputer, which is used instead
+MAX_PATTERNS = 32
+
+KNN_METHODS = ("auto", "dense", "indexed")
+
+
+def _as_float_array(X):
+    if hasattr(X, "to_numpy"):
+        return X.to_numpy(dtype=float, na_value=np.nan)
+    return np.asarray(X, dtype=float)
+
+
+def _neighbor_weights(distances, weights):
+    # Same weighting as KNNImputer: with 'distance', a donor at distance
+    # zero takes all the weight of its row
+    if weights == "uniform":
+        return np.ones_like(distances)
+    with np.errstate(divide="ignore"):
+        inverse = 1.0 / distances
+    exact = np.isinf(inverse)
+    exact_rows = exact.any(axis=1)
+    inverse[exact_rows] = exact[exact_rows]
+    return inverse
+
+
+class IndexedKNNImputer:
+    """
+    KNN imputation that only looks up neighbors for rows with missing values.
+
+    Gives the same result as KNNImputer with the nan_euclidean metric, without
+    its distance matrix between every row to impute and every row of the fit
+    data. Rows of the fit data are grouped by which columns they have
+    values for. The distance between a row to impute and the rows of one
+    group only involves the columns both have, scaled by the same factor,
+    so the nearest rows of each group are found with a regular neighbor
+    index (KD-tree or ball tree) on those columns, and merged across groups.
+
+    Rows are looked up in blocks, and queries run on all cores. Ties
+    between equally distant neighbors may be broken differently than by
+    KNNImputer. When the fit data or the data to impute has more than
+    max_patterns missingness patterns, KNNImputer does the imputation.
+    """
+
+    def __init__(self, n_neighbors=5, weights="uniform", block_rows=DEFAULT_BLOCK_ROWS, n_jobs=-1,
+                 max_patterns=MAX_PATTERNS):
+        if weights not in ("uniform", "distance"):
+            raise ValueError(f"Unknown weights: {weights}")
+        self.n_neighbors = n_neighbors
+        self.weights = weights
+        self.block_rows = block_rows
+        self.n_jobs = n_jobs
+        self.max_patterns = max_patterns
+
+    def fit(self, X):
+        self._fit_X = _as_float_array(X)
+        observed = ~np.isnan(self._fit_X)
+        # Used when no row shares a column with the row to impute, NaN for empty columns
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self._col_means = np.where(observed, self._fit_X, 0).sum(axis=0) / observed.sum(axis=0)
+
+        # Group the rows of the fit data by the columns they have values for
+        patterns, inverse = np.unique(observed, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        self._groups = [(pattern, np.flatnonzero(inverse == i)) for i, pattern in enumerate(patterns) if pattern.any()]
+        self._indexes = {}
+        self._dense = None
+        return self
+
+    @property
+    def dense_fallback(self):
+        # Whether the fit data alone has too many patterns for the indexed search
+        return len(self._groups) > self.max_patterns
+
+    def _dense_transform(self, X):
+        if self._dense is None:
+            self._dense = KNNImputer(n_neighbors=self.n_neighbors, weights=self.weights,
+                                     keep_empty_features=True).fit(self._fit_X)
+        imputed = self._dense.transform(X)
+        # Columns without any value in the fit data are left as they are, as by the indexed search
+        empty = np.isnan(self._col_means)
+        imputed[:, empty] = X[:, empty]
+        return imputed
+
+    def __getstate__(self):
+        # Neighbor indexes are rebuilt on demand rather than stored
+        state = dict(self.__dict__)
+        state["_indexes"] = {}
+        state["_dense"] = None
+        return state
+
+    def _index(self, group, shared):
+        key = (group, shared.tobytes())
+        if key not in self._indexes:
+            rows = self._groups[group][1]
+            self._indexes[key] = NearestNeighbors(n_jobs=self.n_jobs).fit(self._fit_X[np.ix_(rows, np.flatnonzero(shared))])
+        return self._indexes[key]
+
+    def transform(self, X):
+        X = _as_float_array(X).copy()
+        n_features = X.shape[1]
+        missing = np.isnan(X)
+        # Columns without any value in the fit data are left as they are
+        imputable = ~np.isnan(self._col_means)
+
+        to_impute = np.flatnonzero((missing & imputable).any(axis=1))
+        if not len(to_impute):
+            return X
+        if self.dense_fallback:
+            return self._dense_transform(X)
+        patterns, inverse = np.unique(~missing[to_impute], axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        if len(patterns) > self.max_patterns:
+            return self._dense_transform(X)
+
+        for p, pattern in enumerate(patterns):
+            rows = to_impute[inverse == p]
+            targets = np.flatnonzero(~pattern & imputable)
+            for start in range(0, len(rows), self.block_rows):
+                block = rows[start:start + self.block_rows]
+                X[np.ix_(block, targets)] = self._impute_block(X[block], pattern, targets, n_features)
+        return X
+
+    def fit_transform(self, X):
+        return self.fit(X).transform(X)
+
+    def _impute_block(self, block, pattern, targets, n_features):
+        # Nearest rows of every group sharing at least one column with the block
+        candidates = []
+        for group, (group_pattern, group_rows) in enumerate(self._groups):
+            shared = pattern & group_pattern
+            if not shared.any() or not group_pattern[targets].any():
+                continue
+            k = min(self.n_neighbors, len(group_rows))
+            distances, positions = self._index(group, shared).kneighbors(block[:, shared], n_neighbors=k)
+            # nan_euclidean scales the distance up for the columns left out
+            distances = distances * np.sqrt(n_features / shared.sum())
+            candidates.append((group_pattern, distances, group_rows[positions]))
+
+        values = np.empty((len(block), len(targets)))
+        for t, col in enumerate(targets):
+            # Donors for a column are the rows that have a value for it
+            donors = [(distances, rows) for group_pattern, distances, rows in candidates if group_pattern[col]]
+            if not donors:
+                values[:, t] = self._col_means[col]
+                continue
+            distances = np.hstack([d for d, _ in donors])
+            rows = np.hstack([r for _, r in donors])
+            if distances.shape[1] > self.n_neighbors:
+                nearest = np.argpartition(distances, self.n_neighbors - 1, axis=1)[:, :self.n_neighbors]
+                distances = np.take_along_axis(distances, nearest, axis=1)
+                rows = np.take_along_axis(rows, nearest, axis=1)
+            weights = _neighbor_weights(distances, self.weights)
+            values[:, t] = (weights * self._fit_X[rows, col]).sum(axis=1) / weights.sum(axis=1)
+        return values
+
+
+def make_knn_imputer(n_neighbors=5, weights="uniform", method="dense", rows=None):
+    """
+    Return an imputer for the given neighbor search method.
+
+    Parameters:
+    n_neighbors (int): Number of neighbors averaged for each missing value.
+    weights (str): 'uniform' or 'distance'.
+    method (str): 'dense' for KNNImputer, 'indexed' for IndexedKNNImputer, or
+    'auto' to pick the dense one for up to DENSE_MAX_ROWS rows. The indexed
+    one itself uses KNNImputer for data with more than MAX_PATTERNS
+    missingness patterns.
+    rows (int): Number of rows of the data, used by 'auto'.
+
+    Returns:
+    An unfitted imputer with fit, transform and fit_transform methods.
+    """
+    if method not in KNN_METHODS:
+        raise ValueError(f"Unknown KNN method: {method}")
+    if method == "auto":
+        method = "dense" if rows is not None and rows <= DENSE_MAX_ROWS else "indexed"
+    if method == "dense":
+        return KNNImputer(n_neighbors=n_neighbors, weights=weights)
+    return IndexedKNNImputer(n_neighbors=n_neighbors, weights=weights)
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+# Code dtypes tried, smallest first; code -1 is kept for missing and unseen values
+CODE_DTYPES = [np.int8, np.int16, np.int32, np.int64]
+
+
+def code_dtype(n_categories):
+    """
+    Smallest signed integer dtype holding the codes of n_categories categories.
+    """
+    return next(dtype for dtype in CODE_DTYPES if n_categories - 1 <= np.iinfo(dtype).max)
+
+
+def _sorted_factorize(series):
+    try:
+        codes, uniques = pd.factorize(series, sort=True)
+    except TypeError:
+        # Mixed types in an object column: order the categories by their text
+        codes, uniques = pd.factorize(series)
+        order = np.argsort(np.asarray(uniques, dtype=str), kind="stable")
+        positions = np.empty_like(order)
+        positions[order] = np.arange(len(order))
+        codes, uniques = np.where(codes >= 0, positions[codes], -1), uniques[order]
+    return codes, list(uniques)
+
+
+def fit_label_encoding(df, columns):
+    """
+    Encode the columns with the codes of their sorted categories, fitting
+    the category-to-code mapping of each column on the way.
+
+    Every column is factorized in a single hashing pass; its codes are
+    stored in the smallest integer dtype that holds them, with -1 for
+    missing values.
+
+    Returns:
+    Tuple: A tuple containing the following:
+        - encoded_df (DataFrame): A copy of df with the columns encoded.
+        - mappings (dict): Mapping of column name to its categories, in code order.
+    """
+    df = df.copy(deep=False)
+    mappings = {}
+    for col in columns:
+        codes, mappings[col] = _sorted_factorize(df[col])
+        df[col] = codes.astype(code_dtype(len(mappings[col])))
+    return df, mappings
+
+
+def lookup_codes(series, categories):
+    """
+    Position of every value of a column in categories, by hash lookup;
+    -1 for missing values and values not among them.
+    """
+    index = pd.Index(categories)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Look up each category once rather than every value
+        lookup = np.append(index.get_indexer(series.cat.categories), -1)
+        return lookup[series.cat.codes.to_numpy()]
+    return index.get_indexer(series)
+
+
+def encode_labels(df, mappings):
+    """
+    Encode new data with fitted mappings. Missing values and values not
+    seen when the mappings were fitted get the code -1.
+    """
+    df = df.copy(deep=False)
+    for col, categories in mappings.items():
+        df[col] = lookup_codes(df[col], categories).astype(code_dtype(len(categories)))
+    return df
+
+
+def mapping_table(mappings):
+    """
+    The category-to-code tables as one DataFrame, e.g. to download them.
+    """
+    return pd.DataFrame([(col, category, code) for col, categories in mappings.items()
+                         for code, category in enumerate(categories)], columns=["Column", "Category", "Code"])
@@ -0,0 +1,175 @@
+import re
+import sys
+import threading
+import warnings
+
+import numpy as np
+from sklearn.ensemble import ExtraTreesRegressor
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.experimental import enable_iterative_imputer  # noqa: F401
+from sklearn.impute import IterativeImputer
+from sklearn.linear_model import BayesianRidge, Ridge
+from sklearn.neighbors import KNeighborsRegressor
+
+# Estimators predicting each column from the others, by name: label and factory
+MICE_ESTIMATORS = {
+    "bayesian_ridge": ("Bayesian ridge (default)", BayesianRidge),
+    "ridge": ("Ridge", Ridge),
+    "knn": ("K nearest neighbors", lambda: KNeighborsRegressor(n_neighbors=15)),
+    "extra_trees": ("Extra trees (non-linear, slowest)",
+                    lambda: ExtraTreesRegressor(n_estimators=10, min_samples_leaf=5, n_jobs=-1, random_state=0)),
+}
+
+# Suggested sample size when fitting on a subsample of a large dataset;
+# imputers are fitted on every row unless a sample is asked for
+DEFAULT_SAMPLE_ROWS = 50_000
+
+# Progress lines IterativeImputer prints with verbose=2
+_ROUND_LINE = re.compile(r"\[IterativeImputer\] Ending imputation round (\d+)/\d+, elapsed time ([\d.]+)")
+_CHANGE_LINE = re.compile(r"\[IterativeImputer\] Change: (\S+), scaled tolerance: (\S+)")
+
+
+class _ThreadOutput:
+    """
+    Standard output that sends the writes of threads that opened a capture
+    to their own buffer and everything else to the real standard output,
+    so concurrent sessions neither lose their output nor read another's.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        lines = getattr(self.local, "lines", None)
+        if lines is None:
+            return self.stream.write(text)
+        lines.append(text)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+_output_lock = threading.Lock()
+
+
+def _captured_output():
+    # Install the thread-aware standard output once and open a capture for this thread
+    with _output_lock:
+        if not isinstance(sys.stdout, _ThreadOutput):
+            sys.stdout = _ThreadOutput(sys.stdout)
+        sys.stdout.local.lines = []
+        return sys.stdout
+
+
+class TracedIterativeImputer(IterativeImputer):
+    """
+    IterativeImputer that records how much the imputed values changed in
+    every round of fitting and how long the rounds took.
+
+    The rounds are read from the progress IterativeImputer prints when
+    verbose is 2, captured for the fitting thread only. After fitting,
+    trace_ holds one dict per round with the change (the norm
+    IterativeImputer compares with its tolerance) and the seconds elapsed
+    since fitting started; tolerance_ is the scaled tolerance and
+    converged_ tells whether it was reached before max_iter.
+    """
+
+    def fit_transform(self, X, y=None, **params):
+        values = X.to_numpy(dtype=float, na_value=np.nan) if hasattr(X, "to_numpy") else np.asarray(X, dtype=float)
+        observed = values[~np.isnan(values)]
+        self.tolerance_ = self.tol * np.max(np.abs(observed)) if len(observed) else 0.0
+
+        verbose = self.verbose
+        output = _captured_output()
+        try:
+            self.verbose = 2
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always", ConvergenceWarning)
+                Xt = super().fit_transform(X, y, **params)
+        finally:
+            self.verbose = verbose
+            lines = "".join(output.local.lines).splitlines()
+            output.local.lines = None
+        for warning in caught:
+            if not issubclass(warning.category, ConvergenceWarning):
+                warnings.warn_explicit(warning.message, warning.category, warning.filename, warning.lineno)
+
+        self.trace_ = []
+        for line in lines:
+            round_match, change_match = _ROUND_LINE.search(line), _CHANGE_LINE.search(line)
+            if round_match:
+                self.trace_.append({"round": int(round_match.group(1)), "change": np.nan,
+                                    "seconds": float(round_match.group(2))})
+            elif change_match and self.trace_:
+                self.trace_[-1]["change"] = float(change_match.group(1))
+                self.tolerance_ = float(change_match.group(2))
+            if verbose > 0 and line.startswith("[IterativeImputer]") and (verbose > 1 or not round_match):
+                # Keep the output the caller asked for
+                print(line)
+
+        self.converged_ = bool(self.trace_) and self.trace_[-1]["change"] < self.tolerance_
+        return Xt
+
+
+def make_mice_imputer(max_iter=10, estimator="bayesian_ridge", n_nearest_features=None, random_state=0):
+    """
+    Return an unfitted IterativeImputer recording its convergence.
+
+    Parameters:
+    max_iter (int): Maximum number of imputation rounds.
+    estimator (str): Key of MICE_ESTIMATORS.
+    n_nearest_features (int): Number of other columns used to predict each
+    column, chosen by correlation; all columns if None.
+    random_state (int): Seed for the choice of predictors and the estimators.
+    """
+    if estimator not in MICE_ESTIMATORS:
+        raise ValueError(f"Unknown MICE estimator: {estimator}")
+    return TracedIterativeImputer(estimator=MICE_ESTIMATORS[estimator][1](), max_iter=max_iter,
+                                  n_nearest_features=n_nearest_features, random_state=random_state)
+
+
+def stratified_sample(df, columns, max_rows, random_state=0):
+    """
+    Choose about max_rows rows, sampling the same fraction of the rows with
+    each pattern of missing values in the columns.
+
+    Every pattern keeps at least one row, so each column that has values
+    in the data still has values in the sample.
+
+    Returns:
+    ndarray: Sorted row positions, or None when the data has at most max_rows rows.
+    """
+    if not max_rows or len(df) <= max_rows:
+        return None
+    _, patterns = np.unique(df[columns].isna().to_numpy(), axis=0, return_inverse=True)
+    patterns = patterns.reshape(-1)
+    rng = np.random.default_rng(random_state)
+    fraction = max_rows / len(df)
+
+    positions = []
+    for pattern in range(patterns.max() + 1):
+        rows = np.flatnonzero(patterns == pattern)
+        positions.append(rng.choice(rows, max(1, round(len(rows) * fraction)), replace=False))
+    return np.sort(np.concatenate(positions))
+
+
+def fit_mice_imputer(df, columns, max_iter=10, estimator="bayesian_ridge", n_nearest_features=None,
+                     sample_rows=None, random_state=0):
+    """
+    Fit a MICE imputer on the columns, on every row by default or on a
+    stratified subsample of sample_rows rows when that is asked for and the
+    data has more rows.
+
+    Returns:
+    TracedIterativeImputer: The fitted imputer; transform imputes all rows.
+    """
+    imputer = make_mice_imputer(max_iter, estimator, n_nearest_features, random_state)
+    positions = stratified_sample(df, columns, sample_rows, random_state)
+    imputer.fit(df[columns] if positions is None else df[columns].iloc[positions])
+    imputer.sample_rows_ = len(df) if positions is None else len(positions)
+    return imputer
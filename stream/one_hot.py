@@ -0,0 +1,169 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from scipy import sparse
+
+# One-hot output modes, by name: label
+ENCODING_MODES = {"dense": "Dense", "sparse": "Sparse", "hashing": "Hashing"}
+
+# Name of the category the values beyond the top k most frequent ones are put in
+OTHER_CATEGORY = "other"
+
+# Width of the output of each hashed column
+DEFAULT_HASH_FEATURES = 1024
+
+# The automatic choice keeps dense dummies up to this many bytes...
+DENSE_LIMIT_BYTES = 256 * 2**20
+
+# ...and sparse ones up to this many columns, as every column of a DataFrame has a fixed cost
+SPARSE_MAX_COLUMNS = 10_000
+
+# A sparse dummy column stores each True value and its int32 row position
+SPARSE_ENTRY_BYTES = 5
+
+
+class OtherCategory(str):
+    """
+    The bucket category of the values beyond the top k; recognised by its
+    type, so a real value with the same text is never taken for it.
+    """
+
+
+def other_category(kept):
+    """
+    The bucket category for a column keeping the given categories: named
+    OTHER_CATEGORY, or OTHER_CATEGORY with a number when a kept value
+    already has that name.
+    """
+    name, n = OTHER_CATEGORY, 1
+    while name in kept:
+        name, n = f"{OTHER_CATEGORY}_{n}", n + 1
+    return OtherCategory(name)
+
+
+def _value_counts(df, col, profile=None):
+    # Observed values only, most frequent first
+    counts = profile[col].value_counts if profile is not None else df[col].value_counts()
+    return counts[counts > 0]
+
+
+def fit_categories(df, columns, top_k=None, profile=None):
+    """
+    Categories each column is encoded with: all its values in sorted order
+    or, with top_k, its top_k most frequent values in sorted order followed
+    by the bucket category from other_category, which the remaining values
+    go to.
+
+    Returns:
+    dict: Mapping of column name to its list of categories.
+    """
+    categories = {}
+    for col in columns:
+        counts = _value_counts(df, col, profile)
+        if top_k and len(counts) > top_k:
+            kept = sorted(counts.index[:top_k].tolist())
+            categories[col] = kept + [other_category(kept)]
+        else:
+            categories[col] = sorted(counts.index.tolist())
+    return categories
+
+
+def estimate_sizes(df, columns, categories, drop_first=True, n_features=DEFAULT_HASH_FEATURES, profile=None):
+    """
+    Pre-flight estimate of the output of every mode, from the value counts
+    of the columns, without encoding anything.
+
+    Returns:
+    DataFrame: Number of output columns and bytes of each mode (rows).
+    """
+    width, stored, observed = 0, 0, 0
+    for col in columns:
+        counts = _value_counts(df, col, profile)
+        dropped = counts.get(categories[col][0], 0) if drop_first and categories[col] else 0
+        width += max(len(categories[col]) - drop_first, 0)
+        observed += int(counts.sum())
+        stored += int(counts.sum()) - int(dropped)
+
+    return pd.DataFrame({
+        "Columns": [width, width, len(columns) * n_features],
+        "Bytes": [len(df) * width, stored * SPARSE_ENTRY_BYTES, observed * SPARSE_ENTRY_BYTES],
+    }, index=list(ENCODING_MODES))
+
+
+def choose_mode(sizes):
+    """
+    Dense output when it is small enough, sparse output when it has few
+    enough columns, hashing otherwise.
+    """
+    if sizes.loc["dense", "Bytes"] <= DENSE_LIMIT_BYTES:
+        return "dense"
+    if sizes.loc["sparse", "Columns"] <= SPARSE_MAX_COLUMNS:
+        return "sparse"
+    return "hashing"
+
+
+def category_codes(series, categories):
+    """
+    Position of every value in categories, -1 for missing values; values
+    not in categories go to the bucket category when there is one.
+    """
+    codes = pd.Categorical(series, categories=categories).codes.astype(np.int64)
+    if categories and isinstance(categories[-1], OtherCategory):
+        codes[(codes == -1) & series.notna().to_numpy(dtype=bool)] = len(categories) - 1
+    return codes
+
+
+def _sparse_frame(rows, cols, shape, index, names):
+    matrix = sparse.csc_matrix((np.ones(len(rows), dtype=bool), (rows, cols)), shape=shape)
+    return pd.DataFrame.sparse.from_spmatrix(matrix, index=index, columns=names)
+
+
+def _dummies(series, categories, drop_first, mode):
+    codes = category_codes(series, categories)
+    if mode == "dense":
+        # Dummies of Arrow-backed columns stay Arrow-backed, as with get_dummies on the raw column
+        dummy_dtype = pd.ArrowDtype(pa.bool_()) if isinstance(series.dtype, pd.ArrowDtype) else bool
+        values = pd.Series(pd.Categorical.from_codes(codes, categories=categories), index=series.index)
+        return pd.get_dummies(values, prefix=series.name, drop_first=drop_first, dtype=dummy_dtype)
+
+    first = int(drop_first)
+    rows = np.flatnonzero(codes >= first)
+    names = [f"{series.name}_{category}" for category in categories[first:]]
+    return _sparse_frame(rows, codes[rows] - first, (len(series), len(names)), series.index, names)
+
+
+def _hashed(series, n_features):
+    # The buckets come from a fixed hash of each value, so new data lands in the same columns
+    codes, uniques = pd.factorize(series)
+    buckets = (pd.util.hash_array(np.asarray(uniques, dtype=object)) % n_features).astype(np.int64)
+    rows = np.flatnonzero(codes >= 0)
+    names = [f"{series.name}_hash_{i}" for i in range(n_features)]
+    return _sparse_frame(rows, buckets[codes[rows]], (len(series), n_features), series.index, names)
+
+
+def one_hot_encode(df, columns, categories=None, drop_first=True, mode="dense", n_features=DEFAULT_HASH_FEATURES):
+    """
+    Replace the columns with their one-hot encoding, appended after the
+    other columns as pd.get_dummies does.
+
+    Parameters:
+    df (DataFrame): Input DataFrame.
+    columns (list): Categorical columns to encode.
+    categories (dict): Categories of each column, as from fit_categories; fitted on df if omitted.
+    drop_first (bool): Leave out the dummy of the first category.
+    mode (str): 'dense' for bool columns, 'sparse' for sparse bool columns backed by
+        scipy.sparse, 'hashing' for n_features sparse columns per column whose
+        values are hashed into them.
+    n_features (int): Output columns of each hashed column.
+
+    Returns:
+    DataFrame: The encoded DataFrame.
+    """
+    if mode not in ENCODING_MODES:
+        raise ValueError(f"Unknown one-hot mode: '{mode}'")
+    if mode != "hashing" and categories is None:
+        categories = fit_categories(df, columns)
+
+    encoded = [_hashed(df[col], n_features) if mode == "hashing"
+               else _dummies(df[col], categories[col], drop_first, mode) for col in columns]
+    return pd.concat([df.drop(columns=columns), *encoded], axis=1)
@@ -0,0 +1,89 @@
+import io
+
+import pandas as pd
+
+from label_encoder import lookup_codes
+
+# Ways to enter the mappings of the ordinal page, by name: label
+MAPPING_INPUTS = {"order": "Order of the values", "table": "Mapping table", "values": "Value by value"}
+
+# Columns with more values than this are not offered one input per value
+MAX_VALUE_INPUTS = 50
+
+
+def sorted_categories(series, profile=None):
+    """
+    The distinct values of a column in sorted order, by their text when
+    they cannot be compared; the cached value counts of a profile are used
+    when given.
+    """
+    counts = profile[series.name].value_counts if profile is not None else series.value_counts()
+    values = counts[counts > 0].index.tolist()
+    try:
+        return sorted(values)
+    except TypeError:
+        return sorted(values, key=str)
+
+
+def target_values(values):
+    """
+    Mapped values as numbers when they all are, as text otherwise.
+    """
+    try:
+        return pd.to_numeric(pd.Series(values, dtype=object)).tolist()
+    except (TypeError, ValueError):
+        return list(values)
+
+
+def read_mapping_table(data, columns):
+    """
+    Read mappings from a CSV table with a header row: a 'Category' column
+    and a 'Value' (or 'Code') column, plus a 'Column' column when the table
+    maps several columns, as the label encoder's category codes do. A
+    table without rows for one of the columns raises a ValueError.
+
+    Parameters:
+    data (str or bytes): The CSV text, pasted or uploaded.
+    columns (list): Columns to map; without a 'Column' column the table applies to all of them.
+
+    Returns:
+    dict: Mapping of column name to its {category: value} mapping.
+    """
+    buffer = io.BytesIO(data) if isinstance(data, bytes) else io.StringIO(data)
+    table = pd.read_csv(buffer, dtype=str, keep_default_na=False)
+    value_col = next((col for col in ("Value", "Code") if col in table.columns), None)
+    if "Category" not in table.columns or value_col is None:
+        raise ValueError("The mapping table needs a 'Category' column and a 'Value' (or 'Code') column.")
+
+    mappings = {}
+    for col in columns:
+        rows = table[table["Column"] == str(col)] if "Column" in table.columns else table
+        if rows.empty:
+            # An empty mapping would turn every value of the column into a missing one
+            raise ValueError(f"The mapping table has no rows for column '{col}'.")
+        mappings[col] = dict(zip(rows["Category"], target_values(rows[value_col])))
+    return mappings
+
+
+def apply_mappings(df, mappings):
+    """
+    Replace the values of each column by their mapped values.
+
+    Every value is looked up by hash among the mapping's categories and
+    the mapped values are taken by position, instead of mapping an object
+    column through a dict. Missing and unmapped values become missing.
+    """
+    df = df.copy(deep=False)
+    for col, mapping in mappings.items():
+        codes = lookup_codes(df[col], list(mapping))
+        mapped = pd.array(list(mapping.values()))
+        df[col] = pd.Series(mapped.take(codes, allow_fill=True), index=df.index)
+    return df
+
+
+def count_unmapped(df, mapped_df, columns):
+    """
+    Number of values of each column that had no mapping, i.e. were present
+    before mapping and are missing after it.
+    """
+    return {col: int((df[col].notna() & mapped_df[col].isna()).sum()) for col in columns}
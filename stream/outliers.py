@@ -0,0 +1,196 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from dtypes import like_column
+from quantile_sketch import sketch_values
+
+# Outlier detection methods, by name: label
+OUTLIER_METHODS = {"zscore": "Z-score", "iqr": "IQR", "percentile": "Percentile"}
+
+
+def numeric_block(df, columns):
+    """
+    Return the columns as one float ndarray (rows x columns), missing values as NaN.
+    """
+    return df[columns].to_numpy(dtype=float, na_value=np.nan)
+
+
+def block_quantiles(values, probs):
+    """
+    Quantiles of every column of a block, like DataFrame.quantile.
+
+    The block is sorted once, missing values last, and every quantile of
+    every column is read from it by position.
+
+    Returns:
+    ndarray: One row per probability, one column per column of the block.
+    """
+    probs = np.asarray(probs, dtype=float)
+    ordered = np.sort(values, axis=0)
+    counts = (~np.isnan(values)).sum(axis=0)
+    positions = np.maximum(counts - 1, 0)[None, :] * probs[:, None]
+    below = np.floor(positions).astype(np.int64)
+    above = np.minimum(below + 1, np.maximum(counts - 1, 0)[None, :])
+    a, b = np.take_along_axis(ordered, below, axis=0), np.take_along_axis(ordered, above, axis=0)
+    t = positions - below
+    # Interpolation as in np.quantile, exact at both ends
+    result = np.where(t < 0.5, a + (b - a) * t, b - (b - a) * (1 - t))
+    result[:, counts == 0] = np.nan
+    return result
+
+
+def _quantile_rows(df, columns, probs, approximate, profile, values):
+    if profile is not None:
+        return np.array([profile.quantiles(q, columns, approximate=approximate).to_numpy() for q in probs])
+    if approximate:
+        sketches = [sketch_values(np.ascontiguousarray(values[:, j])) for j in range(values.shape[1])]
+        rows = np.array([[sketch.quantile(q) for sketch in sketches] for q in probs])
+        # Quantiles in the tails the sketches cannot resolve are computed exactly
+        tails = np.array([[sketch.in_tail(q) for sketch in sketches] for q in probs], dtype=bool).reshape(rows.shape)
+        if tails.any():
+            rows[tails] = block_quantiles(values, probs)[tails]
+        return rows
+    return block_quantiles(values, probs)
+
+
+def outlier_limits(df, columns, methods=tuple(OUTLIER_METHODS), threshold=3.0, lower_percentile=0.1,
+                   upper_percentile=99.9, approximate=False, profile=None, values=None):
+    """
+    Lower and upper outlier limits of the columns for one or more methods.
+
+    Every statistic the methods need is computed in one pass: the mean and
+    standard deviation of the whole block, and all quantiles from a single
+    sort of it. A DatasetProfile of df, if given, supplies its cached
+    statistics instead, and with approximate the quantiles come from
+    quantile sketches, except tail quantiles within their rank error.
+
+    Parameters:
+    df (DataFrame): Input DataFrame.
+    columns (list): Numerical columns to compute limits for.
+    methods (tuple): Keys of OUTLIER_METHODS.
+    threshold (float): Number of standard deviations for the z-score method.
+    lower_percentile (float): Lower percentile (0-100) for the percentile method.
+    upper_percentile (float): Upper percentile (0-100) for the percentile method.
+    approximate (bool): Read quantiles from quantile sketches.
+    profile (DatasetProfile): Column statistics of df.
+    values (ndarray): The numeric block of the columns, if already built.
+
+    Returns:
+    dict: Mapping of method to a (lower, upper) pair of float ndarrays aligned with columns.
+    """
+    unknown = [method for method in methods if method not in OUTLIER_METHODS]
+    if unknown:
+        raise ValueError(f"Unknown outlier method: '{unknown[0]}'")
+    if profile is None and values is None:
+        values = numeric_block(df, columns)
+
+    probs = []
+    if "iqr" in methods:
+        probs += [0.25, 0.75]
+    if "percentile" in methods:
+        probs += [lower_percentile / 100, upper_percentile / 100]
+    quantiles = dict(zip(probs, _quantile_rows(df, columns, probs, approximate, profile, values))) if probs else {}
+
+    limits = {}
+    for method in methods:
+        if method == "zscore":
+            if profile is not None:
+                mean, std = profile.means(columns).to_numpy(), profile.stds(columns).to_numpy()
+            else:
+                # Columns without values have no limits
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", RuntimeWarning)
+                    mean, std = np.nanmean(values, axis=0), np.nanstd(values, axis=0, ddof=1)
+            limits[method] = (mean - threshold * std, mean + threshold * std)
+        elif method == "iqr":
+            q1, q3 = quantiles[0.25], quantiles[0.75]
+            limits[method] = (q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1))
+        else:
+            limits[method] = (quantiles[lower_percentile / 100], quantiles[upper_percentile / 100])
+    return limits
+
+
+def outlier_mask(df, columns, lower, upper, values=None, profile=None, threshold=None):
+    """
+    Boolean mask (rows x columns) of the values below lower or above upper.
+    Missing values are never outliers.
+
+    Without a profile the whole block is compared with the limits at once.
+    With one, the outliers of each column are found by binary search in
+    its sorted index, so only they are touched; given the z-score
+    threshold, the sorted absolute z-scores are searched instead.
+    """
+    if profile is None:
+        values = numeric_block(df, columns) if values is None else values
+        with np.errstate(invalid="ignore"):
+            return (values < lower) | (values > upper)
+
+    mask = np.zeros((len(df), len(columns)), dtype=bool)
+    for j, col in enumerate(columns):
+        index = profile[col].sorted
+        positions = (index.positions_z_above(threshold) if threshold is not None
+                     else index.positions_outside(lower[j], upper[j]))
+        mask[positions, j] = True
+    return mask
+
+
+def trim_outliers(df, mask):
+    """
+    Drop the rows with an outlier in any column of the mask.
+    """
+    return df[~mask.any(axis=1)]
+
+
+def cap_outliers(df, columns, lower, upper, values=None, mask=None):
+    """
+    Clip the columns to their limits, all at once on the numeric block.
+
+    Only columns with clipped values are written back, each in its own
+    dtype when the clipped values fit it. Missing limits leave a side
+    unclipped, as with Series.clip.
+
+    Returns:
+    DataFrame: A copy of df with the columns capped.
+    """
+    values = numeric_block(df, columns) if values is None else values
+    lower = np.where(np.isnan(lower), -np.inf, lower)
+    upper = np.where(np.isnan(upper), np.inf, upper)
+    if mask is None:
+        mask = outlier_mask(df, columns, lower, upper, values=values)
+    capped = np.clip(values, lower, upper)
+
+    df = df.copy(deep=False)
+    changed = np.flatnonzero(mask.any(axis=0))
+    if len(changed):
+        df[[columns[j] for j in changed]] = pd.DataFrame({columns[j]: like_column(capped[:, j], df[columns[j]])
+                                                          for j in changed}, index=df.index)
+    return df
+
+
+def compare_methods(df, columns, threshold=3.0, lower_percentile=0.1, upper_percentile=99.9, profile=None):
+    """
+    Count the outliers every method finds, side by side.
+
+    Returns:
+    Tuple: A tuple containing the following:
+        - counts (DataFrame): Outliers of each column (rows) for each method (columns).
+        - rows (Series): Rows with an outlier in any column, for each method.
+        - limits (DataFrame): Lower and upper limit of each column for each method.
+    """
+    values = None if profile is not None else numeric_block(df, columns)
+    limits = outlier_limits(df, columns, threshold=threshold, lower_percentile=lower_percentile,
+                            upper_percentile=upper_percentile, profile=profile, values=values)
+
+    counts, rows, bounds = {}, {}, {}
+    for method, (lower, upper) in limits.items():
+        label = OUTLIER_METHODS[method]
+        mask = outlier_mask(df, columns, lower, upper, values=values, profile=profile,
+                            threshold=threshold if method == "zscore" else None)
+        counts[label] = mask.sum(axis=0)
+        rows[label] = int(mask.any(axis=1).sum())
+        bounds[(label, "Lower")], bounds[(label, "Upper")] = lower, upper
+
+    return (pd.DataFrame(counts, index=columns), pd.Series(rows, name="Rows with outliers"),
+            pd.DataFrame(bounds, index=columns))
@@ -1,25 +1,31 @@
 import streamlit as st
 import pandas as pd
 
+from column_profile import get_profile, profile_of
+from dataset_store import get_store, require_dataset
+
 def main():
     st.title("Complete Case Analysis and Null Value Analysis")
 
-    # Check if the DataFrame exists in session state
-    if "df" in st.session_state:
-        df = st.session_state.df
-
+    # Read the current version of the shared dataset
+    df = require_dataset()
+    if df is not None:
         # Display explanation of Complete Case Analysis (CCA)
         display_cca_explanation()
 
         # Calculate and display null value percentages
-        null_summary = calculate_null_percentages(df)
+        null_summary = calculate_null_percentages(df, get_profile())
         st.write("### Uploaded Dataframe:")
         st.write(df.head(5))
-        st.write("### Null Value Percentages:")
-        
-        st.write(null_summary)
-    else:
-        st.warning("Please upload a CSV file first on the input page.")
+
+        # Null value percentages next to the memory used by each column
+        null_col, memory_col = st.columns(2)
+        with null_col:
+            st.write("### Null Value Percentages:")
+            st.write(null_summary)
+        with memory_col:
+            st.write("### Memory per Column:")
+            st.write(calculate_memory_usage(df, get_store().metadata.get("memory_report")))
 
 def display_cca_explanation():
     st.write("""
@@ -49,12 +55,12 @@ def display_cca_explanation():
     3. When using our models in production, the model will not know how to handle missing data.
     """)
     #st.write(.head(5))
-def calculate_null_percentages(df):
+def calculate_null_percentages(df, profile=None):
     # Calculate total number of rows
     total_rows = df.shape[0]
 
     # Calculate number of null values in each column
-    null_counts = df.isnull().sum()
+    null_counts = profile_of(df, profile).null_counts()
 
     # Calculate percentage of null values for each column
     null_percentages = (null_counts / total_rows) * 100
@@ -68,5 +74,18 @@ def calculate_null_percentages(df):
 
     return null_summary
 
+def calculate_memory_usage(df, memory_report=None):
+    # Before/after table recorded when dtypes were compacted on ingest
+    if memory_report is not None:
+        return memory_report
+
+    # Otherwise the memory currently used by each column
+    memory = df.memory_usage(index=False, deep=True)
+    return pd.DataFrame({
+        'Column': memory.index,
+        'Dtype': [str(dtype) for dtype in df.dtypes],
+        'Memory (KB)': memory.values / 1024
+    })
+
 if __name__ == "__main__":
     main()
@@ -1,18 +1,19 @@
 import streamlit as st
 import pandas as pd
-import base64  # For handling file download
+
+from dataset_store import commit_button, require_dataset
+from downloads import download_button, download_format_choice
+from pipeline import PipelineStep
+from preview import show_dataframe
 
 def main():
     st.title("Select and Display Remaining Columns")
 
-    # Check if the DataFrame exists in session state
-    if "df" in st.session_state:
-        df = st.session_state.df
-
+    # Read the current version of the shared dataset
+    df = require_dataset()
+    if df is not None:
         # Display option to exclude non-important columns
         select_and_display_remaining_columns(df)
-    else:
-        st.warning("Please upload a CSV file first on the input page.")
 
 def select_and_display_remaining_columns(df):
     st.write("### Exclude Non-Important Columns")
@@ -30,14 +31,15 @@ def select_and_display_remaining_columns(df):
 
         # Display the DataFrame with remaining columns
         st.write("### DataFrame with Remaining Columns")
-        st.write(remaining_df)
-
-        # Button to download the remaining DataFrame as CSV
-        if st.button("Download Remaining DataFrame as CSV"):
-            csv_file = remaining_df.to_csv(index=False)
-            b64 = base64.b64encode(csv_file.encode()).decode()  # B64 encoding for CSV
-            href = f'<a href="data:file/csv;base64,{b64}" download="remaining_dataframe.csv">Download CSV File</a>'
-            st.markdown(href, unsafe_allow_html=True)
+        show_dataframe(remaining_df, key="remaining")
+
+        # Store the remaining columns as the next version of the dataset
+        commit_button(remaining_df, f"Drop columns {', '.join(map(str, non_important_columns))}",
+                      pipeline_step=PipelineStep("drop_columns", columns=non_important_columns))
+
+        # Button to download the remaining DataFrame, serialized only when clicked
+        download_format = download_format_choice()
+        download_button(remaining_df, "remaining_dataframe.csv", download_format, label="Download Remaining DataFrame")
 
 if __name__ == "__main__":
     main()
@@ -1,12 +1,21 @@
 import streamlit as st
-import pandas as pd
+
+from dataset_store import commit_button, require_dataset
+from pipeline import PipelineStep
+from preview import show_dataframe
+
+def parse_indices(indices_to_drop):
+    """
+    Parse comma-separated row indices, ignoring anything that is not an integer.
+    """
+    return [int(idx) for idx in indices_to_drop.split(',') if idx.strip().isdigit()]
 
 def drop_rows_by_indices(df, indices_to_drop):
     """
     Drop rows from the DataFrame based on user-provided indices.
     """
     try:
-        indices_to_drop = [int(idx) for idx in indices_to_drop.split(',') if idx.strip().isdigit()]
+        indices_to_drop = parse_indices(indices_to_drop)
         df_dropped = df.drop(index=indices_to_drop).reset_index(drop=True)
         return df_dropped
     except ValueError:
@@ -27,20 +36,18 @@ def drop_rows_by_value(df, column_name, value_to_drop):
 def main():
     st.title("DataFrame Row Dropping App")
 
-    # File upload
-    st.sidebar.header('Upload your CSV file')
-    uploaded_file = st.sidebar.file_uploader("Upload a CSV file", type=["csv"])
-
-    if uploaded_file is not None:
-        # Read CSV file into DataFrame
-        df = pd.read_csv(uploaded_file)
+    # Read the current version of the shared dataset
+    df = require_dataset()
 
+    if df is not None:
         st.header("Original DataFrame")
-        st.write(df)
+        show_dataframe(df, key="original")
 
         # Sidebar options for row dropping
         st.sidebar.subheader("Drop Rows by Indices")
-        indices_to_drop = st.sidebar.text_input("Enter row indices to drop (comma-separated)", "")
+        indices_to_drop = st.sidebar.text_input("Enter row indices to drop (comma-separated)", "",
+                                                help="Rows dropped by index are only replayed on this same data; "
+                                                     "drop rows by value to clean other files with the pipeline.")
 
         st.sidebar.subheader("Drop Rows by Value in Column")
         column_options = df.columns.tolist()
@@ -51,13 +58,19 @@ def main():
             # Drop rows by specified indices
             df = drop_rows_by_indices(df, indices_to_drop)
             st.header("Updated DataFrame after Dropping Rows by Indices")
-            st.write(df)
+            show_dataframe(df, key="dropped_by_indices")
 
         if column_name and value_to_drop:
             # Drop rows based on value in a specific column
             df = drop_rows_by_value(df, column_name, value_to_drop)
             st.header("Updated DataFrame after Dropping Rows by Value")
-            st.write(df)
+            show_dataframe(df, key="dropped_by_value")
+
+        if indices_to_drop or (column_name and value_to_drop):
+            # Store the remaining rows as the next version of the dataset
+            step = PipelineStep("drop_rows", indices=parse_indices(indices_to_drop),
+                                column=column_name, value=value_to_drop or None)
+            commit_button(df, "Drop rows", pipeline_step=step)
 
 if __name__ == "__main__":
     main()
@@ -1,17 +1,22 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
-import base64
+
+from column_profile import get_profile, profile_of
+from dataset_store import commit_button, require_dataset
+from downloads import download_button, download_format_choice
+from figures import FigureJob, density_curves, draw_density_comparison, show_figures
+from pipeline import PipelineStep
+from dtypes import is_categorical
+from preview import show_dataframe
 
 def display_uploaded_dataframe(df):
     st.subheader("Uploaded DataFrame:")
-    st.write(df)  # Display the entire DataFrame
+    show_dataframe(df, key="uploaded")  # Display the entire DataFrame
 
-def calculate_missing_info(df):
+def calculate_missing_info(df, profile=None):
     st.subheader("Missing Value Information:")
-    missing_counts = df.isnull().sum()  # Count missing values in each column
+    missing_counts = profile_of(df, profile).null_counts()  # Count missing values in each column
     total_rows = df.shape[0]
     missing_percentages = (missing_counts / total_rows) * 100  # Calculate missing percentages for each column
 
@@ -34,27 +39,39 @@ def calculate_missing_info(df):
 
 def filter_and_clean_dataframe(df, columns_to_clean):
     # Drop rows where selected columns have missing values within specified percentage range
-    cleaned_df = df.dropna(subset=columns_to_clean)
+    cleaned_df = df.dropna(subset=columns_to_clean).reset_index(drop=True)
 
     return cleaned_df, df
 
-def plot_numerical_columns(df_orig, df_cleaned, numerical_columns):
+def plot_numerical_columns(df_orig, df_cleaned, numerical_columns, columns_to_clean, profile=None):
     st.subheader("PDF Comparison for Numerical Columns (0% < Missing Percentage < 5%):")
-
-    for col in numerical_columns:
-        fig, ax = plt.subplots()
-        sns.kdeplot(df_orig[col].dropna(), label='Original', ax=ax)
-        sns.kdeplot(df_cleaned[col].dropna(), label='Cleaned', ax=ax)
-        ax.set_title(f"PDF Comparison for {col}")
-        ax.set_xlabel(col)
-        ax.set_ylabel("Density")
-        st.pyplot(fig)
-
-def calculate_categorical_variation(df_orig, df_cleaned, categorical_columns):
+    orig_profile = profile_of(df_orig, profile)
+
+    # The cleaned frame is derived from the original by dropping rows with
+    # missing values in columns_to_clean, so the original columns identify it
+    variant = ("dropna", tuple(columns_to_clean))
+    dropped_on = tuple(orig_profile[c].fingerprint for c in columns_to_clean)
+
+    def build_args(col):
+        # Binned once per dataset version
+        curves = density_curves([
+            (orig_profile.binned(col), 'Original', '-'),
+            (orig_profile.binned(col, variant, df_cleaned[col]), 'Cleaned', '-'),
+        ])
+        return curves, f"PDF Comparison for {col}", col
+
+    show_figures([
+        FigureJob((orig_profile[col].fingerprint, variant, dropped_on), draw_density_comparison,
+                  lambda col=col: build_args(col))
+        for col in numerical_columns
+    ])
+
+def calculate_categorical_variation(df_orig, df_cleaned, categorical_columns, profile=None):
     variation_data = []
+    orig_profile = profile_of(df_orig, profile)
 
     for col in categorical_columns:
-        orig_value_counts = df_orig[col].value_counts()
+        orig_value_counts = orig_profile[col].value_counts
         cleaned_value_counts = df_cleaned[col].value_counts()
 
         # Collect unique categories from both original and cleaned DataFrames
@@ -82,14 +99,16 @@ def display_categorical_variation(variation_df):
     st.subheader("Value Counts Comparison for Categorical Columns (Old DataFrame vs Cleaned DataFrame):")
     st.write(variation_df)
 
-def display_categorical_value_counts_percentage(df_orig, df_cleaned, categorical_columns):
+def display_categorical_value_counts_percentage(df_orig, df_cleaned, categorical_columns, profile=None):
     st.subheader("Value Counts as Percentages for Categorical Columns (Old vs Cleaned DataFrame):")
+    orig_profile = profile_of(df_orig, profile)
     
     for col in categorical_columns:
         st.write(f"Column: {col}")
         
         # Calculate value counts as percentages for original and cleaned DataFrames
-        orig_value_counts_percentage = df_orig[col].value_counts(normalize=True) * 100
+        orig_value_counts = orig_profile[col].value_counts
+        orig_value_counts_percentage = orig_value_counts / orig_value_counts.sum() * 100
         cleaned_value_counts_percentage = df_cleaned[col].value_counts(normalize=True) * 100
         
         # Combine into a DataFrame for comparison
@@ -100,27 +119,24 @@ def display_categorical_value_counts_percentage(df_orig, df_cleaned, categorical
         
         st.write(comparison_df)
 
-def download_csv(df, filename='data.csv'):
-    csv = df.to_csv(index=False)
-    b64 = base64.b64encode(csv.encode()).decode()
-    href = f'<a href="data:file/csv;base64,{b64}" download="{filename}">Download CSV</a>'
-    st.markdown(href, unsafe_allow_html=True)
-
 def main():
     st.title("DataFrame Analysis and Row Cleaning App")
     #df = st.session_state['df']
     # Upload a CSV file
     #uploaded_file = st.file_uploader("Upload CSV file", type=["csv"])
 
-    if "df" in st.session_state:
-        # Read the uploaded file into a DataFrame
-        df = st.session_state.df
+    # Read the current version of the shared dataset
+    df = require_dataset()
+
+    if df is not None:
+        # Statistics of the current dataset version, shared with the other pages
+        profile = get_profile()
 
         # Display uploaded DataFrame
         display_uploaded_dataframe(df)
 
         # Calculate and filter columns based on missing value percentages (0% < missing percentage < 5%)
-        columns_to_clean = calculate_missing_info(df)
+        columns_to_clean = calculate_missing_info(df, profile)
 
         if columns_to_clean:
             # Filter and clean DataFrame based on selected columns
@@ -133,23 +149,23 @@ def main():
 
             # Option to download the cleaned DataFrame
             st.subheader("Download Cleaned DataFrame:")
-            download_csv(cleaned_df, filename='cleaned_data.csv')
+            download_format = download_format_choice()
+            download_button(cleaned_df, 'cleaned_data.csv', download_format)
+            commit_button(cleaned_df, "Drop rows with missing values",
+                          pipeline_step=PipelineStep("dropna", columns=columns_to_clean))
 
             # Plot PDFs for numerical columns comparing original vs cleaned DataFrame
             numerical_columns = original_df.select_dtypes(include=np.number).columns.tolist()
-            plot_numerical_columns(original_df, cleaned_df, numerical_columns)
+            plot_numerical_columns(original_df, cleaned_df, numerical_columns, columns_to_clean, profile)
 
             # Calculate variation in value counts for categorical columns
-            categorical_columns = [col for col in columns_to_clean if df[col].dtype == 'object']  # Filter categorical columns
-            variation_df = calculate_categorical_variation(original_df, cleaned_df, categorical_columns)
+            categorical_columns = [col for col in columns_to_clean if is_categorical(df[col])]  # Filter categorical columns
+            variation_df = calculate_categorical_variation(original_df, cleaned_df, categorical_columns, profile)
 
             # Display variation in value counts for categorical columns
             display_categorical_variation(variation_df)
 
             # Display value counts as percentages for categorical columns (Old vs Cleaned DataFrame)
-            display_categorical_value_counts_percentage(original_df, cleaned_df, categorical_columns)
-    
-    else:
-        st.warning("Please upload a CSV file first on the input page.")
+            display_categorical_value_counts_percentage(original_df, cleaned_df, categorical_columns, profile)
 if __name__ == "__main__":
     main()
@@ -1,19 +1,18 @@
 import streamlit as st
-import pandas as pd
+
+from dataset_store import commit_button, get_store, require_dataset
+from pipeline import PipelineStep
+from preview import show_dataframe
 
 def main():
     st.title("CSV Data Type Converter")
 
-    # File upload
-    st.sidebar.header('Upload your CSV file')
-    uploaded_file = st.sidebar.file_uploader("Upload a CSV file", type=["csv"])
-
-    if uploaded_file is not None:
-        # Read CSV file
-        df = pd.read_csv(uploaded_file)
+    # Read the current version of the shared dataset
+    df = require_dataset()
 
+    if df is not None:
         st.header("Original DataFrame")
-        st.write(df)
+        show_dataframe(df, key="original")
 
         st.sidebar.subheader("Select Columns and Data Types")
         selected_cols = st.sidebar.multiselect("Choose columns to convert", df.columns.tolist())
@@ -24,34 +23,44 @@ def main():
             for col in selected_cols:
                 data_type_selection[col] = st.sidebar.selectbox(f"Select data type for column '{col}'", ["int", "float", "object"])
 
+            # The conversion is kept for the current dataset version and choices,
+            # so reruns that only change the display do not lose it
+            cache_key = (get_store().version, tuple(data_type_selection.items()))
+            cached = st.session_state.get("dtype_result")
+
             if st.sidebar.button("Convert Selected Columns"):
                 try:
                     df_selected = df.copy()  # Create a copy of the original DataFrame
 
-                    # Data type information before conversion
-                    original_data_types = df_selected[selected_cols].dtypes
-
                     # Convert selected columns to the chosen data types
                     for col in selected_cols:
                         new_data_type = get_data_type(data_type_selection[col])
                         if new_data_type is not None:
                             df_selected[col] = df_selected[col].astype(new_data_type)
+                    st.session_state.dtype_result = cached = (cache_key, df_selected, None)
 
-                    st.header("DataFrame after Data Type Conversion")
-                    st.write(df_selected)
+                except Exception as e:
+                    st.session_state.dtype_result = cached = (cache_key, None, e)
 
-                    # Data type information after conversion
-                    new_data_types = df_selected[selected_cols].dtypes
+            if cached is not None and cached[0] == cache_key:
+                _, df_selected, error = cached
+                if error is not None:
+                    st.error(f"Error occurred during data type conversion: {error}")
+                else:
+                    st.header("DataFrame after Data Type Conversion")
+                    show_dataframe(df_selected, key="selected")
 
                     # Display data type information before and after conversion
                     st.subheader("Data Types Before Conversion")
-                    st.write(original_data_types)
+                    st.write(df[selected_cols].dtypes)
 
                     st.subheader("Data Types After Conversion")
-                    st.write(new_data_types)
+                    st.write(df_selected[selected_cols].dtypes)
 
-                except Exception as e:
-                    st.error(f"Error occurred during data type conversion: {e}")
+                    # Store the converted columns as the next version of the dataset
+                    new_dtypes = {col: get_data_type(data_type_selection[col]) for col in selected_cols}
+                    step = PipelineStep("change_dtype", dtypes={col: dtype for col, dtype in new_dtypes.items() if dtype is not None})
+                    commit_button(df_selected, f"Change data type of {', '.join(map(str, selected_cols))}", pipeline_step=step)
 
 def get_data_type(data_type):
     """
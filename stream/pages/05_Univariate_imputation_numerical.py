@@ -1,14 +1,20 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
 from scipy.stats import norm
-import base64
 
-def display_uploaded_dataframe(df):
+from column_profile import get_profile, profile_of
+from dataset_store import commit_button, require_dataset
+from downloads import download_button, download_format_choice
+from dtypes import fill_column
+from figures import FigureJob, density_curves, draw_boxplot_comparison, draw_density_comparison, show_figures
+from pipeline import PipelineStep
+from preview import show_dataframe
+
+def display_uploaded_dataframe(df, profile=None):
     st.subheader("Uploaded DataFrame:")
-    st.write(df)  # Display the entire DataFrame
+    show_dataframe(df, key="uploaded")  # Display the entire DataFrame
+    stats = profile_of(df, profile)
 
     # Get numerical columns for mean and median computation
     numerical_columns = df.select_dtypes(include=np.number).columns.tolist()
@@ -18,8 +24,8 @@ def display_uploaded_dataframe(df):
         summary_data = {'Column': [], 'Mean': [], 'Median': []}
 
         for col in numerical_columns:
-            mean_value = df[col].mean()
-            median_value = df[col].median()
+            mean_value = stats[col].mean
+            median_value = stats[col].median
 
             summary_data['Column'].append(col)
             summary_data['Mean'].append(mean_value)
@@ -30,46 +36,50 @@ def display_uploaded_dataframe(df):
         st.subheader("Mean and Median for Numerical Columns:")
         st.write(summary_df)
 
-def identify_columns_with_missing_values(df):
+def identify_columns_with_missing_values(df, profile=None):
     # Identify columns with missing values
-    missing_columns = df.columns[df.isnull().any()].tolist()
+    null_counts = profile_of(df, profile).null_counts()
+    missing_columns = null_counts.index[null_counts > 0].tolist()
     return missing_columns
 
-def plot_numerical_columns_pdf(df, numerical_columns):
+def plot_numerical_columns_pdf(df, numerical_columns, profile=None):
     st.subheader("PDF Comparison for Numerical Columns with Missing Values:")
-    
-    for col in numerical_columns:
-        fig, ax = plt.subplots()
-        sns.kdeplot(df[col].dropna(), label='Original', ax=ax)
-        ax.set_title(f"PDF Comparison for {col}")
-        ax.set_xlabel(col)
-        ax.set_ylabel("Density")
-        st.pyplot(fig)
-
-def calculate_fill_values(df, numerical_columns):
+    stats = profile_of(df, profile)
+
+    def build_args(col):
+        return density_curves([(stats.binned(col), 'Original', '-')]), f"PDF Comparison for {col}", col
+
+    show_figures([
+        FigureJob(stats[col].fingerprint, draw_density_comparison, lambda col=col: build_args(col))
+        for col in numerical_columns
+    ])
+
+def calculate_fill_values(df, numerical_columns, profile=None):
+    stats = profile_of(df, profile)
     fill_values = {}
     for col in numerical_columns:
-        mean_value = df[col].mean()
-        median_value = df[col].median()
+        mean_value = stats[col].mean
+        median_value = stats[col].median
         fill_values[col] = {'Mean': mean_value, 'Median': median_value}
     return fill_values
 
-def fill_missing_values(df, numerical_columns, fill_method='mean'):
+def fill_missing_values(df, numerical_columns, fill_method='mean', profile=None):
     filled_df = df.copy()
-    fill_values = calculate_fill_values(df, numerical_columns)
+    fill_values = calculate_fill_values(df, numerical_columns, profile)
     
     for col in numerical_columns:
         if fill_method == 'mean':
-            filled_df[col].fillna(fill_values[col]['Mean'], inplace=True)
+            filled_df[col] = fill_column(filled_df[col], fill_values[col]['Mean'])
         elif fill_method == 'median':
-            filled_df[col].fillna(fill_values[col]['Median'], inplace=True)
+            filled_df[col] = fill_column(filled_df[col], fill_values[col]['Median'])
     
     return filled_df
 
-def calculate_numerical_variances(df, numerical_columns):
+def calculate_numerical_variances(df, numerical_columns, profile=None):
+    stats = profile_of(df, profile)
     variances = {}
     for col in numerical_columns:
-        variance_value = df[col].var()
+        variance_value = stats[col].var
         variances[col] = variance_value
     return variances
 
@@ -107,57 +117,61 @@ def display_covariance_matrix(df, title):
     # Display covariance matrix
     st.write(cov_matrix)
 
-def plot_pdf_comparison(original_df, filled_df_mean, filled_df_median, numerical_columns):
+def plot_pdf_comparison(original_df, numerical_columns, profile=None):
     st.subheader("PDF Comparison: Original vs Mean Filling vs Median Filling")
-
-    for col in numerical_columns:
-        fig, ax = plt.subplots()
-        sns.kdeplot(original_df[col].dropna(), label='Original', linestyle='--', ax=ax)
-        sns.kdeplot(filled_df_mean[col], label='Mean Filling', ax=ax)
-        sns.kdeplot(filled_df_median[col], label='Median Filling', ax=ax)
-        ax.set_title(f"PDF Comparison for {col}")
-        ax.set_xlabel(col)
-        ax.set_ylabel("Density")
-        ax.legend()  # Show legend with labels
-        st.pyplot(fig)
-
-def plot_boxplot_comparison(original_df, filled_df_mean, filled_df_median, numerical_columns):
+    stats = profile_of(original_df, profile)
+
+    def build_args(col):
+        # Filling adds null_count copies of the fill value to the original
+        # values, so the filled curves reuse the cached bins of the original
+        column = stats[col]
+        binned = column.binned
+        curves = [(binned, 'Original', '--')]
+        if binned is not None:
+            curves += [(binned.with_point_mass(column.mean, column.null_count), 'Mean Filling', '-'),
+                       (binned.with_point_mass(column.median, column.null_count), 'Median Filling', '-')]
+        return density_curves(curves), f"PDF Comparison for {col}", col
+
+    # The filled columns follow from the original one, which identifies the figure
+    show_figures([
+        FigureJob((stats[col].fingerprint, "fill"), draw_density_comparison, lambda col=col: build_args(col))
+        for col in numerical_columns
+    ])
+
+def plot_boxplot_comparison(original_df, filled_df_mean, filled_df_median, numerical_columns, profile=None):
     st.subheader("Boxplot Comparison: Original vs Mean Filling vs Median Filling")
+    stats = profile_of(original_df, profile)
 
-    for col in numerical_columns:
+    def build_args(col):
         # Combine data for boxplot comparison
         data_to_plot = pd.DataFrame({
             'Original': original_df[col].dropna(),
             'Mean Filling': filled_df_mean[col],
             'Median Filling': filled_df_median[col]
         })
+        return data_to_plot, f"Boxplot Comparison for {col}", col
 
-        # Create boxplot
-        fig, ax = plt.subplots()
-        sns.boxplot(data=data_to_plot, ax=ax, palette='Set3', width=0.5)
-        ax.set_title(f"Boxplot Comparison for {col}")
-        ax.set_xlabel(col)
-        ax.set_ylabel("Value")
-        st.pyplot(fig)
-
-def download_link(df, filename, button_text):
-    csv = df.to_csv(index=False)
-    b64 = base64.b64encode(csv.encode()).decode()  # Encoding the CSV data
-    href = f'<a href="data:file/csv;base64,{b64}" download="{filename}">{button_text}</a>'
-    st.markdown(href, unsafe_allow_html=True)
-
+    show_figures([
+        FigureJob((stats[col].fingerprint, "fill"), draw_boxplot_comparison, lambda col=col: build_args(col))
+        for col in numerical_columns
+    ])
 
 def main():
     st.title("DataFrame Analysis and Missing Values Handling")
     # Retrieve DataFrame from session state
     #df = st.session_state['df'] if 'df' in st.session_state else None
-    if "df" in st.session_state:
+    # Read the current version of the shared dataset
+    df = require_dataset()
+
+    if df is not None:
+        # Statistics of the current dataset version, shared with the other pages
+        profile = get_profile()
+
         # Display uploaded DataFrame
-        df = st.session_state.df
-        display_uploaded_dataframe(df)
+        display_uploaded_dataframe(df, profile)
 
         # Identify columns with missing values
-        missing_columns = identify_columns_with_missing_values(df)
+        missing_columns = identify_columns_with_missing_values(df, profile)
 
         if missing_columns:
             st.subheader("Columns with Missing Values:")
@@ -168,25 +182,35 @@ def main():
 
             if numerical_columns:
                 # Calculate fill values (mean and median) for numerical columns
-                filled_df_mean = fill_missing_values(df, numerical_columns, fill_method='mean')
-                filled_df_median = fill_missing_values(df, numerical_columns, fill_method='median')
+                filled_df_mean = fill_missing_values(df, numerical_columns, fill_method='mean', profile=profile)
+                filled_df_median = fill_missing_values(df, numerical_columns, fill_method='median', profile=profile)
+
+                # Integer columns holding a fractional fill value are stored as floats rather than truncated
+                converted = [col for col in numerical_columns
+                             if filled_df_mean[col].dtype != df[col].dtype or filled_df_median[col].dtype != df[col].dtype]
+                if converted:
+                    st.info(f"Integer columns stored as floats so their fill values are not truncated: {', '.join(map(str, converted))}")
 
                 st.subheader("Updated DataFrame after Filling Missing Values (Mean):")
-                st.write(filled_df_mean)
+                show_dataframe(filled_df_mean, key="mean_filled")
 
                 st.subheader("Updated DataFrame after Filling Missing Values (Median):")
-                st.write(filled_df_median)
+                show_dataframe(filled_df_median, key="median_filled")
 
                 # Add download buttons for updated DataFrames
                 st.subheader("Download Updated DataFrames:")
-                if st.button("Download Mean Filled DataFrame"):
-                    download_link(filled_df_mean, "mean_filled_dataframe.csv", "Download Mean Filled CSV")
+                download_format = download_format_choice()
+                download_button(filled_df_mean, "mean_filled_dataframe.csv", download_format, label="Download Mean Filled DataFrame")
+                download_button(filled_df_median, "median_filled_dataframe.csv", download_format, label="Download Median Filled DataFrame")
 
-                if st.button("Download Median Filled DataFrame"):
-                    download_link(filled_df_median, "median_filled_dataframe.csv", "Download Median Filled CSV")
+                # Store one of the filled DataFrames as the next version of the dataset
+                commit_button(filled_df_mean, "Fill missing values with mean", label="Use Mean Filled DataFrame for the next steps",
+                              pipeline_step=PipelineStep("fill_numeric", columns=numerical_columns, method='mean'))
+                commit_button(filled_df_median, "Fill missing values with median", label="Use Median Filled DataFrame for the next steps",
+                              pipeline_step=PipelineStep("fill_numeric", columns=numerical_columns, method='median'))
 
                 # Calculate variances of numerical columns
-                original_variances = calculate_numerical_variances(df, numerical_columns)
+                original_variances = calculate_numerical_variances(df, numerical_columns, profile)
                 mean_filled_variances = calculate_numerical_variances(filled_df_mean, numerical_columns)
                 median_filled_variances = calculate_numerical_variances(filled_df_median, numerical_columns)
 
@@ -204,19 +228,16 @@ def main():
                 display_covariance_matrix(filled_df_median, "Updated DataFrame (Median Filling)")
 
                 # Plot PDF Comparison
-                plot_pdf_comparison(df, filled_df_mean, filled_df_median, numerical_columns)
+                plot_pdf_comparison(df, numerical_columns, profile)
 
                 # Plot Boxplot Comparison
-                plot_boxplot_comparison(df, filled_df_mean, filled_df_median, numerical_columns)
+                plot_boxplot_comparison(df, filled_df_mean, filled_df_median, numerical_columns, profile)
 
                 #st.write("No numerical columns with missing values found.")
 
         else:
             st.write("No columns with missing values found.")
 
-    else:
-        st.warning("Please upload a CSV file first on the input page.")
-
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
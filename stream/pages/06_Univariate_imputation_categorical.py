@@ -1,17 +1,23 @@
 import streamlit as st
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-import base64  # For handling file download
 
-def analyze_dataframe(df):
+import dtypes
+from column_profile import get_profile, profile_of
+from dataset_store import commit_button, require_dataset
+from downloads import download_button, download_format_choice
+from pipeline import PipelineStep
+from preview import show_dataframe
+
+def analyze_dataframe(df, profile=None):
+    stats = profile_of(df, profile)
+
     # Display the uploaded DataFrame
     st.subheader("Uploaded DataFrame:")
-    st.write(df)
+    show_dataframe(df, key="uploaded")
 
     # Show columns with missing values and their counts
     st.subheader("Columns with Missing Values:")
-    missing_counts = df.isnull().sum()
+    missing_counts = stats.null_counts()
     missing_info_df = pd.DataFrame({
         'Missing Value Count': missing_counts,
         'Missing Value Percentage': (missing_counts / df.shape[0]) * 100
@@ -19,15 +25,15 @@ def analyze_dataframe(df):
     st.write(missing_info_df[missing_info_df['Missing Value Count'] > 0])
 
     # Show value counts for each categorical column
-    categorical_columns = df.select_dtypes(include=['object']).columns.tolist()
+    categorical_columns = dtypes.categorical_columns(df)
     st.subheader("Value Counts for Categorical Columns:")
     for col in categorical_columns:
         st.write(f"Column: {col}")
-        st.write(df[col].value_counts())
+        st.write(stats[col].value_counts)
 
     # Calculate mode for categorical columns
     st.subheader("Mode for Categorical Columns:")
-    mode_values = df[categorical_columns].mode().iloc[0]
+    mode_values = stats.modes(categorical_columns)
     st.write(mode_values)
 
     # Fill missing values with mode for categorical columns
@@ -36,33 +42,27 @@ def analyze_dataframe(df):
 
     # Show updated DataFrame after filling missing values with mode
     st.subheader("Updated DataFrame after Filling Missing Values with Mode:")
-    st.write(filled_df)
+    show_dataframe(filled_df, key="filled")
 
-    # Download option to download updated DataFrame as CSV
-    if st.button("Download Updated DataFrame as CSV"):
-        download_csv(filled_df, filename='updated_dataframe.csv')
+    # Download option to download updated DataFrame as CSV or Parquet
+    download_format = download_format_choice()
+    download_button(filled_df, 'updated_dataframe.csv', download_format, label="Download Updated DataFrame")
 
-def download_csv(df, filename='data.csv'):
-    csv = df.to_csv(index=False)
-    b64 = base64.b64encode(csv.encode()).decode()
-    href = f'<a href="data:file/csv;base64,{b64}" download="{filename}">Download CSV</a>'
-    st.markdown(href, unsafe_allow_html=True)
+    # Store the filled DataFrame as the next version of the dataset
+    commit_button(filled_df, "Fill missing categories with mode",
+                  pipeline_step=PipelineStep("fill_mode", columns=categorical_columns))
 
 
 def main():
     st.title("DataFrame Analysis Tool")
 
-    # Retrieve uploaded DataFrame from session state
-    #df = st.session_state.df
+    # Read the current version of the shared dataset
+    df = require_dataset()
 
     # Check if DataFrame is available
-    if "df" in st.session_state:
+    if df is not None:
         # Analyze the DataFrame
-        df = st.session_state.df
-        analyze_dataframe(df)
-        
-    else:
-        st.warning("Please upload a CSV file first on the input page.")
+        analyze_dataframe(df, get_profile())
 
 if __name__ == "__main__":
     main()
@@ -1,13 +1,24 @@
-import pandas as pd
 import streamlit as st
-from sklearn.impute import KNNImputer
 
-def knn_impute_missing(df, columns_to_impute, n_neighbors=5, weights='uniform'):
+from dataset_store import commit_button, get_store, require_dataset
+from knn_impute import DENSE_MAX_ROWS, MAX_PATTERNS, make_knn_imputer
+from pipeline import PipelineStep
+from dtypes import numeric_columns
+from preview import show_dataframe
+
+# Neighbor search methods offered on the page, the full distance matrix first as the default
+SEARCH_METHODS = {
+    "dense": "Full distance matrix (KNNImputer)",
+    "auto": f"Automatic (neighbor index above {DENSE_MAX_ROWS:,} rows)",
+    "indexed": "Neighbor index, only for rows with missing values",
+}
+
+def knn_impute_missing(df, columns_to_impute, n_neighbors=5, weights='uniform', method='dense'):
     # Perform KNN imputation on selected numerical columns with missing values
-    imputer = KNNImputer(n_neighbors=n_neighbors, weights=weights)
+    imputer = make_knn_imputer(n_neighbors, weights, method, rows=len(df))
     df_imputed = df.copy()
     df_imputed[columns_to_impute] = imputer.fit_transform(df_imputed[columns_to_impute])
-    return df_imputed
+    return df_imputed, imputer
 
 def display_imputed_rows(original_df, imputed_df):
     # Identify rows that have been imputed
@@ -17,18 +28,15 @@ def display_imputed_rows(original_df, imputed_df):
 def main():
     st.title("KNN Imputation App")
     
-    # Allow user to upload a CSV file
-    uploaded_file = st.file_uploader("Upload a CSV file", type=["csv"])
-    
-    if uploaded_file is not None:
-        # Read the uploaded CSV file into a DataFrame
-        df = pd.read_csv(uploaded_file)
-        
+    # Read the current version of the shared dataset
+    df = require_dataset()
+
+    if df is not None:
         st.write("Original DataFrame:")
-        st.write(df)
+        show_dataframe(df, key="original")
         
         # Identify numerical columns with missing values
-        numerical_cols = df.select_dtypes(include=['int', 'float']).columns.tolist()
+        numerical_cols = numeric_columns(df)
         numerical_cols_with_missing = [col for col in numerical_cols if df[col].isnull().any()]
         
         if numerical_cols_with_missing:
@@ -42,19 +50,40 @@ def main():
             
             # Radio button widget to select the weight function
             weights_option = st.radio("Select weight function", options=['uniform', 'distance'], index=0)
+
+            # Both methods give the same result; the neighbor index scales to large datasets
+            # whose missing values fall into few patterns of columns
+            search_method = st.radio("Select neighbor search", options=list(SEARCH_METHODS), format_func=SEARCH_METHODS.get, index=0,
+                                     help=f"The neighbor index falls back to the full distance matrix when the missing "
+                                          f"values form more than {MAX_PATTERNS} patterns of columns.")
             
+            params = dict(n_neighbors=k_value, weights=weights_option, method=search_method)
+
+            # The imputation is kept for the current dataset version and options,
+            # so reruns that only change the display do not fit it again
+            cache_key = (get_store().version, tuple(columns_to_impute), tuple(sorted(params.items())))
+            cached = st.session_state.get("knn_result")
+
             if st.button("Impute Missing Values using KNN") and columns_to_impute:
-                # Perform KNN imputation on selected columns with specified parameters
-                df_imputed = knn_impute_missing(df, columns_to_impute, n_neighbors=k_value, weights=weights_option)
-                
+                if cached is None or cached[0] != cache_key:
+                    # Perform KNN imputation on selected columns with specified parameters
+                    df_imputed, imputer = knn_impute_missing(df, columns_to_impute, **params)
+                    st.session_state.knn_result = cached = (cache_key, df_imputed, imputer)
+
+            if cached is not None and cached[0] == cache_key:
+                _, df_imputed, imputer = cached
                 st.write("Imputed DataFrame:")
-                st.write(df_imputed)
+                show_dataframe(df_imputed, key="imputed")
+                # The imputer fitted here is recorded as is, so committing does not fit it again
+                step = PipelineStep("knn_impute", columns=columns_to_impute, **params)
+                step.fitted = {"imputer": imputer}
+                commit_button(df_imputed, "KNN imputation", pipeline_step=step)
                 
                 # Display rows that were imputed
                 imputed_rows = display_imputed_rows(df, df_imputed)
                 if not imputed_rows.empty:
                     st.write("Rows with imputed values:")
-                    st.write(imputed_rows)
+                    show_dataframe(imputed_rows, key="imputed_rows")
                 else:
                     st.write("No rows were imputed.")
         else:
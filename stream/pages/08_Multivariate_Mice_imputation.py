@@ -1,14 +1,31 @@
 import pandas as pd
 import streamlit as st
-from sklearn.experimental import enable_iterative_imputer
-from sklearn.impute import IterativeImputer
 
-def mice_impute_missing(df, columns_to_impute, max_iter=10):
-    # Perform MICE imputation on selected columns
-    imputer = IterativeImputer(max_iter=max_iter)
+from dataset_store import commit_button, get_store, require_dataset
+from mice import DEFAULT_SAMPLE_ROWS, MICE_ESTIMATORS, fit_mice_imputer
+from pipeline import PipelineStep
+from preview import show_dataframe
+
+def mice_impute_missing(df, columns_to_impute, max_iter=10, estimator='bayesian_ridge', n_nearest_features=None, sample_rows=None):
+    # Fit MICE on selected columns (on a subsample if asked for) and impute all rows
+    imputer = fit_mice_imputer(df, columns_to_impute, max_iter, estimator, n_nearest_features, sample_rows)
     df_imputed = df.copy()
-    df_imputed[columns_to_impute] = imputer.fit_transform(df_imputed[columns_to_impute])
-    return df_imputed
+    df_imputed[columns_to_impute] = imputer.transform(df_imputed[columns_to_impute])
+    return df_imputed, imputer
+
+def display_convergence(imputer):
+    # Show how much the imputed values changed in each round
+    st.write(f"Fitted on {imputer.sample_rows_} rows:")
+    st.write(pd.DataFrame({
+        'Round': [entry['round'] for entry in imputer.trace_],
+        'Change': [entry['change'] for entry in imputer.trace_],
+        'Scaled Tolerance': imputer.tolerance_,
+        'Elapsed Time (s)': [entry['seconds'] for entry in imputer.trace_],
+    }).set_index('Round'))
+    if imputer.converged_:
+        st.success(f"Converged after {imputer.n_iter_} round(s).")
+    elif imputer.trace_:
+        st.warning(f"Did not converge within {imputer.n_iter_} round(s); consider more iterations.")
 
 def display_imputed_rows(original_df, imputed_df):
     # Identify rows that have been imputed
@@ -18,15 +35,12 @@ def display_imputed_rows(original_df, imputed_df):
 def main():
     st.title("MICE Imputation App")
     
-    # Allow user to upload a CSV file
-    uploaded_file = st.file_uploader("Upload a CSV file", type=["csv"])
-    
-    if uploaded_file is not None:
-        # Read the uploaded CSV file into a DataFrame
-        df = pd.read_csv(uploaded_file)
-        
+    # Read the current version of the shared dataset
+    df = require_dataset()
+
+    if df is not None:
         st.write("Original DataFrame:")
-        st.write(df)
+        show_dataframe(df, key="original")
         
         # Identify columns with missing values
         columns_with_missing = df.columns[df.isnull().any()].tolist()
@@ -39,19 +53,48 @@ def main():
             
             # Slider widget to select the number of iterations
             num_iterations = st.slider("Select number of iterations", min_value=1, max_value=20, value=10)
-            
+
+            # Options trading accuracy for speed on large or wide datasets
+            estimator = st.selectbox("Select estimator", list(MICE_ESTIMATORS), format_func=lambda name: MICE_ESTIMATORS[name][0])
+            n_nearest_features = int(st.number_input("Predictor columns per column (0 = all)", min_value=0,
+                                                     max_value=max(len(columns_to_impute) - 1, 0), value=0))
+            # The imputer is fitted on every row unless a sample is asked for
+            sample_rows = 0
+            if st.checkbox("Fit on a stratified sample of the rows (faster, approximate)", value=False,
+                           help="Rows are sampled in proportion to each pattern of missing values."):
+                sample_rows = int(st.number_input("Rows in the sample", min_value=1,
+                                                  value=DEFAULT_SAMPLE_ROWS, step=10000))
+            params = dict(max_iter=num_iterations, estimator=estimator,
+                          n_nearest_features=n_nearest_features or None, sample_rows=sample_rows or None)
+
+            # The imputation is kept for the current dataset version and options,
+            # so reruns that only change the display do not fit it again
+            cache_key = (get_store().version, tuple(columns_to_impute), tuple(sorted(params.items())))
+            cached = st.session_state.get("mice_result")
+
             if st.button("Impute Missing Values using MICE") and columns_to_impute:
-                # Perform MICE imputation on selected columns with specified iterations
-                df_imputed = mice_impute_missing(df, columns_to_impute, max_iter=num_iterations)
-                
+                if cached is None or cached[0] != cache_key:
+                    # Perform MICE imputation on selected columns with specified options
+                    with st.spinner("Fitting MICE imputer..."):
+                        df_imputed, imputer = mice_impute_missing(df, columns_to_impute, **params)
+                    st.session_state.mice_result = cached = (cache_key, df_imputed, imputer)
+
+            if cached is not None and cached[0] == cache_key:
+                _, df_imputed, imputer = cached
+                display_convergence(imputer)
+
                 st.write("Imputed DataFrame:")
-                st.write(df_imputed)
+                show_dataframe(df_imputed, key="imputed")
+                # The imputer fitted here is recorded as is, so committing does not fit it again
+                step = PipelineStep("mice_impute", columns=columns_to_impute, **params)
+                step.fitted = {"imputer": imputer}
+                commit_button(df_imputed, "MICE imputation", pipeline_step=step)
                 
                 # Display rows that were imputed
                 imputed_rows = display_imputed_rows(df, df_imputed)
                 if not imputed_rows.empty:
                     st.write("Rows with imputed values:")
-                    st.write(imputed_rows)
+                    show_dataframe(imputed_rows, key="imputed_rows")
                 else:
                     st.write("No rows were imputed.")
         else:
@@ -1,46 +1,69 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 
-def calculate_z_scores_and_remove_outliers(df, selected_columns, z_thresh=3):
+from column_profile import get_profile, profile_of
+from dataset_store import commit_button, require_dataset
+from pipeline import PipelineStep
+from dtypes import numeric_columns
+from outliers import outlier_limits, outlier_mask, trim_outliers
+from preview import show_dataframe
+
+def calculate_z_scores(df, selected_columns, profile=None):
     """
-    Calculate z-scores for selected numerical columns in the DataFrame,
-    identify rows containing outliers based on the specified z-score threshold,
-    and remove those rows.
+    Calculate z-scores for selected numerical columns from the profiled mean
+    and standard deviation.
+
+    Parameters:
+    df (DataFrame): Input DataFrame containing numerical columns.
+    selected_columns (list): List of column names to calculate z-scores for.
+    profile (DatasetProfile): Column statistics of df, computed on demand if omitted.
+
+    Returns:
+    DataFrame: DataFrame of z-scores for selected numerical columns.
+    """
+    stats = profile_of(df, profile)
+    return (df[selected_columns] - stats.means(selected_columns)) / stats.stds(selected_columns)
+
+def calculate_z_scores_and_remove_outliers(df, selected_columns, z_thresh=3, profile=None):
+    """
+    Identify rows containing outliers based on the specified z-score threshold
+    in the selected numerical columns, and remove those rows.
+
+    Values above the threshold are found by binary search in each column's
+    sorted absolute z-scores, built once per column version, so changing
+    the threshold does not compute any z-score again.
 
     Parameters:
     df (DataFrame): Input DataFrame containing numerical columns.
     selected_columns (list): List of column names to perform outlier detection on.
     z_thresh (float): Z-score threshold for outlier detection (default=3).
+    profile (DatasetProfile): Column statistics of df, computed on demand if omitted.
 
     Returns:
     Tuple: A tuple containing the following:
-        - df_z_scores (DataFrame): DataFrame of z-scores for selected numerical columns.
         - outlier_counts (Series): Series showing the count of outliers column-wise.
         - df_updated (DataFrame): Updated DataFrame after removing rows with outliers.
+        - df_outliers (DataFrame): The removed rows containing outliers.
         - original_shape (Tuple): Shape (rows, columns) of the original DataFrame.
         - updated_shape (Tuple): Shape (rows, columns) of the updated DataFrame.
     """
-    # Calculate z-scores for selected numerical columns
-    df_z_scores = df[selected_columns].apply(lambda x: (x - x.mean()) / x.std())
-
-    # Identify rows containing outliers based on z-score threshold
-    row_outliers_mask = (np.abs(df_z_scores) > z_thresh).any(axis=1)
-
-    # Get indices of rows containing outliers
-    outlier_indices = df.index[row_outliers_mask].tolist()
+    # Flag values whose z-score, from the profiled mean and standard deviation, exceeds the threshold
+    stats = profile_of(df, profile)
+    lower, upper = outlier_limits(df, selected_columns, ("zscore",), threshold=z_thresh, profile=stats)["zscore"]
+    mask = outlier_mask(df, selected_columns, lower, upper, profile=stats, threshold=z_thresh)
 
     # Count outliers column-wise
-    outlier_counts = (np.abs(df_z_scores) > z_thresh).sum()
+    outlier_counts = pd.Series(mask.sum(axis=0), index=selected_columns)
 
     # Drop rows containing outliers from the original DataFrame
-    df_updated = df[~row_outliers_mask]
+    df_updated = trim_outliers(df, mask)
+    df_outliers = df[mask.any(axis=1)]
 
     # Get shapes of original and updated DataFrames
     original_shape = df.shape
     updated_shape = df_updated.shape
 
-    return df_z_scores, outlier_counts, df_updated, original_shape, updated_shape
+    return outlier_counts, df_updated, df_outliers, original_shape, updated_shape
 
 def streamlit_app():
     """
@@ -50,46 +73,47 @@ def streamlit_app():
     """
     st.title('Z-Score Outlier Removal App')
 
-    # Upload CSV file
-    uploaded_file = st.file_uploader("Upload CSV file", type=['csv'])
-
-    if uploaded_file is not None:
-        # Read CSV file into DataFrame
-        df = pd.read_csv(uploaded_file)
+    # Read the current version of the shared dataset
+    df = require_dataset()
 
+    if df is not None:
         # Display the original DataFrame
         st.subheader("Original DataFrame")
-        st.write(df)
+        show_dataframe(df, key="original")
 
         # Checkbox or multiselect dropdown for column selection
-        all_columns = df.select_dtypes(include=['float64', 'int64']).columns.tolist()
+        all_columns = numeric_columns(df)
         selected_columns = st.multiselect("Select columns for outlier detection (Z-score)", all_columns, default=all_columns)
 
         if len(selected_columns) > 0:
-            # User-defined z-score threshold via input box
-            z_thresh = st.number_input("Z-score Threshold", value=3.0)
+            # User-defined z-score threshold via slider, answered from the sorted z-scores of each column
+            z_thresh = st.slider("Z-score Threshold", min_value=0.0, max_value=10.0, value=3.0, step=0.05)
 
             # Calculate z-scores, identify and remove rows containing outliers
-            df_z_scores, outlier_counts, df_updated, original_shape, updated_shape = calculate_z_scores_and_remove_outliers(df, selected_columns, z_thresh)
+            profile = get_profile()
+            outlier_counts, df_updated, df_outliers, original_shape, updated_shape = calculate_z_scores_and_remove_outliers(df, selected_columns, z_thresh, profile)
 
-            # Display z-scores DataFrame
+            # Display z-scores DataFrame, calculated only when asked for
             st.subheader("Z-Scores DataFrame")
-            st.write(df_z_scores)
+            show_dataframe(lambda: calculate_z_scores(df, selected_columns, profile), key="z_scores",
+                           lazy=True, label="Show z-scores")
 
             # Display outlier counts column-wise
             st.subheader("Outlier Counts (column-wise)")
             st.write(outlier_counts)
 
             # Display information about removed rows containing outliers
-            if len(df) > len(df_updated):
+            if len(df_outliers) > 0:
                 st.subheader("Rows with Outliers (Removed)")
-                st.write(df.loc[df.index.difference(df_updated.index)])
+                show_dataframe(df_outliers, key="removed")
             else:
                 st.subheader("No Rows with Outliers Detected")
 
             # Display updated DataFrame after removing rows with outliers
             st.subheader("Updated DataFrame (after removing rows with outliers)")
-            st.write(df_updated)
+            show_dataframe(df_updated, key="updated")
+            step = PipelineStep("trim_outliers", columns=selected_columns, method="zscore", threshold=z_thresh)
+            commit_button(df_updated, "Z-score outlier trimming", pipeline_step=step)
 
             # Display shapes of original and updated DataFrames
             st.subheader("DataFrame Shapes")
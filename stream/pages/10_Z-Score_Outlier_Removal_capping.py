@@ -1,8 +1,14 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 
-def apply_capping(df, selected_columns):
+from column_profile import get_profile, profile_of
+from dataset_store import commit_button, require_dataset
+from pipeline import PipelineStep
+from dtypes import numeric_columns
+from outliers import cap_outliers, numeric_block, outlier_limits, outlier_mask
+from preview import show_dataframe
+
+def apply_capping(df, selected_columns, profile=None):
     """
     Apply capping to selected numerical columns in the DataFrame.
     Outliers are replaced with values within the specified range based on z-scores.
@@ -10,38 +16,32 @@ def apply_capping(df, selected_columns):
     Parameters:
     df (DataFrame): Input DataFrame containing numerical columns.
     selected_columns (list): List of column names to apply capping on.
+    profile (DatasetProfile): Column statistics of df, computed on demand if omitted.
 
     Returns:
     Tuple: A tuple containing the following:
         - df_capped (DataFrame): DataFrame with outliers in selected numerical columns replaced within the specified range.
-        - excluded_indices (List): List of indices corresponding to rows containing outliers.
+        - excluded_rows (DataFrame): Rows containing outliers, each listed once.
         - outlier_counts (Series): Series showing the count of excluded rows (outliers) column-wise.
     """
-    df_capped = df.copy()
-    excluded_indices = []
-    outlier_counts = pd.Series(0, index=df.columns)  # Initialize outlier counts
-
-    for col in selected_columns:
-        # Calculate mean and standard deviation of the column
-        mean_col = df_capped[col].mean()
-        std_col = df_capped[col].std()
+    # Calculate upper and lower limits for capping based on z-scores (3 standard deviations) of all selected columns
+    stats = profile_of(df, profile)
+    lower, upper = outlier_limits(df, selected_columns, ("zscore",), threshold=3.0, profile=stats)["zscore"]
 
-        # Calculate upper and lower limits for capping based on z-scores (3 standard deviations)
-        upper_limit = mean_col + 3 * std_col
-        lower_limit = mean_col - 3 * std_col
+    # Identify outliers of the whole selected block in one NumPy pass
+    values = numeric_block(df, selected_columns)
+    mask = outlier_mask(df, selected_columns, lower, upper, values=values)
 
-        # Identify outliers (rows to be excluded)
-        outlier_mask = (df_capped[col] > upper_limit) | (df_capped[col] < lower_limit)
-        excluded_indices.extend(df_capped[outlier_mask].index.tolist())
+    # Count outliers column-wise
+    outlier_counts = pd.Series(mask.sum(axis=0), index=selected_columns)
 
-        # Update outlier counts for the current column
-        outlier_counts[col] = sum(outlier_mask)
+    # Rows with an outlier in any selected column, each listed once
+    excluded_rows = df[mask.any(axis=1)]
 
-        # Apply capping to the column
-        df_capped[col] = np.where(df_capped[col] > upper_limit, upper_limit,
-                                  np.where(df_capped[col] < lower_limit, lower_limit, df_capped[col]))
+    # Clip the selected block to the limits in one step
+    df_capped = cap_outliers(df, selected_columns, lower, upper, values=values, mask=mask)
 
-    return df_capped, excluded_indices, outlier_counts
+    return df_capped, excluded_rows, outlier_counts
 
 def streamlit_app():
     """
@@ -49,28 +49,27 @@ def streamlit_app():
     """
     st.title('Capping Outliers in Numerical Columns')
     
-    # Upload CSV file
-    uploaded_file = st.file_uploader("Upload CSV file", type=['csv'])
-    
-    if uploaded_file is not None:
-        # Read CSV file into DataFrame
-        df = pd.read_csv(uploaded_file)
-        
+    # Read the current version of the shared dataset
+    df = require_dataset()
+
+    if df is not None:
         # Display the original DataFrame
         st.subheader("Original DataFrame")
-        st.write(df)
+        show_dataframe(df, key="original")
         
         # Checkbox or multiselect dropdown for column selection
-        all_numeric_columns = df.select_dtypes(include=['float64', 'int64']).columns.tolist()
+        all_numeric_columns = numeric_columns(df)
         selected_columns = st.multiselect("Select columns for outlier capping", all_numeric_columns, default=all_numeric_columns)
 
         if len(selected_columns) > 0:
             # Apply capping to selected numerical columns
-            df_capped, excluded_indices, outlier_counts = apply_capping(df, selected_columns)
+            df_capped, excluded_rows, outlier_counts = apply_capping(df, selected_columns, get_profile())
         
             # Display DataFrame after applying capping
             st.subheader("DataFrame after Capping Outliers in Selected Columns")
-            st.write(df_capped)
+            show_dataframe(df_capped, key="capped")
+            step = PipelineStep("cap_outliers", columns=selected_columns, method="zscore", threshold=3.0)
+            commit_button(df_capped, "Z-score outlier capping", pipeline_step=step)
             
             # Display shapes of original and capped DataFrames
             st.subheader("DataFrame Shapes")
@@ -78,9 +77,9 @@ def streamlit_app():
             st.write(f"Capped DataFrame Shape: {df_capped.shape}")
             
             # Display excluded rows (rows containing outliers)
-            if len(excluded_indices) > 0:
+            if len(excluded_rows) > 0:
                 st.subheader("Excluded Rows (Containing Outliers)")
-                st.write(df.loc[excluded_indices])
+                show_dataframe(excluded_rows, key="capped_rows")
             else:
                 st.subheader("No Rows Excluded (No Outliers Detected)")
             
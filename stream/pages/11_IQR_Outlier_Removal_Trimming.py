@@ -1,13 +1,21 @@
 import streamlit as st
 import pandas as pd
 
-def remove_outlier_rows_iqr(df, selected_columns):
+from column_profile import APPROXIMATE_MIN_ROWS, get_profile, profile_of, show_quantile_bounds
+from dataset_store import commit_button, require_dataset
+from pipeline import PipelineStep, outlier_bounds
+from outliers import outlier_limits, outlier_mask, trim_outliers
+from preview import show_dataframe
+
+def remove_outlier_rows_iqr(df, selected_columns, profile=None, approximate=False):
     """
     Remove rows with outliers based on the Interquartile Range (IQR) method for specified columns.
 
     Parameters:
     df (DataFrame): Input DataFrame containing numerical columns.
     selected_columns (list): List of column names to perform outlier removal on.
+    profile (DatasetProfile): Column statistics of df, computed on demand if omitted.
+    approximate (bool): Read the quartiles from quantile sketches instead of sorting the columns.
 
     Returns:
     Tuple: A tuple containing the following:
@@ -17,40 +25,19 @@ def remove_outlier_rows_iqr(df, selected_columns):
         - original_shape (Tuple): Shape (rows, columns) of the original DataFrame.
         - updated_shape (Tuple): Shape (rows, columns) of the updated DataFrame.
     """
-    df_updated = df.copy()
-    outlier_counts = pd.Series(0, index=selected_columns)  # Initialize outlier counts for selected columns
-    excluded_rows = []  # List to store rows with outliers
-
-    # Calculate quartiles (Q1 and Q3) for each selected numeric column
-    quartiles = df[selected_columns].quantile([0.25, 0.75])
-    Q1 = quartiles.loc[0.25]
-    Q3 = quartiles.loc[0.75]
-
-    # Calculate Interquartile Range (IQR) for each selected numeric column
-    IQR = Q3 - Q1
-
-    # Determine outlier boundaries for each selected numeric column using IQR method
-    lower_limit = Q1 - 1.5 * IQR
-    upper_limit = Q3 + 1.5 * IQR
-
-    # Iterate over each row
-    for idx, row in df.iterrows():
-        # Check if any numeric column value in the row is an outlier within selected columns
-        is_outlier_row = False
-        for col in selected_columns:
-            # Check if current row's value in the column is an outlier
-            if row[col] < lower_limit[col] or row[col] > upper_limit[col]:
-                is_outlier_row = True
-                outlier_counts[col] += 1  # Increment outlier count for the column
-                excluded_rows.append(row)  # Store the entire row as an excluded row
-                break
-
-        # If the row contains any outlier in selected columns, mark the index for removal
-        if is_outlier_row:
-            df_updated.drop(idx, inplace=True)
-
-    # Convert list of excluded rows to a DataFrame
-    excluded_df = pd.DataFrame(excluded_rows, columns=df.columns)
+    # Determine outlier boundaries for each selected numeric column using IQR method, from the profiled quartiles
+    stats = profile_of(df, profile)
+    lower_limit, upper_limit = outlier_limits(df, selected_columns, ("iqr",), approximate=approximate, profile=stats)["iqr"]
+
+    # Compare the whole selected block against the limits in one NumPy pass
+    mask = outlier_mask(df, selected_columns, lower_limit, upper_limit)
+
+    # Count every outlier of each selected column, including rows with outliers in several columns
+    outlier_counts = pd.Series(mask.sum(axis=0), index=selected_columns)
+
+    # Rows with an outlier in any selected column are removed
+    df_updated = trim_outliers(df, mask)
+    excluded_df = df[mask.any(axis=1)]
 
     # Get shapes of original and updated DataFrames
     original_shape = df.shape
@@ -61,30 +48,39 @@ def remove_outlier_rows_iqr(df, selected_columns):
 def main():
     st.title('Remove Rows with Outliers')
 
-    # File upload
-    uploaded_file = st.file_uploader("Upload CSV file", type=['csv'])
+    # Read the current version of the shared dataset
+    df = require_dataset()
 
-    if uploaded_file is not None:
+    if df is not None:
         st.write("### Original Data")
-        df = pd.read_csv(uploaded_file)
-        st.write(df)
+        show_dataframe(df, key="original")
 
         # Checkbox or multiselect dropdown for column selection
         all_columns = df.select_dtypes(include=['number']).columns.tolist()
         selected_columns = st.multiselect("Select columns for outlier removal (IQR Method)", all_columns, default=all_columns)
 
         if len(selected_columns) > 0:
+            approximate = st.checkbox("Approximate quartiles (faster on large data)", value=len(df) >= APPROXIMATE_MIN_ROWS,
+                                      help="Read the quartiles from a quantile sketch of each column, with error bounds.")
+
             # Remove rows with outliers using IQR for selected columns
             try:
-                cleaned_df, excluded_df, outlier_counts, original_shape, updated_shape = remove_outlier_rows_iqr(df, selected_columns)
+                profile = get_profile()
+                cleaned_df, excluded_df, outlier_counts, original_shape, updated_shape = remove_outlier_rows_iqr(df, selected_columns, profile, approximate)
+                if approximate:
+                    show_quantile_bounds(profile, (0.25, 0.75), selected_columns)
 
                 st.write("### Data after Removing Rows with Outliers")
-                st.write(cleaned_df)
+                show_dataframe(cleaned_df, key="cleaned")
+                # The limits used here are recorded as is, so committing does not compute them again
+                step = PipelineStep("trim_outliers", columns=selected_columns, method="iqr", approximate=approximate)
+                step.fitted = outlier_bounds(df, selected_columns, method="iqr", approximate=approximate, profile=profile)
+                commit_button(cleaned_df, "IQR outlier trimming", pipeline_step=step)
 
                 # Display excluded rows (Rows with outliers)
                 if not excluded_df.empty:
                     st.write("### Excluded Rows (Rows with Outliers)")
-                    st.write(excluded_df)
+                    show_dataframe(excluded_df, key="excluded")
 
                 # Display outlier counts per selected column
                 st.write("### Outlier Counts (Column-wise)")
@@ -1,53 +1,47 @@
 import streamlit as st
 import pandas as pd
 
-def replace_outliers_iqr(df, selected_columns):
+from column_profile import APPROXIMATE_MIN_ROWS, get_profile, profile_of, show_quantile_bounds
+from dataset_store import commit_button, require_dataset
+from pipeline import PipelineStep, outlier_bounds
+from outliers import cap_outliers, numeric_block, outlier_limits, outlier_mask
+from preview import show_dataframe
+
+def replace_outliers_iqr(df, selected_columns, profile=None, approximate=False):
     """
     Replace outliers based on the Interquartile Range (IQR) method.
 
     Parameters:
     df (DataFrame): Input DataFrame containing numerical columns.
     selected_columns (list): List of column names to perform outlier replacement on.
+    profile (DatasetProfile): Column statistics of df, computed on demand if omitted.
+    approximate (bool): Read the quartiles from quantile sketches instead of sorting the columns.
 
     Returns:
     Tuple: A tuple containing the following:
         - df_replaced (DataFrame): DataFrame with outliers replaced within the IQR limits.
         - outlier_counts (Series): Series showing the count of outliers for each selected column.
-        - replaced_df (DataFrame): DataFrame containing rows with replaced outlier values.
+        - replaced_df (DataFrame): DataFrame containing rows with replaced outlier values, without duplicates.
         - original_shape (Tuple): Shape (rows, columns) of the original DataFrame.
         - replaced_shape (Tuple): Shape (rows, columns) of the DataFrame after replacing outliers.
     """
-    df_replaced = df.copy()
-    outlier_counts = pd.Series(0, index=selected_columns)  # Initialize outlier counts for selected columns
-    replaced_df = pd.DataFrame()  # Initialize DataFrame for replaced rows
-    
-    # Calculate quartiles (Q1 and Q3) for each selected numeric column
-    quartiles = df[selected_columns].quantile([0.25, 0.75])
-    Q1 = quartiles.loc[0.25]
-    Q3 = quartiles.loc[0.75]
-    
-    # Calculate Interquartile Range (IQR) for each selected numeric column
-    IQR = Q3 - Q1
-    
-    # Determine outlier boundaries for each selected numeric column using IQR method
-    lower_limit = Q1 - 1.5 * IQR
-    upper_limit = Q3 + 1.5 * IQR
-    
-    # Replace outliers within the IQR limits for each selected numeric column
-    for col in selected_columns:
-        # Replace values below the lower limit with the lower limit value
-        df_replaced[col] = df_replaced[col].apply(lambda x: lower_limit[col] if x < lower_limit[col] else x)
-        
-        # Replace values above the upper limit with the upper limit value
-        df_replaced[col] = df_replaced[col].apply(lambda x: upper_limit[col] if x > upper_limit[col] else x)
-        
-        # Count outliers replaced for the current column
-        outlier_counts[col] = ((df[col] < lower_limit[col]) | (df[col] > upper_limit[col])).sum()
-        
-        # Identify and store replaced rows for the current column
-        replaced_rows = df[((df[col] < lower_limit[col]) | (df[col] > upper_limit[col]))]
-        replaced_df = pd.concat([replaced_df, replaced_rows])
-    
+    # Determine outlier boundaries for each selected numeric column using IQR method, from the profiled quartiles
+    stats = profile_of(df, profile)
+    lower_limit, upper_limit = outlier_limits(df, selected_columns, ("iqr",), approximate=approximate, profile=stats)["iqr"]
+
+    # Identify outliers of the whole selected block in one NumPy pass
+    values = numeric_block(df, selected_columns)
+    mask = outlier_mask(df, selected_columns, lower_limit, upper_limit, values=values)
+
+    # Count outliers replaced for each selected column
+    outlier_counts = pd.Series(mask.sum(axis=0), index=selected_columns)
+
+    # Clip the selected block to the IQR limits in one step
+    df_replaced = cap_outliers(df, selected_columns, lower_limit, upper_limit, values=values, mask=mask)
+
+    # Rows with a replaced value in any selected column, each listed once
+    replaced_df = df[mask.any(axis=1)]
+
     # Get shapes of original and replaced DataFrames
     original_shape = df.shape
     replaced_shape = df_replaced.shape
@@ -57,30 +51,39 @@ def replace_outliers_iqr(df, selected_columns):
 def main():
     st.title('Replace Outliers with IQR Method')
     
-    # File upload
-    uploaded_file = st.file_uploader("Upload CSV file", type=['csv'])
-    
-    if uploaded_file is not None:
+    # Read the current version of the shared dataset
+    df = require_dataset()
+
+    if df is not None:
         st.write("### Original Data")
-        df = pd.read_csv(uploaded_file)
-        st.write(df)
+        show_dataframe(df, key="original")
         
         # Checkbox or multiselect dropdown for column selection
         all_columns = df.columns.tolist()
         selected_columns = st.multiselect("Select columns for outlier replacement", all_columns, default=all_columns)
         
         if len(selected_columns) > 0:
+            approximate = st.checkbox("Approximate quartiles (faster on large data)", value=len(df) >= APPROXIMATE_MIN_ROWS,
+                                      help="Read the quartiles from a quantile sketch of each column, with error bounds.")
+
             # Replace outliers using IQR for selected columns
             try:
-                replaced_df, outlier_counts, replaced_rows, original_shape, replaced_shape = replace_outliers_iqr(df, selected_columns)
+                profile = get_profile()
+                replaced_df, outlier_counts, replaced_rows, original_shape, replaced_shape = replace_outliers_iqr(df, selected_columns, profile, approximate)
+                if approximate:
+                    show_quantile_bounds(profile, (0.25, 0.75), selected_columns)
                 
                 st.write("### Data after Replacing Outliers (IQR Method)")
-                st.write(replaced_df)
+                show_dataframe(replaced_df, key="capped")
+                # The limits used here are recorded as is, so committing does not compute them again
+                step = PipelineStep("cap_outliers", columns=selected_columns, method="iqr", approximate=approximate)
+                step.fitted = outlier_bounds(df, selected_columns, method="iqr", approximate=approximate, profile=profile)
+                commit_button(replaced_df, "IQR outlier capping", pipeline_step=step)
                 
                 # Display replaced rows (Rows with replaced outliers)
                 if not replaced_rows.empty:
                     st.write("### Replaced Rows (Rows with Outliers Replaced)")
-                    st.write(replaced_rows)
+                    show_dataframe(replaced_rows, key="capped_rows")
                 
                 # Display outlier counts per selected column
                 st.write("### Outlier Counts (Column-wise)")
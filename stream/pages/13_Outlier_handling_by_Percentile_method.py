@@ -1,40 +1,50 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 
-def trim_and_cap_outliers(df, selected_columns, lower_percentile, upper_percentile):
+from column_profile import APPROXIMATE_MIN_ROWS, get_profile, profile_of, show_quantile_bounds
+from dataset_store import commit_button, require_dataset
+from pipeline import PipelineStep, outlier_bounds
+from outliers import cap_outliers, outlier_limits, outlier_mask, trim_outliers
+from preview import show_dataframe
+
+def trim_and_cap_outliers(df, selected_columns, lower_percentile, upper_percentile, profile=None, approximate=False):
     """
     Trim rows containing outliers and cap outlier values within custom percentile ranges for specified columns.
 
+    Exact percentiles and the values outside them are found by binary search
+    in each column's sorted values, built once per column version, so
+    changing the percentiles does not sort the columns again.
+
     Parameters:
     df (DataFrame): Input DataFrame containing numerical columns.
     selected_columns (list): List of column names to perform outlier trimming and capping on.
     lower_percentile (float): Lower percentile value (e.g., 0.1 for 0.1th percentile).
     upper_percentile (float): Upper percentile value (e.g., 99.9 for 99.9th percentile).
+    profile (DatasetProfile): Column statistics of df, computed on demand if omitted.
+    approximate (bool): Read the percentiles from quantile sketches instead of sorting the columns.
 
     Returns:
     Tuple: A tuple containing the following:
         - trimmed_df (DataFrame): DataFrame after trimming rows with outliers.
         - capped_df (DataFrame): DataFrame with outlier values capped within specified percentiles.
+        - outlier_counts (Series): Series showing the count of outliers for each selected column.
     """
-    df_processed = df.copy()
-
     # Calculate lower and upper bounds based on custom percentiles for selected columns
-    lower_limit = df[selected_columns].quantile(lower_percentile / 100)
-    upper_limit = df[selected_columns].quantile(upper_percentile / 100)
+    stats = profile_of(df, profile)
+    lower_limit, upper_limit = outlier_limits(df, selected_columns, ("percentile",), lower_percentile=lower_percentile,
+                                              upper_percentile=upper_percentile, approximate=approximate,
+                                              profile=stats)["percentile"]
 
-    # Identify rows containing outliers and trim them for selected columns
-    row_outliers_mask = ((df_processed[selected_columns] < lower_limit) | (df_processed[selected_columns] > upper_limit)).any(axis=1)
-    trimmed_df = df_processed[~row_outliers_mask]
+    # Identify outliers of the selected block; approximate limits are compared
+    # with the values rather than sorting the columns
+    mask = outlier_mask(df, selected_columns, lower_limit, upper_limit, profile=None if approximate else stats)
+    outlier_counts = pd.Series(mask.sum(axis=0), index=selected_columns)
 
-    # Cap outlier values within the specified percentile limits for selected columns
-    for col in selected_columns:
-        df_processed[col] = np.where(df_processed[col] < lower_limit[col], lower_limit[col], df_processed[col])
-        df_processed[col] = np.where(df_processed[col] > upper_limit[col], upper_limit[col], df_processed[col])
+    # Trim rows containing outliers, and cap outlier values within the percentile limits
+    trimmed_df = trim_outliers(df, mask)
+    capped_df = cap_outliers(df, selected_columns, lower_limit, upper_limit, mask=mask)
 
-    capped_df = df_processed
-
-    return trimmed_df, capped_df
+    return trimmed_df, capped_df, outlier_counts
 
 def display_dataframe_shapes(original_shape, trimmed_shape, capped_shape):
     """
@@ -53,14 +63,12 @@ def display_dataframe_shapes(original_shape, trimmed_shape, capped_shape):
 def main():
     st.title('Outlier Trimming and Capping App')
 
-    # File upload
-    uploaded_file = st.file_uploader("Upload CSV file", type=['csv'])
-
-    if uploaded_file is not None:
-        df = pd.read_csv(uploaded_file)
+    # Read the current version of the shared dataset
+    df = require_dataset()
 
+    if df is not None:
         st.write("### Original Data")
-        st.write(df)
+        show_dataframe(df, key="original")
 
         # Checkbox or multiselect dropdown for column selection
         all_columns = df.select_dtypes(include=['number']).columns.tolist()
@@ -70,16 +78,36 @@ def main():
             # User-defined percentiles via input boxes
             lower_percentile = st.number_input("Lower Percentile (e.g., 0.1 for 0.1th percentile)", min_value=0.0, max_value=100.0, value=0.1, step=0.1)
             upper_percentile = st.number_input("Upper Percentile (e.g., 99.9 for 99.9th percentile)", min_value=0.0, max_value=100.0, value=99.9, step=0.1)
+            approximate = st.checkbox("Approximate percentiles (faster on large data)", value=len(df) >= APPROXIMATE_MIN_ROWS,
+                                      help="Read the percentiles from a quantile sketch of each column, built once, with error bounds.")
 
             # Trim and cap outliers using custom percentiles for selected columns
             try:
-                trimmed_df, capped_df = trim_and_cap_outliers(df, selected_columns, lower_percentile, upper_percentile)
+                profile = get_profile()
+                trimmed_df, capped_df, outlier_counts = trim_and_cap_outliers(df, selected_columns, lower_percentile, upper_percentile, profile, approximate)
+                if approximate:
+                    show_quantile_bounds(profile, (lower_percentile / 100, upper_percentile / 100), selected_columns)
 
                 st.write("### Data after Trimming Outliers")
-                st.write(trimmed_df)
+                show_dataframe(trimmed_df, key="trimmed")
+                percentiles = {"lower_percentile": lower_percentile, "upper_percentile": upper_percentile, "approximate": approximate}
+                # The limits used here are recorded as is, so committing does not compute them again
+                limits = outlier_bounds(df, selected_columns, method="percentile", profile=profile, **percentiles)
+                trim_step = PipelineStep("trim_outliers", columns=selected_columns, method="percentile", **percentiles)
+                trim_step.fitted = limits
+                cap_step = PipelineStep("cap_outliers", columns=selected_columns, method="percentile", **percentiles)
+                cap_step.fitted = limits
+                commit_button(trimmed_df, "Percentile outlier trimming", label="Use Trimmed Data for the next steps",
+                              pipeline_step=trim_step)
 
                 st.write("### Data after Capping Outliers")
-                st.write(capped_df)
+                show_dataframe(capped_df, key="capped")
+                commit_button(capped_df, "Percentile outlier capping", label="Use Capped Data for the next steps",
+                              pipeline_step=cap_step)
+
+                # Display outlier counts per selected column
+                st.write("### Outlier Counts (Column-wise)")
+                st.write(outlier_counts)
 
                 # Display dataframe shapes
                 display_dataframe_shapes(df.shape, trimmed_df.shape, capped_df.shape)
@@ -1,82 +1,77 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
+
+from dataset_store import commit_button, require_dataset
+from pipeline import PipelineStep
+from dtypes import numeric_columns
+from function_transforms import FUNCTION_TRANSFORMS, apply_function_transform
+from preview import show_dataframe
 
 def apply_log_transformation(df, columns):
     """
     Apply log transformation to the specified columns in the DataFrame.
     """
-    for col in columns:
-        df[col + '_log'] = np.log(df[col] + 1)  # Adding 1 to handle zero and negative values
-    return df
+    return apply_function_transform(df, columns, "log")  # log(x + 1), so zero values stay finite
 
 def apply_reciprocal_transformation(df, columns):
     """
     Apply reciprocal transformation to the specified columns in the DataFrame.
     """
-    for col in columns:
-        df[col + '_reciprocal'] = 1 / (df[col] + 1)  # Adding 1 to handle zero values
-    return df
+    return apply_function_transform(df, columns, "reciprocal")  # 1 / (x + 1), so zero values stay finite
 
 def apply_square_transformation(df, columns):
     """
     Apply square transformation to the specified columns in the DataFrame.
     """
-    for col in columns:
-        df[col + '_square'] = df[col] ** 2
-    return df
+    return apply_function_transform(df, columns, "square")
 
 def apply_square_root_transformation(df, columns):
     """
     Apply square root transformation to the specified columns in the DataFrame.
     """
-    for col in columns:
-        df[col + '_sqrt'] = np.sqrt(df[col])
-    return df
+    return apply_function_transform(df, columns, "sqrt")
+
+# Page function of each transform, by name; only the ones picked in the sidebar are called
+TRANSFORMATIONS = {
+    "log": apply_log_transformation,
+    "reciprocal": apply_reciprocal_transformation,
+    "square": apply_square_transformation,
+    "sqrt": apply_square_root_transformation,
+}
 
 def main():
     st.title("DataFrame Function Transformation App")
 
-    # File upload
-    st.sidebar.header('Upload your CSV file')
-    uploaded_file = st.sidebar.file_uploader("Upload a CSV file", type=["csv"])
-
-    if uploaded_file is not None:
-        # Read CSV file
-        df = pd.read_csv(uploaded_file)
+    # Read the current version of the shared dataset
+    df = require_dataset()
 
+    if df is not None:
         st.header("Original DataFrame")
-        st.write(df)
+        show_dataframe(df, key="original")
 
         # Identify numerical columns
-        numerical_cols = df.select_dtypes(include=['float', 'int']).columns.tolist()
+        numerical_cols = numeric_columns(df)
 
         if numerical_cols:
             st.sidebar.subheader("Select Columns for Transformation")
             selected_cols = st.sidebar.multiselect("Choose columns for transformation", numerical_cols)
 
-            if selected_cols:
-                st.header("Transformations for Selected Columns")
+            selected_transforms = st.sidebar.multiselect("Choose transformations", list(FUNCTION_TRANSFORMS),
+                                                         default=list(FUNCTION_TRANSFORMS)[:1],
+                                                         format_func=FUNCTION_TRANSFORMS.get)
 
-                # Apply log transformation
-                df_log = apply_log_transformation(df.copy(), selected_cols)
-                st.subheader("Log Transformation")
-                st.write(df_log)
-
-                # Apply reciprocal transformation
-                df_reciprocal = apply_reciprocal_transformation(df.copy(), selected_cols)
-                st.subheader("Reciprocal Transformation")
-                st.write(df_reciprocal)
-
-                # Apply square transformation
-                df_square = apply_square_transformation(df.copy(), selected_cols)
-                st.subheader("Square Transformation")
-                st.write(df_square)
+            if selected_cols and selected_transforms:
+                st.header("Transformations for Selected Columns")
 
-                # Apply square root transformation
-                df_sqrt = apply_square_root_transformation(df.copy(), selected_cols)
-                st.subheader("Square Root Transformation")
-                st.write(df_sqrt)
+                # Only the selected transforms are computed; each adds its new columns to a shallow copy of df
+                for transform in selected_transforms:
+                    title = FUNCTION_TRANSFORMS[transform]
+                    df_transformed = TRANSFORMATIONS[transform](df, selected_cols)
+                    st.subheader(f"{title} Transformation")
+                    show_dataframe(df_transformed, key=transform)
+                    commit_button(df_transformed, f"{title} transformation",
+                                  label=f"Use {title} Transformation for the next steps",
+                                  pipeline_step=PipelineStep("function_transform", columns=selected_cols,
+                                                             transform=transform))
 
 if __name__ == "__main__":
     main()
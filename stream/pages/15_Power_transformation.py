@@ -1,57 +1,102 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-from scipy.stats import boxcox, yeojohnson
 
-def apply_boxcox_transformation(df, columns):
+from column_profile import get_profile
+from dataset_store import commit_button, require_dataset
+from pipeline import PipelineStep
+from dtypes import numeric_columns
+from power import DEFAULT_SAMPLE_ROWS, apply_lambdas, fit_lambdas
+from preview import show_dataframe
+
+def apply_boxcox_transformation(df, columns, lambdas=None):
     """
     Apply Box-Cox transformation to the specified columns in the DataFrame.
+
+    Parameters:
+    df (DataFrame): Input DataFrame.
+    columns (list): Columns to transform; 1 is added to handle zero values.
+    lambdas (dict): Fitted lambda of each column, fitted here if omitted.
+
+    Returns:
+    DataFrame: DataFrame with a '<column>_boxcox' column added for each column.
     """
-    for col in columns:
-        df[col + '_boxcox'], _ = boxcox(df[col] + 1)  # Adding 1 to handle zero and negative values
-    return df
+    if lambdas is None:
+        lambdas = fit_lambdas(df, columns, "boxcox")
+    return apply_lambdas(df, {col: lambdas[col] for col in columns}, "boxcox")
 
-def apply_yeojohnson_transformation(df, columns):
+def apply_yeojohnson_transformation(df, columns, lambdas=None):
     """
     Apply Yeo-Johnson transformation to the specified columns in the DataFrame.
+
+    Parameters:
+    df (DataFrame): Input DataFrame.
+    columns (list): Columns to transform; 1 is added to their values, as for Box-Cox.
+    lambdas (dict): Fitted lambda of each column, fitted here if omitted.
+
+    Returns:
+    DataFrame: DataFrame with a '<column>_yeojohnson' column added for each column.
     """
-    for col in columns:
-        df[col + '_yeojohnson'], _ = yeojohnson(df[col] + 1)  # Adding 1 to handle zero and negative values
-    return df
+    if lambdas is None:
+        lambdas = fit_lambdas(df, columns, "yeojohnson")
+    return apply_lambdas(df, {col: lambdas[col] for col in columns}, "yeojohnson")
+
+def show_power_transformation(df, selected_cols, method, transform, title, sample_rows, profile):
+    """
+    Display one power transformation with its fitted lambdas and commit button.
+    """
+    st.subheader(f"{title} Transformation")
+    try:
+        # Lambdas are kept for each column version, so reruns do not fit them again
+        lambdas = profile.power_lambdas(selected_cols, method, sample_rows)
+    except ValueError as e:
+        st.error(f"Error: {e}")
+        return
+
+    df_transformed = transform(df, selected_cols, lambdas)
+    st.write("Fitted lambdas:")
+    st.dataframe(pd.DataFrame({"Column": list(lambdas), "Lambda": list(lambdas.values())}), hide_index=True)
+    show_dataframe(df_transformed, key=method)
+
+    # The lambdas fitted here are recorded as is, so committing does not fit them again
+    step = PipelineStep("power_transform", columns=selected_cols, method=method, sample_rows=sample_rows)
+    step.fitted = {"lambdas": lambdas}
+    commit_button(df_transformed, f"{title} transformation", label=f"Use {title} Transformation for the next steps",
+                  pipeline_step=step)
 
 def main():
     st.title("DataFrame Power Transformation App")
 
-    # File upload
-    st.sidebar.header('Upload your CSV file')
-    uploaded_file = st.sidebar.file_uploader("Upload a CSV file", type=["csv"])
-
-    if uploaded_file is not None:
-        # Read CSV file
-        df = pd.read_csv(uploaded_file)
+    # Read the current version of the shared dataset
+    df = require_dataset()
 
+    if df is not None:
         st.header("Original DataFrame")
-        st.write(df)
+        show_dataframe(df, key="original")
 
         # Identify numerical columns
-        numerical_cols = df.select_dtypes(include=['float', 'int']).columns.tolist()
+        numerical_cols = numeric_columns(df)
 
         if numerical_cols:
             st.sidebar.subheader("Select Columns for Transformation")
             selected_cols = st.sidebar.multiselect("Choose columns for transformation", numerical_cols)
+            # Lambdas are fitted on every value unless a sample is asked for
+            sample_rows = 0
+            if st.sidebar.checkbox("Fit lambdas on a random sample (faster, approximate)", value=False,
+                                   help="Lambdas fitted on a random sample approximate the lambdas of the full columns."):
+                sample_rows = int(st.sidebar.number_input("Rows in the sample", min_value=1,
+                                                          value=DEFAULT_SAMPLE_ROWS, step=10000))
 
             if selected_cols:
                 st.header("Power Transformations for Selected Columns")
+                profile = get_profile()
 
                 # Apply Box-Cox transformation
-                df_boxcox = apply_boxcox_transformation(df.copy(), selected_cols)
-                st.subheader("Box-Cox Transformation")
-                st.write(df_boxcox)
+                show_power_transformation(df, selected_cols, "boxcox", apply_boxcox_transformation, "Box-Cox",
+                                          sample_rows or None, profile)
 
                 # Apply Yeo-Johnson transformation
-                df_yeojohnson = apply_yeojohnson_transformation(df.copy(), selected_cols)
-                st.subheader("Yeo-Johnson Transformation")
-                st.write(df_yeojohnson)
+                show_power_transformation(df, selected_cols, "yeojohnson", apply_yeojohnson_transformation,
+                                          "Yeo-Johnson", sample_rows or None, profile)
 
 if __name__ == "__main__":
     main()
@@ -1,45 +1,103 @@
 import streamlit as st
-import pandas as pd
-from sklearn.preprocessing import OrdinalEncoder
+
+from column_profile import get_profile
+from dataset_store import commit_button, require_dataset
+from pipeline import PipelineStep
+from dtypes import categorical_columns
+from ordinal import (MAPPING_INPUTS, MAX_VALUE_INPUTS, apply_mappings, count_unmapped, read_mapping_table,
+                     sorted_categories, target_values)
+from preview import show_dataframe
+
+def order_mappings(df, columns, profile):
+    """
+    Map the values of each column to their position in an order picked from its sorted values.
+    """
+    mappings = {}
+    for col in columns:
+        values = sorted_categories(df[col], profile)
+        order = st.multiselect(f"Order of the values of '{col}', lowest first (values left out become missing)",
+                               values, default=values, key=f"order_{col}")
+        mappings[col] = {value: code for code, value in enumerate(order)}
+    return mappings
+
+def table_mappings(columns):
+    """
+    Read the mappings of the columns from a pasted or uploaded mapping table, or return None without one.
+    """
+    st.caption("CSV with a header row: a 'Category' and a 'Value' column, plus a 'Column' column to map several "
+               "columns with one table (e.g. the category codes downloaded from the label encoder).")
+    text = st.text_area("Paste a mapping table")
+    uploaded_file = st.file_uploader("Or upload one", type=["csv"])
+    data = uploaded_file.getvalue() if uploaded_file is not None else text
+    if not data.strip():
+        st.info("Paste or upload a mapping table to encode the columns.")
+        return None
+    try:
+        return read_mapping_table(data, columns)
+    except ValueError as e:
+        st.error(f"Error: {e}")
+        return None
+
+def value_mappings(df, columns, profile):
+    """
+    Map the values of each column to the text entered for each of them, or return None for columns with too many values.
+    """
+    mappings = {}
+    for col in columns:
+        st.subheader(f"Custom Mapping for '{col}'")
+        unique_values = sorted_categories(df[col], profile)
+        if len(unique_values) > MAX_VALUE_INPUTS:
+            st.warning(f"'{col}' has {len(unique_values)} distinct values; map it with an order or a mapping table.")
+            return None
+
+        custom_values = []
+        for value in unique_values:
+            default_value = str(value)  # Default mapping is the same as category value
+            custom_values.append(st.text_input(f"Enter value for '{value}' (default: {default_value}):",
+                                               value=default_value, key=f"value_{col}_{value}"))
+        mappings[col] = dict(zip(unique_values, target_values(custom_values)))
+    return mappings
 
 def main():
     st.title("Custom Ordinal Encoding App")
 
-    # File upload
-    st.sidebar.header('Upload your CSV file')
-    uploaded_file = st.sidebar.file_uploader("Upload a CSV file", type=["csv"])
-
-    if uploaded_file is not None:
-        # Read CSV file
-        df = pd.read_csv(uploaded_file)
+    # Read the current version of the shared dataset
+    df = require_dataset()
 
+    if df is not None:
         st.header("Original Data")
-        st.write(df)
+        show_dataframe(df, key="original")
 
         # Identify categorical columns
-        categorical_cols = df.select_dtypes(include=['object']).columns.tolist()
+        categorical_cols = categorical_columns(df)
 
         if categorical_cols:
             st.subheader("Select Categorical Columns for Custom Ordinal Encoding")
             selected_cols = st.multiselect("Choose columns", categorical_cols)
 
             if selected_cols:
-                # Custom mapping for each selected column
-                for col in selected_cols:
-                    st.subheader(f"Custom Mapping for '{col}'")
-                    unique_values = df[col].unique()
-                    value_mapping = {}
-
-                    for value in unique_values:
-                        default_value = value  # Default mapping is the same as category value
-                        custom_value = st.text_input(f"Enter value for '{value}' (default: {default_value}):", value=default_value)
-                        value_mapping[value] = custom_value
+                # Custom mapping for each selected column, entered in bulk or value by value
+                mapping_input = st.radio("Map the values with", list(MAPPING_INPUTS), format_func=MAPPING_INPUTS.get,
+                                         horizontal=True)
+                profile = get_profile()
+                if mapping_input == "order":
+                    mappings = order_mappings(df, selected_cols, profile)
+                elif mapping_input == "table":
+                    mappings = table_mappings(selected_cols)
+                else:
+                    mappings = value_mappings(df, selected_cols, profile)
 
+                if mappings is not None:
                     # Apply custom ordinal encoding
-                    df[col] = df[col].map(value_mapping)
+                    encoded_df = apply_mappings(df, mappings)
+                    for col, unmapped in count_unmapped(df, encoded_df, list(mappings)).items():
+                        if unmapped:
+                            st.warning(f"{unmapped} values of '{col}' have no mapping and became missing.")
 
-                st.header("Encoded Data")
-                st.write(df)
+                    st.header("Encoded Data")
+                    show_dataframe(encoded_df, key="encoded")
+                    commit_button(encoded_df, "Custom ordinal encoding",
+                                  pipeline_step=PipelineStep("ordinal_map", mappings=mappings))
 
             else:
                 st.warning("Please select at least one column for encoding.")
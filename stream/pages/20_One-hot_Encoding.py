@@ -1,43 +1,73 @@
 import streamlit as st
 import pandas as pd
 
-def perform_one_hot_encoding(df, columns_to_encode):
+from column_profile import get_profile
+from dataset_store import commit_button, require_dataset
+from pipeline import PipelineStep
+from dtypes import categorical_columns
+from one_hot import DEFAULT_HASH_FEATURES, ENCODING_MODES, choose_mode, estimate_sizes, fit_categories, one_hot_encode
+from preview import show_dataframe
+
+AUTOMATIC = "auto"
+
+def perform_one_hot_encoding(df, columns_to_encode, mode="dense", categories=None, n_features=DEFAULT_HASH_FEATURES):
     """
-    Perform one-hot encoding on specified columns of the DataFrame using pandas' get_dummies().
+    Perform one-hot encoding on specified columns of the DataFrame, as pandas' get_dummies() does.
+    Dense mode gives bool columns, sparse mode sparse bool columns and hashing mode
+    n_features sparse columns per encoded column.
     Returns the DataFrame with one-hot encoded columns.
     """
-    # Perform one-hot encoding using pd.get_dummies()
-    encoded_df = pd.get_dummies(df, columns=columns_to_encode, drop_first=True)
-    
-    return encoded_df
+    return one_hot_encode(df, columns_to_encode, categories, drop_first=True, mode=mode, n_features=n_features)
 
 def main():
     st.title("One-Hot Encoding App with pandas")
 
-    # File upload
-    st.sidebar.header('Upload your CSV file')
-    uploaded_file = st.sidebar.file_uploader("Upload a CSV file", type=["csv"])
-
-    if uploaded_file is not None:
-        # Read CSV file
-        df = pd.read_csv(uploaded_file)
+    # Read the current version of the shared dataset
+    df = require_dataset()
 
+    if df is not None:
         st.header("Original Data")
-        st.write(df)
+        show_dataframe(df, key="original")
 
         # Identify categorical columns
-        categorical_cols = df.select_dtypes(include=['object']).columns.tolist()
+        categorical_cols = categorical_columns(df)
 
         if categorical_cols:
             st.subheader("Select Columns for One-Hot Encoding")
             selected_cols = st.multiselect("Choose columns to encode", categorical_cols)
 
             if selected_cols:
+                mode_col, top_k_col, hash_col = st.columns(3)
+                mode = mode_col.selectbox("Output", [AUTOMATIC] + list(ENCODING_MODES),
+                                          format_func=lambda m: "Automatic" if m == AUTOMATIC else ENCODING_MODES[m])
+                top_k = int(top_k_col.number_input("Keep only the most frequent categories (0 = all)", min_value=0,
+                                                   value=0, step=1))
+                n_features = int(hash_col.number_input("Hashed columns per encoded column", min_value=2,
+                                                       value=DEFAULT_HASH_FEATURES, step=1))
+
+                # Size of the output of each mode, estimated from the cached value counts before encoding
+                profile = get_profile()
+                categories = fit_categories(df, selected_cols, top_k or None, profile)
+                sizes = estimate_sizes(df, selected_cols, categories, n_features=n_features, profile=profile)
+                st.write("Estimated output size:")
+                st.dataframe(pd.DataFrame({"Mode": list(ENCODING_MODES.values()), "Columns": sizes["Columns"].to_numpy(),
+                                           "Size (MB)": (sizes["Bytes"] / 2**20).round(2).to_numpy()}),
+                             hide_index=True)
+                if mode == AUTOMATIC:
+                    mode = choose_mode(sizes)
+                    st.info(f"{ENCODING_MODES[mode]} output is used, from the estimated sizes.")
+
                 # Perform one-hot encoding
-                encoded_df = perform_one_hot_encoding(df, selected_cols)
+                encoded_df = perform_one_hot_encoding(df, selected_cols, mode, categories, n_features)
 
                 st.header("Encoded Data")
-                st.write(encoded_df)
+                show_dataframe(encoded_df, key="encoded")
+
+                # The categories fitted here are recorded as is, so committing does not fit them again
+                step = PipelineStep("one_hot", columns=selected_cols, drop_first=True, mode=mode, top_k=top_k or None,
+                                    n_features=n_features)
+                step.fitted = {} if mode == "hashing" else {"categories": categories}
+                commit_button(encoded_df, "One-hot encoding", pipeline_step=step)
 
             else:
                 st.warning("Please select at least one column for encoding.")
@@ -1,5 +1,9 @@
 import streamlit as st
-import pandas as pd
+
+from dataset_store import commit_button, require_dataset
+from downloads import download_button, download_format_choice
+from pipeline import PipelineStep
+from preview import show_dataframe
 
 def convert_boolean_to_int(df):
     """
@@ -15,33 +19,26 @@ def convert_boolean_to_int(df):
 
 def main():
     st.title("Convert Boolean Values to Integer (1/0) App")
-    st.subheader("Upload downloaded file of one-hot encoding to convert boolean to binary")
-    # File upload
-    st.sidebar.header('Upload your CSV file')
-    uploaded_file = st.sidebar.file_uploader("Upload a boolean file", type=["csv"])
-
-    if uploaded_file is not None:
-        # Read CSV file
-        df = pd.read_csv(uploaded_file)
+    st.subheader("Convert the boolean columns of the current dataset (e.g. after one-hot encoding) to binary")
+    # Read the current version of the shared dataset
+    df = require_dataset()
 
+    if df is not None:
         st.header("Original Data")
-        st.write(df)
+        show_dataframe(df, key="original")
 
         # Convert boolean values to integer (1/0)
         df_updated = convert_boolean_to_int(df.copy())
 
         st.header("Updated Data with Boolean Conversion")
-        st.write(df_updated)
+        show_dataframe(df_updated, key="updated")
+        commit_button(df_updated, "Boolean to integer conversion", pipeline_step=PipelineStep("bool_to_int"))
 
-        # Button to download updated DataFrame as CSV
+        # Button to download updated DataFrame, serialized only when clicked
         st.sidebar.markdown("---")
-        st.sidebar.header("Download Updated CSV")
-        st.sidebar.download_button(
-            label="Download CSV",
-            data=df_updated.to_csv(index=False),
-            file_name="updated_data.csv",
-            mime="text/csv"
-        )
+        st.sidebar.header("Download Updated Data")
+        download_format = download_format_choice(container=st.sidebar)
+        download_button(df_updated, "updated_data.csv", download_format, container=st.sidebar)
 
 if __name__ == "__main__":
     main()
@@ -1,36 +1,45 @@
 import streamlit as st
-import pandas as pd
-from sklearn.preprocessing import LabelEncoder
+
+from dataset_store import commit_button, require_dataset
+from downloads import download_button
+from pipeline import PipelineStep
+from dtypes import categorical_columns
+from label_encoder import fit_label_encoding, mapping_table
+from preview import show_dataframe
 
 def main():
     st.title("Categorical Data Encoder")
 
-    # File upload
-    st.sidebar.header('Upload your CSV file')
-    uploaded_file = st.sidebar.file_uploader("Upload a CSV file", type=["csv"])
-
-    if uploaded_file is not None:
-        # Read CSV file
-        df = pd.read_csv(uploaded_file)
+    # Read the current version of the shared dataset
+    df = require_dataset()
 
+    if df is not None:
         st.header("Original Data")
-        st.write(df)
+        show_dataframe(df, key="original")
 
         # Identify categorical columns
-        categorical_cols = df.select_dtypes(include=['object']).columns.tolist()
+        categorical_cols = categorical_columns(df)
 
         if categorical_cols:
             st.subheader("Select Categorical Columns for Encoding")
             selected_cols = st.multiselect("Choose columns", categorical_cols)
 
             if selected_cols:
-                # Apply label encoding
-                for col in selected_cols:
-                    le = LabelEncoder()
-                    df[col] = le.fit_transform(df[col].astype(str))
+                # Apply label encoding; missing values get the code -1
+                encoded_df, mappings = fit_label_encoding(df, selected_cols)
 
                 st.header("Encoded Data")
-                st.write(df)
+                show_dataframe(encoded_df, key="encoded")
+
+                # The mappings fitted here are recorded as is, so new data is encoded with the same codes
+                step = PipelineStep("label_encode", columns=selected_cols)
+                step.fitted = {"mappings": mappings}
+                commit_button(encoded_df, "Label encoding", pipeline_step=step)
+
+                with st.expander("Category codes"):
+                    table = mapping_table(mappings)
+                    st.dataframe(table, hide_index=True)
+                    download_button(table, "label_mappings.csv", label="Download category codes", key="mappings")
 
             else:
                 st.warning("Please select at least one column for encoding.")
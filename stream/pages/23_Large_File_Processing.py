@@ -0,0 +1,98 @@
+import os
+
+import streamlit as st
+import pandas as pd
+
+from chunked import DEFAULT_CHUNKSIZE, OPERATIONS, collect_stats, detect_numeric_columns, null_summary, process_file
+
+# Directory on the server the page may read input files from and write new
+# files to; the page is disabled when it is not set
+DATA_DIR = os.environ.get("TRIM_DATA_DIR")
+
+def resolve_data_path(path):
+    """
+    Resolve a path given on the page relative to DATA_DIR, or return None
+    when it points outside of it (e.g. through '..' or a symbolic link).
+    """
+    data_dir = os.path.realpath(DATA_DIR)
+    resolved = os.path.realpath(os.path.join(data_dir, path))
+    if os.path.commonpath([data_dir, resolved]) != data_dir:
+        return None
+    return resolved
+
+def main():
+    st.title("Large File Processing (Out-of-Core)")
+    st.write("""
+    Process CSV files that are too large to upload or to hold in memory. The file is read
+    from the server in chunks: statistics are gathered in a first pass, then every chunk is
+    transformed and appended to the output file, so memory use depends on the chunk size
+    rather than on the size of the file.
+    """)
+
+    if not DATA_DIR:
+        st.info("This page reads and writes files on the server, so it is disabled unless the TRIM_DATA_DIR "
+                "environment variable names the directory it may use.")
+        return
+
+    in_name = st.text_input(f"Path of the input CSV file, relative to {DATA_DIR}")
+    if not in_name:
+        return
+    in_path = resolve_data_path(in_name)
+    if in_path is None:
+        st.error(f"The input file must be inside {DATA_DIR}.")
+        return
+    if not os.path.isfile(in_path):
+        st.warning(f"File not found: {in_name}")
+        return
+
+    chunksize = int(st.number_input("Rows per chunk", min_value=1000, value=DEFAULT_CHUNKSIZE, step=10000))
+    operation = st.selectbox("Operation", list(OPERATIONS), format_func=OPERATIONS.get)
+
+    if operation == "null_counts":
+        if st.button("Count Null Values"):
+            total_rows, null_counts, _ = collect_stats(in_path, chunksize=chunksize)
+            st.write(f"Rows: {total_rows}")
+            st.write("### Null Value Percentages:")
+            st.write(null_summary(total_rows, null_counts))
+        return
+
+    selected_columns = []
+    if operation != "bool_to_int":
+        numerical_cols = detect_numeric_columns(in_path)
+        selected_columns = st.multiselect("Select numerical columns", numerical_cols, default=numerical_cols)
+        if not selected_columns:
+            st.warning("Please select at least one numerical column.")
+            return
+
+    params = {}
+    if operation == "cap_percentile":
+        params["lower_percentile"] = st.number_input("Lower Percentile (e.g., 0.1 for 0.1th percentile)", min_value=0.0, max_value=100.0, value=0.1, step=0.1)
+        params["upper_percentile"] = st.number_input("Upper Percentile (e.g., 99.9 for 99.9th percentile)", min_value=0.0, max_value=100.0, value=99.9, step=0.1)
+
+    root, _ = os.path.splitext(in_name)
+    out_name = st.text_input(f"Path of the output CSV file, relative to {DATA_DIR}", value=f"{root}_{operation}.csv")
+
+    if st.button("Process File"):
+        out_path = resolve_data_path(out_name)
+        if out_path is None:
+            st.error(f"The output file must be inside {DATA_DIR}.")
+            return
+        # Only new files are written, so no existing file (the input included) is ever overwritten
+        if os.path.exists(out_path):
+            st.error(f"{out_name} already exists; choose a new output file name.")
+            return
+        try:
+            with st.spinner("Processing file in chunks..."):
+                summary = process_file(in_path, out_path, operation, selected_columns, chunksize, **params)
+        except Exception as e:
+            st.error(f"Error: {e}")
+            return
+
+        st.success(f"Wrote {summary['rows']} rows in {summary['chunks']} chunk(s) to {out_name} "
+                   f"in {summary['seconds']:.1f} s")
+        if summary["fitted"]:
+            st.write("### Statistics used for the transformation")
+            st.write(pd.DataFrame(summary["fitted"]).T)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import streamlit as st
+
+from column_profile import get_profile
+from dataset_store import require_dataset
+from dtypes import numeric_columns
+from outliers import compare_methods
+from preview import show_dataframe
+
+def main():
+    st.title('Compare Outlier Detection Methods')
+
+    # Read the current version of the shared dataset
+    df = require_dataset()
+
+    if df is not None:
+        st.write("### Original Data")
+        show_dataframe(df, key="original")
+
+        # Checkbox or multiselect dropdown for column selection
+        all_columns = numeric_columns(df)
+        selected_columns = st.multiselect("Select columns to compare outlier methods on", all_columns, default=all_columns)
+
+        if len(selected_columns) > 0:
+            # Parameters of the z-score and percentile methods; the IQR method uses 1.5 times the IQR
+            z_col, lower_col, upper_col = st.columns(3)
+            z_thresh = z_col.slider("Z-score Threshold", min_value=0.0, max_value=10.0, value=3.0, step=0.05)
+            lower_percentile = lower_col.number_input("Lower Percentile", min_value=0.0, max_value=100.0, value=0.1, step=0.1)
+            upper_percentile = upper_col.number_input("Upper Percentile", min_value=0.0, max_value=100.0, value=99.9, step=0.1)
+
+            # Limits and outliers of every method, from the cached statistics and sorted values of each column
+            counts, rows, limits = compare_methods(df, selected_columns, z_thresh, lower_percentile, upper_percentile,
+                                                   get_profile())
+
+            st.write("### Outlier Counts (Column-wise)")
+            st.dataframe(counts)
+
+            st.write("### Rows with Outliers")
+            st.write("Rows trimming would remove with each method, out of", len(df))
+            st.dataframe(rows.to_frame().T, hide_index=True)
+
+            st.write("### Outlier Limits")
+            st.dataframe(limits)
+        else:
+            st.warning("Please select at least one column to compare outlier methods on.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from data_io import read_bytes
+
+# Default memory budget for cached DataFrames, overridable through the environment
+DEFAULT_BUDGET_MB = int(os.environ.get("TRIM_PARSE_CACHE_MB", "1024"))
+
+
+def hash_bytes(data, chunk_size=16 * 1024 * 1024):
+    """
+    Return a hex digest identifying the content of an uploaded file.
+
+    The bytes are fed to the hash in slices so a memoryview over a large
+    upload is never copied as a whole.
+    """
+    hasher = hashlib.blake2b(digest_size=20)
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        hasher.update(view[start:start + chunk_size])
+    return hasher.hexdigest()
+
+
+def make_cache_key(digest, options):
+    """
+    Build the cache key from the content digest and the parse options.
+    """
+    return (digest, tuple(sorted((name, repr(value)) for name, value in options.items())))
+
+
+def frame_nbytes(df):
+    """
+    Memory used by a DataFrame, including the contents of object columns.
+    """
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class ParseCache:
+    """
+    Least-recently-used cache of parsed DataFrames with a memory budget.
+
+    Entries are keyed by the hash of the uploaded bytes plus the options
+    used to parse them, so re-uploading the same file or rerunning the
+    script returns the frame parsed the first time.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_BUDGET_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, df):
+        size = frame_nbytes(df)
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+
+            # A frame larger than the whole budget is returned but never cached
+            if size > self.max_bytes:
+                return
+
+            self._entries[key] = (df, size)
+            self.current_bytes += size
+            self._evict()
+
+    def set_budget(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self):
+        # Drop least recently used entries until the cache fits the budget
+        while self.current_bytes > self.max_bytes and self._entries:
+            _, (_, size) = self._entries.popitem(last=False)
+            self.current_bytes -= size
+
+    def read_file(self, data, file_format="csv", digest=None, **options):
+        """
+        Parse uploaded bytes, returning the cached DataFrame when the same
+        bytes were already parsed with the same format and options.
+
+        Parameters:
+        data (bytes): Raw content of the uploaded file.
+        file_format (str): Input format, one of data_io.INPUT_TYPES.
+        digest (str): Precomputed content hash, computed from data if omitted.
+        **options: Parser options forwarded to data_io.read_bytes.
+
+        Returns:
+        DataFrame: A shallow copy of the cached frame, so callers can add or
+        replace columns without touching the cached entry.
+        """
+        if digest is None:
+            digest = hash_bytes(data)
+        key = make_cache_key(digest, dict(options, file_format=file_format))
+
+        df = self.get(key)
+        if df is None:
+            df = read_bytes(data, file_format, **options)
+            self.put(key, df)
+
+        return df.copy(deep=False)
+
+    def read_csv(self, data, digest=None, **options):
+        """
+        Parse CSV bytes through the cache; see read_file.
+        """
+        return self.read_file(data, "csv", digest, **options)
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_parse_cache():
+    """
+    Return the process-wide parse cache shared by all sessions.
+    """
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = ParseCache()
+        return _shared_cache
@@ -0,0 +1,325 @@
+import argparse
+import pickle
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler, RobustScaler, StandardScaler
+
+from data_io import file_format_from_name, read_bytes, write_dataframe
+from dtypes import fill_column
+from function_transforms import apply_function_transform
+from knn_impute import make_knn_imputer
+from label_encoder import encode_labels, fit_label_encoding
+from mice import fit_mice_imputer
+from one_hot import DEFAULT_HASH_FEATURES, fit_categories, one_hot_encode
+from ordinal import apply_mappings
+from parse_cache import hash_bytes
+from outliers import cap_outliers, outlier_limits, outlier_mask, trim_outliers
+from power import apply_lambdas, fit_lambdas
+from scalers import IncrementalScaler
+
+# Pipelines record and replay the steps committed on the pages without
+# Streamlit: every step type has a fit function, which gathers the
+# statistics the step needs from the data it was recorded on, and an apply
+# function, which transforms any DataFrame with those statistics.
+#
+# Pipeline files are pickles, as fitted steps hold scikit-learn objects, and
+# loading one can run arbitrary code: only load pipeline files you trust,
+# such as those downloaded from your own session of the app.
+
+
+def _fit_nothing(df, **params):
+    return {}
+
+
+def _apply_drop_columns(df, fitted, columns):
+    return df.drop(columns=columns)
+
+
+def row_fingerprint(df):
+    """
+    Content hash of the rows of a DataFrame, the same whatever width or
+    backend (NumPy, nullable or Arrow) stores its numeric columns.
+    """
+    hashes = [pd.util.hash_pandas_object(
+        pd.Series(df[col].to_numpy(dtype=float, na_value=np.nan)) if pd.api.types.is_numeric_dtype(df[col]) else df[col],
+        index=False).to_numpy() for col in df.columns]
+    return hash_bytes(np.concatenate([np.array([len(df)], dtype=np.uint64), *hashes]))
+
+
+def _fit_drop_rows(df, indices=(), column=None, value=None):
+    # Row positions only identify the same rows in the data they were picked on
+    return {"fingerprint": row_fingerprint(df)} if indices else {}
+
+
+def _apply_drop_rows(df, fitted, indices=(), column=None, value=None):
+    if indices:
+        if fitted.get("fingerprint") != row_fingerprint(df):
+            raise ValueError("Rows dropped by index can only be replayed on the data they were picked on; "
+                             "drop rows by value to clean other data.")
+        df = df.drop(index=list(indices), errors="ignore").reset_index(drop=True)
+    if column is not None and value is not None:
+        df = df[df[column] != value].reset_index(drop=True)
+    return df
+
+
+def _apply_dropna(df, fitted, columns):
+    return df.dropna(subset=columns).reset_index(drop=True)
+
+
+def _apply_change_dtype(df, fitted, dtypes):
+    df = df.copy(deep=False)
+    for col, dtype in dtypes.items():
+        df[col] = df[col].astype(dtype)
+    return df
+
+
+def _fit_fill_numeric(df, columns, method="mean"):
+    values = df[columns].mean() if method == "mean" else df[columns].median()
+    return {"values": {col: float(values[col]) for col in columns}}
+
+
+def _fit_fill_mode(df, columns):
+    return {"values": {col: df[col].mode().iloc[0] for col in columns if not df[col].mode().empty}}
+
+
+def _apply_fill(df, fitted, columns, **params):
+    df = df.copy(deep=False)
+    for col, value in fitted["values"].items():
+        df[col] = fill_column(df[col], value)
+    return df
+
+
+def _fit_knn_impute(df, columns, n_neighbors=5, weights="uniform", method="dense"):
+    imputer = make_knn_imputer(n_neighbors, weights, method, rows=len(df))
+    return {"imputer": imputer.fit(df[columns])}
+
+
+def _fit_mice_impute(df, columns, max_iter=10, estimator="bayesian_ridge", n_nearest_features=None, sample_rows=None):
+    return {"imputer": fit_mice_imputer(df, columns, max_iter, estimator, n_nearest_features, sample_rows)}
+
+
+def _apply_imputer(df, fitted, columns, **params):
+    df = df.copy(deep=False)
+    df[columns] = fitted["imputer"].transform(df[columns])
+    return df
+
+
+def outlier_bounds(df, columns, method="iqr", threshold=3.0, lower_percentile=0.1, upper_percentile=99.9,
+                   approximate=False, profile=None):
+    """
+    Lower and upper outlier limits of each column for the z-score, IQR and percentile methods.
+
+    With approximate, the IQR and percentile limits come from quantile
+    sketches of the columns; a DatasetProfile of df, if given, supplies its
+    cached sketches and quantiles.
+    """
+    lower, upper = outlier_limits(df, columns, (method,), threshold, lower_percentile, upper_percentile,
+                                  approximate, profile)[method]
+    return {"lower": dict(zip(columns, lower.tolist())), "upper": dict(zip(columns, upper.tolist()))}
+
+
+def _fit_outliers(df, columns, **params):
+    return outlier_bounds(df, columns, **params)
+
+
+def _fitted_limits(fitted, columns):
+    return (np.array([fitted["lower"][col] for col in columns], dtype=float),
+            np.array([fitted["upper"][col] for col in columns], dtype=float))
+
+
+def _apply_trim_outliers(df, fitted, columns, **params):
+    lower, upper = _fitted_limits(fitted, columns)
+    return trim_outliers(df, outlier_mask(df, columns, lower, upper))
+
+
+def _apply_cap_outliers(df, fitted, columns, **params):
+    lower, upper = _fitted_limits(fitted, columns)
+    return cap_outliers(df, columns, lower, upper)
+
+
+def _apply_function_transform(df, fitted, columns, transform):
+    return apply_function_transform(df, columns, transform)
+
+
+def _fit_power_transform(df, columns, method="boxcox", sample_rows=None):
+    return {"lambdas": fit_lambdas(df, columns, method, sample_rows)}
+
+
+def _apply_power_transform(df, fitted, columns, method="boxcox", sample_rows=None):
+    return apply_lambdas(df, {col: fitted["lambdas"][col] for col in columns}, method)
+
+
+SCALERS = {"standard": StandardScaler, "minmax": MinMaxScaler, "robust": RobustScaler}
+
+
+def _fit_scale(df, columns, method="standard", incremental=False):
+    # The incremental scaler is fitted chunk by chunk, in parallel
+    scaler = IncrementalScaler(method) if incremental else SCALERS[method]()
+    return {"scaler": scaler.fit(df[columns])}
+
+
+def _apply_scale(df, fitted, columns, method="standard", incremental=False):
+    df = df.copy(deep=False)
+    df[columns] = fitted["scaler"].transform(df[columns])
+    return df
+
+
+def _apply_ordinal_map(df, fitted, mappings):
+    return apply_mappings(df, mappings)
+
+
+def _fit_one_hot(df, columns, drop_first=True, mode="dense", top_k=None, n_features=DEFAULT_HASH_FEATURES):
+    # Hashed columns need no categories: every value has its fixed output column
+    return {} if mode == "hashing" else {"categories": fit_categories(df, columns, top_k)}
+
+
+def _apply_one_hot(df, fitted, columns, drop_first=True, mode="dense", top_k=None, n_features=DEFAULT_HASH_FEATURES):
+    # Fixing the categories gives new data the same dummy columns as the recorded data
+    return one_hot_encode(df, columns, fitted.get("categories"), drop_first, mode, n_features)
+
+
+def _apply_bool_to_int(df, fitted):
+    df = df.copy(deep=False)
+    boolean_cols = df.select_dtypes(include='bool').columns
+    df[boolean_cols] = df[boolean_cols].astype(int)
+    return df
+
+
+def _fit_label_encode(df, columns):
+    return {"mappings": fit_label_encoding(df, columns)[1]}
+
+
+def _apply_label_encode(df, fitted, columns):
+    # Values not seen when the step was recorded get the code -1
+    return encode_labels(df, {col: fitted["mappings"][col] for col in columns})
+
+
+# Step name -> (fit function, apply function)
+STEP_TYPES = {
+    "drop_columns": (_fit_nothing, _apply_drop_columns),
+    "drop_rows": (_fit_drop_rows, _apply_drop_rows),
+    "dropna": (_fit_nothing, _apply_dropna),
+    "change_dtype": (_fit_nothing, _apply_change_dtype),
+    "fill_numeric": (_fit_fill_numeric, _apply_fill),
+    "fill_mode": (_fit_fill_mode, _apply_fill),
+    "knn_impute": (_fit_knn_impute, _apply_imputer),
+    "mice_impute": (_fit_mice_impute, _apply_imputer),
+    "trim_outliers": (_fit_outliers, _apply_trim_outliers),
+    "cap_outliers": (_fit_outliers, _apply_cap_outliers),
+    "function_transform": (_fit_nothing, _apply_function_transform),
+    "power_transform": (_fit_power_transform, _apply_power_transform),
+    "scale": (_fit_scale, _apply_scale),
+    "ordinal_map": (_fit_nothing, _apply_ordinal_map),
+    "one_hot": (_fit_one_hot, _apply_one_hot),
+    "bool_to_int": (_fit_nothing, _apply_bool_to_int),
+    "label_encode": (_fit_label_encode, _apply_label_encode),
+}
+
+
+class PipelineStep:
+    """
+    One recorded transformation: its type, parameters and fitted statistics.
+    """
+
+    def __init__(self, name, **params):
+        if name not in STEP_TYPES:
+            raise ValueError(f"Unknown pipeline step: '{name}'")
+        self.name = name
+        self.params = params
+        self.fitted = None
+
+    def fit(self, df):
+        fit_function, _ = STEP_TYPES[self.name]
+        self.fitted = fit_function(df, **self.params)
+        return self
+
+    def apply(self, df):
+        if self.fitted is None:
+            raise ValueError(f"Pipeline step '{self.name}' has not been fitted.")
+        _, apply_function = STEP_TYPES[self.name]
+        return apply_function(df, self.fitted, **self.params)
+
+    def __repr__(self):
+        params = ", ".join(f"{name}={value!r}" for name, value in self.params.items())
+        return f"{self.name}({params})"
+
+
+class Pipeline:
+    """
+    Ordered list of fitted steps that can be replayed on new data.
+    """
+
+    def __init__(self, steps=None):
+        self.steps = list(steps or [])
+
+    def append(self, step):
+        self.steps.append(step)
+
+    def pop(self):
+        return self.steps.pop()
+
+    def apply(self, df):
+        for step in self.steps:
+            df = step.apply(df)
+        return df
+
+    def describe(self):
+        return pd.DataFrame({
+            'Step': [step.name for step in self.steps],
+            'Parameters': [repr(step.params) for step in self.steps],
+        })
+
+    def __len__(self):
+        return len(self.steps)
+
+    def to_bytes(self):
+        return pickle.dumps(self)
+
+    @staticmethod
+    def from_bytes(data):
+        # Unpickling runs code from the file, so the data must come from a trusted source
+        pipeline = pickle.loads(data)
+        if not isinstance(pipeline, Pipeline):
+            raise ValueError("The file does not contain a pipeline.")
+        return pipeline
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @staticmethod
+    def load(path):
+        with open(path, "rb") as f:
+            return Pipeline.from_bytes(f.read())
+
+
+def replay_file(pipeline, in_path, out_path):
+    """
+    Apply a pipeline to a data file and write the result, without Streamlit.
+    The result is written to the file chunk by chunk rather than serialized
+    in memory first.
+    """
+    with open(in_path, "rb") as f:
+        df = read_bytes(f.read(), file_format_from_name(in_path))
+    result = pipeline.apply(df)
+    with open(out_path, "wb") as f:
+        write_dataframe(result, f, "parquet" if out_path.endswith(".parquet") else "csv")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded cleaning pipeline on a data file.")
+    parser.add_argument("pipeline", help="Pipeline file downloaded from the upload page (only load trusted files)")
+    parser.add_argument("input", help="CSV, Parquet, Feather or Arrow IPC file to clean")
+    parser.add_argument("output", help="CSV or Parquet file to write")
+    args = parser.parse_args()
+
+    result = replay_file(Pipeline.load(args.pipeline), args.input, args.output)
+    print(f"Wrote {len(result)} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    # Run from the importable module, so unpickled steps and this script share the same classes
+    from pipeline import main
+    main()
@@ -0,0 +1,93 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import special
+from scipy.stats import boxcox_normmax, yeojohnson, yeojohnson_normmax
+
+from dtypes import widen
+
+# Power transforms, by name: label
+POWER_METHODS = {"boxcox": "Box-Cox", "yeojohnson": "Yeo-Johnson"}
+
+# Sample size offered when lambdas are fitted on a random sample, which is an
+# explicit choice: the lambda of a sample approximates the lambda of the full
+# column (closer the larger the sample), it does not reproduce it
+DEFAULT_SAMPLE_ROWS = 100_000
+
+# Several columns with at least this many values in total are fitted in a
+# pool of worker processes; smaller fits are quicker in the calling process
+PARALLEL_MIN_VALUES = 200_000
+
+
+def shifted_values(series):
+    """
+    Values of a numeric column plus 1, as the pages transform them, as a
+    float ndarray with missing values as NaN.
+    """
+    return widen(series).to_numpy(dtype=float, na_value=np.nan) + 1
+
+
+def fit_lambda(values, method="boxcox", sample_rows=None, random_state=0):
+    """
+    Maximum likelihood lambda of a power transform, like the one boxcox and
+    yeojohnson return, from the observed values, or from a random sample
+    of sample_rows of them, which approximates the lambda of all values.
+    """
+    if method not in POWER_METHODS:
+        raise ValueError(f"Unknown power transform: {method}")
+    values = values[~np.isnan(values)]
+    if sample_rows and len(values) > sample_rows:
+        values = np.random.default_rng(random_state).choice(values, sample_rows, replace=False)
+    if method == "boxcox":
+        if len(values) == 0 or values.min() <= 0:
+            raise ValueError("Box-Cox needs positive values: every value plus 1 must be above 0.")
+        return float(boxcox_normmax(values, method="mle"))
+    return float(yeojohnson_normmax(values))
+
+
+def fit_lambdas(df, columns, method="boxcox", sample_rows=None, workers=None, random_state=0):
+    """
+    Fit the lambda of every column. The optimizers of boxcox_normmax and
+    yeojohnson_normmax hold the GIL, so large fits of several columns run
+    in a pool of worker processes, one column per task, each sent only the
+    values of its column; small ones run one column after the other.
+
+    Parameters:
+    df (DataFrame): Input DataFrame.
+    columns (list): Numerical columns to fit.
+    method (str): A key of POWER_METHODS.
+    sample_rows (int): Fit on a random sample of this many values of each column, all values if omitted.
+    workers (int): Worker processes, one per CPU if omitted.
+    random_state (int): Seed of the random samples.
+
+    Returns:
+    dict: Mapping of column name to lambda.
+    """
+    values = [shifted_values(df[col]) for col in columns]
+    workers = min(workers or os.cpu_count() or 1, len(columns))
+    if workers < 2 or sum(len(v) for v in values) < PARALLEL_MIN_VALUES:
+        return {col: fit_lambda(v, method, sample_rows, random_state) for col, v in zip(columns, values)}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(fit_lambda, v, method, sample_rows, random_state) for v in values]
+        return {col: future.result() for col, future in zip(columns, futures)}
+
+
+def power_transform(values, lmbda, method="boxcox"):
+    """
+    Transform shifted values with a fitted lambda, elementwise; NaN stays NaN.
+    """
+    if method == "boxcox":
+        return special.boxcox(values, lmbda)
+    return yeojohnson(values, lmbda)
+
+
+def apply_lambdas(df, lambdas, method="boxcox"):
+    """
+    Add the transformed column '<col>_<method>' for every fitted column;
+    works on any frame or chunk with those columns.
+    """
+    df = df.copy(deep=False)
+    for col, lmbda in lambdas.items():
+        df[f"{col}_{method}"] = power_transform(shifted_values(df[col]), lmbda, method)
+    return df
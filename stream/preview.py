@@ -0,0 +1,115 @@
+import os
+
+import numpy as np
+import streamlit as st
+
+from dtypes import dense_rows
+
+# Largest number of rows sent to the browser for one preview, overridable through the environment
+MAX_PREVIEW_ROWS = int(os.environ.get("TRIM_PREVIEW_MAX_ROWS", "1000"))
+
+PAGE_SIZES = (25, 50, 100, 250, 500, 1000)
+DEFAULT_PAGE_SIZE = 50
+
+NO_COLUMN = "(none)"
+
+
+def filter_rows(df, column, text):
+    """
+    Positions of the rows whose value in `column` contains `text`, ignoring case.
+    """
+    values = df[column]
+    matches = values.astype(str).str.contains(text, case=False, regex=False) & values.notna()
+    return np.flatnonzero(matches.to_numpy(dtype=bool))
+
+
+def sort_rows(df, column, descending=False, positions=None):
+    """
+    Positions of the rows ordered by `column`, missing values last. Ties
+    keep their original order.
+    """
+    values = df[column].reset_index(drop=True)
+    if positions is not None:
+        values = values.iloc[positions]
+    try:
+        return values.sort_values(ascending=not descending, kind="stable", na_position="last").index.to_numpy()
+    except TypeError:
+        # Mixed types in an object column: order by their text
+        return values.astype(str).sort_values(ascending=not descending, kind="stable").index.to_numpy()
+
+
+def page_of(df, page, page_size, sort_column=None, descending=False, filter_column=None, filter_text=""):
+    """
+    Select one page of rows of a DataFrame after filtering and sorting.
+
+    Only the positions of the rows are sorted and filtered; the rows
+    themselves are taken from the frame for the requested page alone.
+
+    Parameters:
+    df (DataFrame): Frame to page through.
+    page (int): Page number, starting at 1; clamped to the last page.
+    page_size (int): Rows per page.
+    sort_column (str): Column to order the rows by, or None for the frame order.
+    descending (bool): Sort from largest to smallest.
+    filter_column (str): Column the filter text is searched in, or None.
+    filter_text (str): Keep only rows whose filter column contains this text.
+
+    Returns:
+    Tuple: A tuple containing the following:
+        - rows (DataFrame): The rows of the page.
+        - matching (int): Number of rows left after filtering.
+        - page (int): The page actually shown.
+    """
+    positions = None
+    if filter_column is not None and filter_text:
+        positions = filter_rows(df, filter_column, filter_text)
+    if sort_column is not None:
+        positions = sort_rows(df, sort_column, descending, positions)
+
+    matching = len(df) if positions is None else len(positions)
+    page = max(1, min(page, -(-matching // page_size)))
+    start, stop = (page - 1) * page_size, min(page * page_size, matching)
+    rows = df.iloc[start:stop] if positions is None else df.iloc[positions[start:stop]]
+    return rows, matching, page
+
+
+def show_dataframe(df, key, container=st, lazy=False, label="Show"):
+    """
+    Display a DataFrame one page at a time, sorting and filtering on the
+    server so only the visible rows are sent to the browser.
+
+    Parameters:
+    df (DataFrame or callable): The frame, or a function returning it.
+    key (str): Unique key of the preview on its page, used for its widgets.
+    container: Streamlit container to draw in.
+    lazy (bool): Only build and show the frame after the user ticks a checkbox.
+    label (str): Label of that checkbox.
+    """
+    if lazy and not container.checkbox(label, key=f"{key}_show"):
+        return
+    if callable(df):
+        df = df()
+
+    columns = [str(col) for col in df.columns]
+    by_name = dict(zip(columns, df.columns))
+    page_sizes = [size for size in PAGE_SIZES if size <= MAX_PREVIEW_ROWS] or [MAX_PREVIEW_ROWS]
+
+    sort_col, order_col, filter_col, text_col, size_col, page_col = container.columns([3, 2, 3, 3, 2, 2])
+    sort_column = sort_col.selectbox("Sort by", [NO_COLUMN] + columns, key=f"{key}_sort")
+    descending = order_col.selectbox("Order", ["Ascending", "Descending"], key=f"{key}_order") == "Descending"
+    filter_column = filter_col.selectbox("Filter column", [NO_COLUMN] + columns, key=f"{key}_filter_column")
+    filter_text = text_col.text_input("Contains", key=f"{key}_filter_text")
+    default_size = page_sizes.index(DEFAULT_PAGE_SIZE) if DEFAULT_PAGE_SIZE in page_sizes else len(page_sizes) - 1
+    page_size = size_col.selectbox("Rows per page", page_sizes, index=default_size, key=f"{key}_page_size")
+    page = int(page_col.number_input("Page", min_value=1, value=1, step=1, key=f"{key}_page"))
+
+    rows, matching, page = page_of(df, page, page_size,
+                                   sort_column=by_name.get(sort_column), descending=descending,
+                                   filter_column=by_name.get(filter_column), filter_text=filter_text)
+
+    container.dataframe(dense_rows(rows))
+    pages = max(1, -(-matching // page_size))
+    first = (page - 1) * page_size + 1 if matching else 0
+    container.caption(f"Rows {first}-{(page - 1) * page_size + len(rows)} of {matching}"
+                      + (f" (filtered from {len(df)})" if matching != len(df) else "")
+                      + f", page {page} of {pages}")
@@ -0,0 +1,230 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Size of the largest compactor. The rank error of a quantile is about
+# 1.7 / DEFAULT_K of the number of values (0.2% for 1024), independent of
+# how many values were added.
+DEFAULT_K = 1024
+
+# The smallest and the largest values kept exactly, next to the compactors,
+# so that tail quantiles (e.g. the 0.1th and 99.9th percentiles of up to
+# 65 million values) are exact where the rank error would swamp them
+DEFAULT_TAIL_VALUES = 65_536
+
+# Later compactors shrink by this factor, as in KLL
+CAPACITY_DECAY = 2 / 3
+MIN_CAPACITY = 8
+
+# Default probability that a quantile's rank error exceeds rank_error()
+DEFAULT_FAILURE_PROBABILITY = 1e-3
+
+# Values sketched separately, in parallel, before the sketches are merged
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+
+class QuantileSketch:
+    """
+    Mergeable approximate quantiles of a numeric column (a KLL sketch).
+
+    Values are kept in a hierarchy of compactors: level h holds values
+    standing for 2**h original values each. When a level overflows it is
+    sorted and every other value, starting at a random offset, moves up a
+    level. Memory stays around 3 * k values however many are added, and
+    sketches of separate chunks merge into the sketch of all of them.
+
+    Count, minimum and maximum are exact, and so are the tail_values
+    smallest and largest values, which answer the ranks they cover. A compaction at level h moves the
+    estimated rank of any value by 2**h up or down with equal probability,
+    or not at all, so the rank error is a sum of independent zero-mean
+    terms; rank_error() bounds it with Hoeffding's inequality.
+    """
+
+    def __init__(self, k=DEFAULT_K, seed=0, tail_values=DEFAULT_TAIL_VALUES):
+        self.k = k
+        self.tail_values = tail_values
+        self.low = np.empty(0)  # The smallest values, sorted
+        self.high = np.empty(0)  # The largest values, sorted
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.error_variance = 0.0  # Sum of the squared weights of all compactions
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def from_values(cls, values, k=DEFAULT_K, seed=0, tail_values=DEFAULT_TAIL_VALUES):
+        return cls(k, seed, tail_values).update(values)
+
+    def _update_tails(self, low, high):
+        # Keep the tail_values smallest and largest of the values seen so far
+        low, high = np.concatenate([self.low, low]), np.concatenate([self.high, high])
+        t = self.tail_values
+        if len(low) > t:
+            low = np.partition(low, t - 1)[:t]
+        if len(high) > t:
+            high = np.partition(high, len(high) - t)[len(high) - t:]
+        self.low, self.high = np.sort(low), np.sort(high)
+
+    def update(self, values):
+        """
+        Add a float ndarray of values; NaN values are ignored.
+        """
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._update_tails(values, values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """
+        Add the values summarized by another sketch with the same k.
+        """
+        if other.k != self.k or other.tail_values != self.tail_values:
+            raise ValueError("Only sketches with the same k and tail_values can be merged.")
+        if other.count == 0:
+            return self
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, level in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], level])
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._update_tails(other.low, other.high)
+        self.error_variance += other.error_variance
+        self._compress()
+        return self
+
+    def _capacity(self, h):
+        depth = len(self.levels) - 1 - h
+        return max(MIN_CAPACITY, int(np.ceil(self.k * CAPACITY_DECAY ** depth)))
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                level = np.sort(level)
+                # An odd value out stays on this level so the total weight is unchanged
+                kept, level = level[len(level) - len(level) % 2:], level[:len(level) - len(level) % 2]
+                promoted = level[self._rng.integers(2)::2]
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+                self.levels[h] = kept
+                # One compaction moves any rank by at most the weight of a value of this level
+                self.error_variance += 4.0 ** h
+            h += 1
+
+    def _sorted_items(self):
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2 ** h, dtype=np.int64) for h, level in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        return values[order], np.cumsum(weights[order])
+
+    def _value_at_rank(self, ranks, values, cumulative):
+        # Value with the given 0-based ranks among all the values summarized,
+        # exact for the ranks of the tails
+        ranks = np.clip(np.asarray(ranks, dtype=float), 0, self.count - 1)
+        result = values[np.minimum(np.searchsorted(cumulative, ranks, side="right"), len(values) - 1)]
+        if len(self.low):
+            low_ranks = np.minimum(ranks, len(self.low) - 1).astype(np.int64)
+            result = np.where(ranks < len(self.low), self.low[low_ranks], result)
+        if len(self.high):
+            first = self.count - len(self.high)
+            high_ranks = np.clip(ranks - first, 0, len(self.high) - 1).astype(np.int64)
+            result = np.where(ranks >= first, self.high[high_ranks], result)
+        return result
+
+    def is_exact(self, q):
+        """
+        Whether quantile q is read from the exact tails.
+        """
+        position = (self.count - 1) * q
+        return bool(np.ceil(position) < len(self.low) or np.floor(position) >= self.count - len(self.high))
+
+    def quantiles(self, probs):
+        """
+        Approximate quantiles, interpolated linearly between the values at
+        the neighbouring ranks like Series.quantile. Returns NaN when empty.
+        """
+        probs = np.atleast_1d(np.asarray(probs, dtype=float))
+        if self.count == 0:
+            return np.full(len(probs), np.nan)
+        values, cumulative = self._sorted_items()
+        positions = (self.count - 1) * probs
+        lower = self._value_at_rank(np.floor(positions), values, cumulative)
+        upper = self._value_at_rank(np.ceil(positions), values, cumulative)
+        result = lower + (upper - lower) * (positions - np.floor(positions))
+        # The extremes are exact
+        result[probs <= 0] = self.min
+        result[probs >= 1] = self.max
+        return result
+
+    def quantile(self, q):
+        return float(self.quantiles([q])[0])
+
+    def rank_error(self, failure_probability=DEFAULT_FAILURE_PROBABILITY):
+        """
+        Rank error, as a fraction of the number of values, that a quantile
+        exceeds only with the given probability.
+        """
+        if self.count == 0:
+            return 0.0
+        return float(np.sqrt(2 * self.error_variance * np.log(2 / failure_probability))) / self.count
+
+    def in_tail(self, q, failure_probability=DEFAULT_FAILURE_PROBABILITY):
+        """
+        Whether quantile q is closer to either end than the rank error, so
+        that the error can be as large as the tail itself (e.g. the 0.1th
+        percentile with a rank error of 0.2%), and beyond the exact tails,
+        so that q is better computed from all the values.
+        """
+        return min(q, 1 - q) <= self.rank_error(failure_probability) and not self.is_exact(q)
+
+    def quantile_bounds(self, q, failure_probability=DEFAULT_FAILURE_PROBABILITY):
+        """
+        Values between which the exact quantile q lies, except with the given probability.
+        """
+        if self.count == 0:
+            return np.nan, np.nan
+        if self.is_exact(q):
+            return self.quantile(q), self.quantile(q)
+        values, cumulative = self._sorted_items()
+        position = (self.count - 1) * q
+        error = np.ceil(self.rank_error(failure_probability) * self.count)
+        low_rank, high_rank = np.floor(position) - error, np.ceil(position) + error
+        lower = self.min if low_rank <= 0 else float(self._value_at_rank(low_rank, values, cumulative))
+        upper = self.max if high_rank >= self.count - 1 else float(self._value_at_rank(high_rank, values, cumulative))
+        return lower, upper
+
+    def __len__(self):
+        return sum(len(level) for level in self.levels)
+
+
+def sketch_values(values, k=DEFAULT_K, chunk_rows=DEFAULT_CHUNK_ROWS, workers=None):
+    """
+    Sketch a float ndarray in one pass: every chunk of chunk_rows values is
+    sketched on a pool of threads with its own random seed, and the chunk
+    sketches are merged in order, so the result does not depend on the
+    number of workers.
+    """
+    starts = range(0, len(values), chunk_rows)
+    if len(starts) <= 1:
+        return QuantileSketch.from_values(values, k)
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        sketches = pool.map(lambda i: QuantileSketch.from_values(values[starts[i]:starts[i] + chunk_rows], k, seed=i),
+                            range(len(starts)))
+        sketch = next(sketches)
+        for other in sketches:
+            sketch.merge(other)
+    return sketch
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+# Rows read, fitted or written at a time by the chunked code paths
+DEFAULT_CHUNKSIZE = 200_000
+
+
+def numeric_values(chunk, col):
+    """
+    Return the non-null values of a numeric column as a float ndarray.
+    """
+    series = chunk[col]
+    if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        raise ValueError(f"Column '{col}' is not numeric in every chunk of the file.")
+    values = series.to_numpy(dtype=float, na_value=np.nan)
+    return values[~np.isnan(values)]
+
+
+class RunningStats:
+    """
+    Mergeable count, mean, variance, minimum and maximum of a numeric column.
+
+    Chunks are combined with the parallel variance formula of Chan et al.,
+    so statistics of chunks processed separately can be merged exactly.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        if len(values) == 0:
+            return self
+        other = RunningStats()
+        other.count = len(values)
+        other.mean = float(values.mean())
+        other.m2 = float(((values - other.mean) ** 2).sum())
+        other.min = float(values.min())
+        other.max = float(values.max())
+        return self.merge(other)
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def std(self, ddof=1):
+        if self.count - ddof <= 0:
+            return np.nan
+        return float(np.sqrt(self.m2 / (self.count - ddof)))
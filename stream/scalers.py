@@ -0,0 +1,145 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from quantile_sketch import DEFAULT_K, QuantileSketch
+from running_stats import DEFAULT_CHUNKSIZE, RunningStats, numeric_values
+
+SCALE_METHODS = ("standard", "minmax", "robust")
+
+
+def _column_values(df, col):
+    return df[col].to_numpy(dtype=float, na_value=np.nan)
+
+
+class IncrementalScaler:
+    """
+    Standard, min-max or robust scaling fitted chunk by chunk.
+
+    Standard and min-max scaling keep mergeable running statistics (count,
+    mean, variance, minimum, maximum) per column, so fitting over chunks
+    gives the same center and scale as StandardScaler and MinMaxScaler on
+    the whole data. Robust scaling keeps a quantile sketch per column and
+    centers on the approximate median, scaling by the approximate
+    interquartile range, off by at most rank_error() of the rows in rank.
+
+    Fitting never needs all the data at once: partial_fit takes one chunk,
+    merge combines scalers fitted on separate chunks, possibly in parallel,
+    and transform works on any chunk once fitted. Like the scikit-learn
+    scalers, missing values are ignored when fitting and kept when
+    transforming, and a constant column is only shifted.
+    """
+
+    def __init__(self, method="standard", k=DEFAULT_K, seed=0):
+        if method not in SCALE_METHODS:
+            raise ValueError(f"Unknown scaling method: {method}")
+        self.method = method
+        self.k = k
+        self.seed = seed
+        self.columns = None
+        self.stats = {}
+
+    def _new_stats(self):
+        return QuantileSketch(self.k, self.seed) if self.method == "robust" else RunningStats()
+
+    def partial_fit(self, chunk):
+        """
+        Update the statistics with one chunk (a DataFrame of the scaled columns).
+        """
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+        for col in self.columns:
+            self.stats.setdefault(col, self._new_stats()).update(numeric_values(chunk, col))
+        return self
+
+    def merge(self, other):
+        """
+        Add the statistics of a scaler fitted on other chunks of the same columns.
+        """
+        if other.method != self.method:
+            raise ValueError("Only scalers with the same method can be merged.")
+        if self.columns is None:
+            self.columns = other.columns
+        for col, stats in other.stats.items():
+            self.stats.setdefault(col, self._new_stats()).merge(stats)
+        return self
+
+    def fit(self, df, chunksize=DEFAULT_CHUNKSIZE, workers=None):
+        """
+        Fit on a DataFrame, split into chunks fitted in parallel.
+        """
+        chunks = [df.iloc[start:start + chunksize] for start in range(0, max(len(df), 1), chunksize)]
+        return self.fit_chunks(chunks, workers)
+
+    def fit_chunks(self, chunks, workers=None):
+        """
+        Fit on an iterable of DataFrames, e.g. the chunks of a file too large
+        for memory. Each chunk is fitted by a pool of threads into its own
+        scaler, with its own random seed as in sketch_values, and the scalers
+        are merged in chunk order; at most two chunks per worker are held at
+        a time.
+        """
+        def fit_one(chunk, seed):
+            return IncrementalScaler(self.method, self.k, seed).partial_fit(chunk)
+
+        workers = workers or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = []
+            for i, chunk in enumerate(chunks):
+                pending.append(pool.submit(fit_one, chunk, self.seed + i))
+                if len(pending) >= 2 * workers:
+                    self.merge(pending.pop(0).result())
+            for future in pending:
+                self.merge(future.result())
+        return self
+
+    def parameters(self):
+        """
+        Center and scale of every fitted column, computed like the
+        scikit-learn scalers: mean and standard deviation, minimum and range,
+        or median and interquartile range. A zero scale becomes 1.
+
+        Returns:
+        Tuple: A tuple containing the following:
+            - center (Series): Value subtracted from each column.
+            - scale (Series): Value each column is then divided by.
+        """
+        center, scale = {}, {}
+        for col, stats in self.stats.items():
+            if stats.count == 0:
+                center[col], scale[col] = np.nan, np.nan
+                continue
+            if self.method == "standard":
+                center[col], scale[col] = stats.mean, stats.std(ddof=0)
+            elif self.method == "minmax":
+                center[col], scale[col] = stats.min, stats.max - stats.min
+            else:
+                q1, median, q3 = stats.quantiles([0.25, 0.5, 0.75])
+                center[col], scale[col] = median, q3 - q1
+            if not scale[col] > 0:
+                scale[col] = 1.0
+        return pd.Series(center, dtype=float), pd.Series(scale, dtype=float)
+
+    def rank_error(self):
+        """
+        Largest rank error, as a fraction of the rows, of the quantiles of a
+        robust scaler; the other methods are exact.
+        """
+        if self.method != "robust":
+            return 0.0
+        return max((stats.rank_error() for stats in self.stats.values()), default=0.0)
+
+    def transform(self, df):
+        """
+        Scale the fitted columns of a DataFrame; returns them as a float DataFrame.
+        """
+        if self.columns is None:
+            raise ValueError("The scaler has not been fitted.")
+        center, scale = self.parameters()
+        return pd.DataFrame({col: (_column_values(df, col) - center[col]) / scale[col] for col in self.columns},
+                            index=df.index)
+
+    def fit_transform(self, df, chunksize=DEFAULT_CHUNKSIZE, workers=None):
+        return self.fit(df, chunksize, workers).transform(df)
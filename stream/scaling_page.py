@@ -0,0 +1,89 @@
+import pickle
+
+import streamlit as st
+
+from dataset_store import commit_button, require_dataset
+from downloads import download_button, download_format_choice
+from pipeline import SCALERS, PipelineStep
+from dtypes import numeric_columns
+from preview import show_dataframe
+from scalers import IncrementalScaler
+
+FIT_MODES = {"Whole dataset (exact)": False, "Incremental (chunks fitted in parallel)": True}
+
+# What the incremental scaler of each method is fitted from
+INCREMENTAL_FITS = {
+    "standard": "the running statistics of chunks of rows, exact",
+    "minmax": "the running minima and maxima of chunks of rows, exact",
+    "robust": "the merged quantile sketches of chunks of rows, approximate quartiles",
+}
+
+def scale_numerical_columns(df, method, incremental=False):
+    """
+    Scale the numerical columns (float and int) of the DataFrame with the scikit-learn scaler of a method.
+
+    Parameters:
+    df (DataFrame): The DataFrame to scale.
+    method (str): 'standard', 'minmax' or 'robust'.
+    incremental (bool): Fit an IncrementalScaler chunk by chunk instead.
+
+    Returns:
+    Tuple: A tuple containing the following:
+        - df (DataFrame): The DataFrame with scaled numerical columns.
+        - scaler: The fitted scaler, or None when there are no numerical columns.
+    """
+    # Identify numerical columns
+    numerical_cols = numeric_columns(df)
+
+    if not numerical_cols:
+        st.warning("No numerical columns found in the DataFrame.")
+        return df, None
+
+    scaler = IncrementalScaler(method) if incremental else SCALERS[method]()
+    df[numerical_cols] = scaler.fit_transform(df[numerical_cols])
+
+    return df, scaler
+
+def scaling_page(method, name, step):
+    """
+    The page of one scaling method (pages 16-18).
+
+    Parameters:
+    method (str): 'standard', 'minmax' or 'robust'.
+    name (str): Name of the scaling in titles, e.g. 'Standardization'.
+    step (str): Description of the committed step in the dataset history.
+    """
+    st.title(f"DataFrame {name} App")
+
+    # Read the current version of the shared dataset
+    df = require_dataset()
+
+    if df is not None:
+        st.header("Original DataFrame")
+        show_dataframe(df, key="original")
+
+        fit_mode = st.radio("Fit the scaler on", list(FIT_MODES), horizontal=True,
+                            help=f"The incremental scaler is fitted from {INCREMENTAL_FITS[method]}.")
+        incremental = FIT_MODES[fit_mode]
+
+        # Perform the scaling on numerical columns
+        df_scaled, scaler = scale_numerical_columns(df.copy(), method, incremental)
+
+        st.header(f"Updated DataFrame after {name}")
+        show_dataframe(df_scaled, key="scaled")
+        pipeline_step = None
+        if scaler is not None:
+            # The scaler fitted here is recorded as is, so committing does not fit it again
+            pipeline_step = PipelineStep("scale", columns=numeric_columns(df), method=method, incremental=incremental)
+            pipeline_step.fitted = {"scaler": scaler}
+        commit_button(df_scaled, step, pipeline_step=pipeline_step)
+
+        # Button to download updated DataFrame, serialized only when clicked
+        st.sidebar.markdown("---")
+        st.sidebar.header("Download Updated Data")
+        download_format = download_format_choice(container=st.sidebar)
+        download_button(df_scaled, "updated_data.csv", download_format, container=st.sidebar)
+        if scaler is not None:
+            st.sidebar.download_button("Download fitted scaler", data=lambda: pickle.dumps(scaler),
+                                       file_name=f"{method}_scaler.pkl", mime="application/octet-stream",
+                                       on_click="ignore")
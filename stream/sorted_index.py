@@ -0,0 +1,77 @@
+import numpy as np
+
+
+def _lerp(a, b, t):
+    # Interpolation as in np.quantile, exact at both ends
+    return np.where(t < 0.5, a + (b - a) * t, b - (b - a) * (1 - t))
+
+
+class SortedColumn:
+    """
+    Values and absolute z-scores of a numeric column in sorted order, with
+    the row positions they come from.
+
+    Built once per column version, so quantiles, values outside a range,
+    z-scores above a threshold and their counts are found by binary search
+    rather than by a pass over the column. Missing values are left out.
+    """
+
+    def __init__(self, values, mean, std):
+        self.rows = len(values)
+        observed = np.flatnonzero(~np.isnan(values))
+        order = np.argsort(values[observed])
+        self.positions = observed[order]
+        self.values = values[self.positions]
+
+        # Same z-scores as the z-score pages; a constant column has none above any threshold
+        with np.errstate(divide="ignore", invalid="ignore"):
+            abs_z = np.abs((values[observed] - mean) / std)
+        abs_z[np.isnan(abs_z)] = -np.inf
+        z_order = np.argsort(abs_z)
+        self.z_positions = observed[z_order]
+        self.abs_z = abs_z[z_order]
+
+    @classmethod
+    def from_series(cls, series, mean, std):
+        return cls(series.to_numpy(dtype=float, na_value=np.nan), mean, std)
+
+    def quantiles(self, probs):
+        """
+        Exact quantiles with linear interpolation, like Series.quantile.
+        """
+        probs = np.atleast_1d(np.asarray(probs, dtype=float))
+        if len(self.values) == 0:
+            return np.full(len(probs), np.nan)
+        positions = (len(self.values) - 1) * probs
+        below = np.floor(positions).astype(np.int64)
+        above = np.minimum(below + 1, len(self.values) - 1)
+        return _lerp(self.values[below], self.values[above], positions - below)
+
+    def quantile(self, q):
+        return float(self.quantiles([q])[0])
+
+    def _outside_bounds(self, lower, upper):
+        # Values before index `low` are below lower, values from `high` on are above upper
+        low = int(np.searchsorted(self.values, lower, side="left"))
+        high = max(int(np.searchsorted(self.values, upper, side="right")), low)
+        return low, high
+
+    def count_outside(self, lower, upper):
+        low, high = self._outside_bounds(lower, upper)
+        return low + len(self.values) - high
+
+    def positions_outside(self, lower, upper):
+        """
+        Row positions of the values below lower or above upper, in value order.
+        """
+        low, high = self._outside_bounds(lower, upper)
+        return np.concatenate([self.positions[:low], self.positions[high:]])
+
+    def count_z_above(self, threshold):
+        return len(self.abs_z) - int(np.searchsorted(self.abs_z, threshold, side="right"))
+
+    def positions_z_above(self, threshold):
+        """
+        Row positions of the values whose absolute z-score exceeds the threshold.
+        """
+        return self.z_positions[int(np.searchsorted(self.abs_z, threshold, side="right")):]
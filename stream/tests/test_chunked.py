@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from chunked import collect_stats, exact_quantiles, process_file
+
+PROBS = [0, 0.001, 0.25, 0.5, 0.75, 0.999, 1]
+
+
+@pytest.fixture
+def skewed_csv(tmp_path):
+    rng = np.random.default_rng(0)
+    rows = 20_000
+    normal = rng.standard_normal(rows)
+    normal[5] = 1e12  # One extreme outlier puts nearly every value in the same range
+    ties = rng.integers(0, 3, rows).astype(float)
+    ties[::7] = np.nan
+    tiny = np.r_[rng.exponential(size=rows - 2), -1e-300, 0.0]
+    df = pd.DataFrame({"normal": normal, "ties": ties, "tiny": tiny, "negative": -np.abs(normal)})
+    path = tmp_path / "skewed.csv"
+    df.to_csv(path, index=False)
+    return str(path), pd.read_csv(path)
+
+
+def test_collect_stats_matches_pandas(skewed_csv):
+    path, df = skewed_csv
+    rows, null_counts, stats = collect_stats(path, chunksize=3000)
+    assert rows == len(df)
+    assert null_counts["ties"] == df["ties"].isna().sum()
+    for col in df.columns:
+        assert stats[col].count == df[col].count()
+        assert stats[col].mean == pytest.approx(df[col].mean(), rel=1e-9)
+        assert stats[col].std(ddof=1) == pytest.approx(df[col].std(), rel=1e-9)
+
+
+@pytest.mark.parametrize("max_values", [1_000_000, 50, 1])
+def test_exact_quantiles_match_pandas(skewed_csv, max_values):
+    path, df = skewed_csv
+    _, _, stats = collect_stats(path, chunksize=3000)
+    quantiles = exact_quantiles(path, stats, PROBS, chunksize=3000, max_values=max_values)
+    expected = df.quantile(PROBS)
+    for col in df.columns:
+        np.testing.assert_allclose([quantiles[col][q] for q in PROBS], expected[col].to_numpy(), rtol=1e-12)
+
+
+def test_percentile_capping_file(skewed_csv, tmp_path):
+    path, df = skewed_csv
+    out_path = str(tmp_path / "capped.csv")
+    summary = process_file(path, out_path, "cap_percentile", ["normal"], chunksize=3000)
+    lower, upper = np.quantile(df["normal"], [0.001, 0.999])
+    assert summary["rows"] == len(df)
+    np.testing.assert_allclose(pd.read_csv(out_path)["normal"], df["normal"].clip(lower, upper))
@@ -0,0 +1,23 @@
+import gzip
+import io
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_io import dataframe_to_file, read_bytes
+
+
+@pytest.mark.parametrize("file_format", ["csv", "csv.gz", "zip", "parquet"])
+def test_download_file_round_trip(file_format):
+    df = pd.DataFrame({"a": np.arange(1000), "b": ["x", "y"] * 500})
+    with dataframe_to_file(df, file_format, "export.csv") as f:
+        data = f.read()
+
+    if file_format == "csv.gz":
+        data = gzip.decompress(data)
+    elif file_format == "zip":
+        data = zipfile.ZipFile(io.BytesIO(data)).read("export.csv")
+    result = read_bytes(data, "parquet" if file_format == "parquet" else "csv", dtype_backend=None)
+    pd.testing.assert_frame_equal(result, df, check_dtype=False)
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+from scipy.stats import gaussian_kde
+
+from kde import BinnedData, kde_curve
+
+
+def _values(rows=20_000):
+    rng = np.random.default_rng(0)
+    return np.concatenate([rng.normal(size=rows), rng.normal(5, 0.5, size=rows // 4)])
+
+
+def _assert_close_to_gaussian_kde(x, y, values):
+    exact = gaussian_kde(values)(x)
+    assert np.max(np.abs(y - exact)) < 0.01 * exact.max()
+
+
+def test_density_matches_gaussian_kde():
+    values = _values()
+    binned = BinnedData.from_values(values)
+    np.testing.assert_allclose(binned.bandwidth, gaussian_kde(values).factor * values.std(ddof=1))
+    x, y = binned.density()
+    assert len(x) == 200
+    np.testing.assert_allclose(x[[0, -1]], [values.min() - 3 * binned.bandwidth, values.max() + 3 * binned.bandwidth])
+    _assert_close_to_gaussian_kde(x, y, values)
+
+
+def test_point_mass_matches_the_filled_values():
+    values = _values()
+    filled = np.concatenate([values, np.full(3000, np.median(values))])
+    binned = BinnedData.from_values(values).with_point_mass(np.median(values), 3000)
+    np.testing.assert_allclose([binned.count, binned.mean, binned.std], [len(filled), filled.mean(), filled.std(ddof=1)])
+    _assert_close_to_gaussian_kde(*binned.density(), filled)
+
+
+def test_missing_and_constant_columns():
+    series = pd.Series([1.0, np.nan, 2.0, 4.0, np.nan])
+    _assert_close_to_gaussian_kde(*kde_curve(series), np.array([1.0, 2.0, 4.0]))
+    assert kde_curve(pd.Series([3.0, 3.0, np.nan])) is None
+    assert kde_curve(pd.Series([1.0])) is None
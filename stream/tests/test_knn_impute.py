@@ -0,0 +1,65 @@
+import time
+
+import numpy as np
+import pytest
+from sklearn.impute import KNNImputer
+
+from knn_impute import MAX_PATTERNS, IndexedKNNImputer, make_knn_imputer
+
+
+def _with_missing(rows, cols, fraction, missing_cols=None, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((rows, cols))
+    mask = rng.random((rows, cols)) < fraction
+    if missing_cols is not None:
+        mask[:, missing_cols:] = False
+    X[mask] = np.nan
+    return X
+
+
+@pytest.mark.parametrize("weights", ["uniform", "distance"])
+def test_indexed_matches_knn_imputer(weights):
+    X = _with_missing(2000, 6, 0.1, missing_cols=3)
+    imputer = IndexedKNNImputer(n_neighbors=5, weights=weights)
+    imputed = imputer.fit_transform(X)
+    assert not imputer.dense_fallback
+    np.testing.assert_allclose(imputed, KNNImputer(n_neighbors=5, weights=weights).fit_transform(X))
+
+
+def test_indexed_transforms_new_rows_like_knn_imputer():
+    X, new = _with_missing(1500, 5, 0.1, missing_cols=2), _with_missing(300, 5, 0.2, missing_cols=2, seed=1)
+    expected = KNNImputer().fit(X).transform(new)
+    np.testing.assert_allclose(IndexedKNNImputer().fit(X).transform(new), expected)
+
+
+def test_scattered_missing_values_fall_back_to_dense():
+    # Scattered missing values give one pattern group per combination of columns
+    X = _with_missing(5000, 10, 0.05)
+    imputer = IndexedKNNImputer().fit(X)
+    assert len(imputer._groups) > MAX_PATTERNS
+    assert imputer.dense_fallback
+
+    start = time.perf_counter()
+    expected = KNNImputer().fit_transform(X)
+    dense_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    imputed = imputer.transform(X)
+    indexed_seconds = time.perf_counter() - start
+
+    np.testing.assert_allclose(imputed, expected)
+    assert indexed_seconds < 2 * dense_seconds + 0.5
+
+
+def test_empty_columns_stay_missing():
+    X = _with_missing(200, 4, 0.1, seed=2)
+    X[:, 3] = np.nan
+    imputed = IndexedKNNImputer(max_patterns=0).fit_transform(X)
+    assert np.isnan(imputed[:, 3]).all()
+    assert not np.isnan(imputed[:, :3]).any()
+
+
+def test_auto_uses_dense_for_small_data():
+    assert isinstance(make_knn_imputer(method="auto", rows=100), KNNImputer)
+    assert isinstance(make_knn_imputer(method="auto", rows=10**6), IndexedKNNImputer)
+    with pytest.raises(ValueError):
+        make_knn_imputer(method="kd")
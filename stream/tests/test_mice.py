@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+from sklearn.experimental import enable_iterative_imputer  # noqa: F401
+from sklearn.impute import IterativeImputer
+
+from mice import fit_mice_imputer
+
+
+def _data(rows=2000):
+    rng = np.random.default_rng(0)
+    values = rng.standard_normal((rows, 4))
+    values[:, 1] += values[:, 0]
+    df = pd.DataFrame(values, columns=list("abcd"))
+    return df.mask(rng.random(df.shape) < 0.2)
+
+
+def test_trace_follows_iterative_imputer():
+    df = _data()
+    imputer = fit_mice_imputer(df, list(df.columns), max_iter=15)
+    reference = IterativeImputer(max_iter=15, random_state=0).fit(df)
+
+    np.testing.assert_allclose(imputer.transform(df), reference.transform(df))
+    assert [entry["round"] for entry in imputer.trace_] == list(range(1, imputer.n_iter_ + 1))
+    assert imputer.converged_
+    assert imputer.trace_[-1]["change"] < imputer.tolerance_ <= imputer.trace_[-2]["change"]
+    assert imputer.verbose == 0
+
+
+def test_every_row_is_used_unless_sampling_is_asked_for():
+    df = _data()
+    assert fit_mice_imputer(df, list(df.columns), max_iter=2).sample_rows_ == len(df)
+    assert abs(fit_mice_imputer(df, list(df.columns), max_iter=2, sample_rows=500).sample_rows_ - 500) <= 16
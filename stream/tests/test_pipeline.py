@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.impute import KNNImputer
+from sklearn.preprocessing import RobustScaler, StandardScaler
+
+from pipeline import Pipeline, PipelineStep, replay_file
+
+
+def _data(rows=500, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({"a": rng.normal(size=rows), "b": rng.lognormal(size=rows) * 100,
+                       "c": rng.integers(0, 3, size=rows), "city": rng.choice(["x", "y", "z"], size=rows)})
+    df.loc[rng.random(rows) < 0.1, "a"] = np.nan
+    df.loc[rng.random(rows) < 0.1, "city"] = np.nan
+    return df
+
+
+def _record(df, steps):
+    # Fit every step on the output of the previous one, as the pages do
+    pipeline = Pipeline()
+    for step in steps:
+        step.fit(df)
+        df = step.apply(df)
+        pipeline.append(step)
+    return pipeline, df
+
+
+def test_replay_round_trip(tmp_path):
+    df = _data()
+    pipeline, recorded = _record(df, [
+        PipelineStep("drop_rows", column="c", value=0),
+        PipelineStep("dropna", columns=["city"]),
+        PipelineStep("knn_impute", columns=["a", "b"]),
+        PipelineStep("cap_outliers", columns=["b"], method="percentile", lower_percentile=1, upper_percentile=99),
+        PipelineStep("scale", columns=["a", "b"], method="robust"),
+    ])
+
+    # Reference implementations of the same steps
+    expected = df[df["c"] != 0].dropna(subset=["city"]).reset_index(drop=True)
+    expected[["a", "b"]] = KNNImputer().fit_transform(expected[["a", "b"]])
+    expected["b"] = expected["b"].clip(*np.quantile(expected["b"], [0.01, 0.99]))
+    expected[["a", "b"]] = RobustScaler().fit_transform(expected[["a", "b"]])
+    pd.testing.assert_frame_equal(recorded, expected)
+
+    pipeline.save(tmp_path / "pipeline.pkl")
+    df.to_csv(tmp_path / "in.csv", index=False)
+    replayed = replay_file(Pipeline.load(tmp_path / "pipeline.pkl"), str(tmp_path / "in.csv"), str(tmp_path / "out.csv"))
+    written = pd.read_csv(tmp_path / "out.csv")
+    np.testing.assert_allclose(written[["a", "b"]], recorded[["a", "b"]])
+    assert written["city"].tolist() == recorded["city"].tolist()
+    assert len(replayed) == len(recorded)
+
+
+def test_replay_uses_fitted_statistics_on_new_data():
+    pipeline, _ = _record(_data(), [PipelineStep("scale", columns=["a", "b"], method="standard")])
+    other = _data(seed=1)
+    expected = StandardScaler().fit(_data()[["a", "b"]]).transform(other[["a", "b"]])
+    np.testing.assert_allclose(pipeline.apply(other)[["a", "b"]], expected)
+
+
+def test_drop_rows_by_falsy_value():
+    df = pd.DataFrame({"c": [0, 1, 0, 2]}, index=[5, 6, 7, 8])
+    result = PipelineStep("drop_rows", column="c", value=0).fit(df).apply(df)
+    assert result["c"].tolist() == [1, 2]
+    assert result.index.tolist() == [0, 1]
+    assert PipelineStep("drop_rows", column="c").fit(df).apply(df)["c"].tolist() == [0, 1, 0, 2]
+
+
+def test_dropna_resets_the_index():
+    df = pd.DataFrame({"a": [1.0, np.nan, 3.0]})
+    result = PipelineStep("dropna", columns=["a"]).fit(df).apply(df)
+    assert result.index.tolist() == [0, 1]
+
+
+def test_rows_dropped_by_index_only_replay_on_their_data():
+    df = _data()
+    step = PipelineStep("drop_rows", indices=[1, 3]).fit(df)
+    assert len(step.apply(df)) == len(df) - 2
+    with pytest.raises(ValueError):
+        step.apply(_data(seed=1))
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from power import apply_lambdas, fit_lambdas
+
+
+@pytest.fixture
+def skewed_frame():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({"a": rng.exponential(size=150_000), "b": rng.lognormal(size=150_000),
+                         "c": rng.gamma(2.0, size=150_000)})
+
+
+@pytest.mark.parametrize("method, reference", [("boxcox", stats.boxcox), ("yeojohnson", stats.yeojohnson)])
+def test_lambdas_match_scipy(skewed_frame, method, reference):
+    lambdas = fit_lambdas(skewed_frame, list(skewed_frame), method, workers=1)
+    for col, lmbda in lambdas.items():
+        transformed, expected = reference(skewed_frame[col].to_numpy() + 1)
+        assert lmbda == pytest.approx(expected, rel=1e-6)
+        np.testing.assert_allclose(apply_lambdas(skewed_frame, {col: lmbda}, method)[f"{col}_{method}"], transformed,
+                                   rtol=1e-6)
+
+
+def test_process_pool_gives_the_serial_lambdas(skewed_frame):
+    columns = list(skewed_frame)
+    assert fit_lambdas(skewed_frame, columns, "yeojohnson", workers=2) == fit_lambdas(skewed_frame, columns,
+                                                                                      "yeojohnson", workers=1)
+
+
+def test_boxcox_rejects_values_not_above_minus_one():
+    with pytest.raises(ValueError):
+        fit_lambdas(pd.DataFrame({"a": [-2.0, 1.0, 3.0]}), ["a"], "boxcox")
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from column_profile import DatasetProfile
+from outliers import block_quantiles, outlier_limits
+from quantile_sketch import QuantileSketch, sketch_values
+
+PROBS = [0, 0.001, 0.01, 0.25, 0.5, 0.75, 0.99, 0.999, 1]
+
+
+@pytest.fixture(scope="module")
+def values():
+    rng = np.random.default_rng(0)
+    return np.concatenate([rng.standard_normal(400_000), rng.exponential(size=100_000) * 10])
+
+
+def _rank_of(sorted_values, value):
+    # Fraction of the values below value, as a rank among them
+    return np.searchsorted(sorted_values, value) / len(sorted_values)
+
+
+def test_quantiles_are_within_the_rank_error(values):
+    sketch = sketch_values(values, chunk_rows=60_000)
+    ordered = np.sort(values)
+    error = sketch.rank_error()
+    assert 0 < error < 0.01
+    for q, estimate in zip(PROBS, sketch.quantiles(PROBS)):
+        assert abs(_rank_of(ordered, estimate) - q) <= error + 1 / len(values)
+        lower, upper = sketch.quantile_bounds(q)
+        assert lower <= np.quantile(values, q) <= upper
+
+
+def test_tail_quantiles_are_exact(values):
+    sketch = sketch_values(values, chunk_rows=60_000)
+    for q in [0, 0.001, 0.01, 0.99, 0.999, 1]:
+        assert sketch.is_exact(q)
+        assert not sketch.in_tail(q)
+        assert sketch.quantile(q) == pytest.approx(np.quantile(values, q), rel=1e-12)
+
+
+def test_tails_too_small_for_the_rank_error_are_flagged(values):
+    sketch = QuantileSketch.from_values(values, k=256, tail_values=100)
+    assert sketch.in_tail(0.001) and sketch.in_tail(0.999)
+    assert not sketch.in_tail(0.5)
+
+
+def test_merge_matches_one_sketch_of_all_values(values):
+    halves = [QuantileSketch.from_values(part, seed=i) for i, part in enumerate(np.array_split(values, 2))]
+    merged = halves[0].merge(halves[1])
+    assert merged.count == len(values)
+    assert (merged.min, merged.max) == (values.min(), values.max())
+    np.testing.assert_allclose(merged.quantiles([0.001, 0.999]), np.quantile(values, [0.001, 0.999]))
+
+
+def test_missing_values_are_ignored():
+    sketch = QuantileSketch.from_values(np.array([np.nan, 1.0, 2.0, np.nan, 3.0]))
+    assert sketch.count == 3
+    assert sketch.quantile(0.5) == 2.0
+    assert np.isnan(QuantileSketch().quantile(0.5))
+
+
+def test_block_quantiles_match_numpy(values):
+    block = np.column_stack([values, values[::-1] * 2])
+    block[::13, 1] = np.nan
+    expected = np.column_stack([np.quantile(block[:, 0], PROBS), np.nanquantile(block[:, 1], PROBS)])
+    np.testing.assert_allclose(block_quantiles(block, PROBS), expected)
+
+
+def test_approximate_percentile_limits(values):
+    df = pd.DataFrame({"a": values})
+    exact = outlier_limits(df, ["a"], ("percentile",))["percentile"]
+    approximate = outlier_limits(df, ["a"], ("percentile",), approximate=True,
+                                 profile=DatasetProfile(df))["percentile"]
+    np.testing.assert_allclose(approximate, exact)
+    np.testing.assert_allclose(exact, np.quantile(values, [[0.001], [0.999]]))
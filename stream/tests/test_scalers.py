@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import MinMaxScaler, RobustScaler, StandardScaler
+
+import scalers
+from chunked import process_file
+from scalers import IncrementalScaler
+
+REFERENCE_SCALERS = {"standard": StandardScaler, "minmax": MinMaxScaler, "robust": RobustScaler}
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"a": rng.standard_normal(50_000) * 3 + 1, "b": rng.exponential(size=50_000),
+                       "c": np.full(50_000, 2.0)})
+    df.loc[::11, "b"] = np.nan
+    return df
+
+
+@pytest.mark.parametrize("method", ["standard", "minmax"])
+def test_exact_methods_match_scikit_learn(frame, method):
+    scaled = IncrementalScaler(method).fit_transform(frame, chunksize=7000, workers=2)
+    expected = REFERENCE_SCALERS[method]().fit_transform(frame)
+    np.testing.assert_allclose(scaled.to_numpy(), expected, rtol=1e-9, atol=1e-12)
+
+
+def test_robust_quartiles_are_within_the_rank_error(frame):
+    scaler = IncrementalScaler("robust").fit(frame, chunksize=7000)
+    center, scale = scaler.parameters()
+    error = scaler.rank_error()
+    for col in ["a", "b"]:
+        values = frame[col].dropna().to_numpy()
+        low, high = np.quantile(values, [max(0.5 - error, 0), min(0.5 + error, 1)])
+        assert low <= center[col] <= high
+    reference = RobustScaler().fit(frame)
+    np.testing.assert_allclose(scale, reference.scale_, rtol=0.05)
+    assert center["c"] == 2.0 and scale["c"] == 1.0
+
+
+def test_chunks_get_distinct_seeds(monkeypatch):
+    seeds = []
+
+    class RecordingSketch(scalers.QuantileSketch):
+        def __init__(self, k, seed=0):
+            seeds.append(seed)
+            super().__init__(k, seed)
+
+    monkeypatch.setattr(scalers, "QuantileSketch", RecordingSketch)
+    chunks = [pd.DataFrame({"a": np.arange(100.0)})] * 4
+    IncrementalScaler("robust", seed=3).fit_chunks(chunks, workers=1)
+    # Every chunk is sketched with its own seed, starting from the scaler's
+    assert set(seeds) == {3, 4, 5, 6}
+
+
+@pytest.mark.parametrize("operation, method", [("standardize", "standard"), ("minmax", "minmax"), ("robust", "robust")])
+def test_chunked_file_scaling_uses_the_incremental_scaler(frame, tmp_path, operation, method):
+    in_path, out_path = tmp_path / "in.csv", tmp_path / "out.csv"
+    frame.to_csv(in_path, index=False)
+    df = pd.read_csv(in_path)
+    summary = process_file(str(in_path), str(out_path), operation, list(df.columns), chunksize=7000)
+    expected = IncrementalScaler(method).fit_transform(df, chunksize=7000)
+    np.testing.assert_allclose(pd.read_csv(out_path).to_numpy(), expected.to_numpy(), rtol=1e-9, atol=1e-12)
+    assert ("rank_error" in summary["fitted"]["a"]) == (method == "robust")
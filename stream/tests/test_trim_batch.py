@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from pipeline import Pipeline
+from trim_batch import load_manifest, run_batch
+
+
+class CrashingPipeline(Pipeline):
+    """
+    Pipeline whose worker dies on files with a 'crash' column and allocates
+    more memory than it may on files with a 'grow' column.
+    """
+
+    def apply(self, df):
+        if "crash" in df.columns:
+            os._exit(1)
+        if "grow" in df.columns:
+            np.ones(64 * 1024 * 1024)
+        return df.assign(a=df["a"] * 2)
+
+
+def _write_inputs(directory, names, rows=1000):
+    rng = np.random.default_rng(0)
+    frames = {}
+    for i, name in enumerate(names):
+        frames[name] = pd.DataFrame({"a": rng.lognormal(size=rows) * (i + 1)})
+        if name in ("crash", "grow"):
+            frames[name][name] = 1
+        frames[name].to_csv(directory / f"{name}.csv", index=False)
+    return frames
+
+
+def test_chunked_operation_matches_numpy(tmp_path):
+    (tmp_path / "in").mkdir()
+    frames = _write_inputs(tmp_path / "in", ["x", "y", "z"])
+    logged = []
+    summary = run_batch(tmp_path / "in", tmp_path / "out", operation="cap_percentile", workers=2, chunksize=300,
+                        params={"lower_percentile": 1, "upper_percentile": 99}, log=logged.append)
+    assert (summary["processed"], summary["failed"], summary["rows"]) == (3, 0, 3000)
+
+    for name, df in frames.items():
+        low, high = np.quantile(df["a"], [0.01, 0.99])
+        result = pd.read_csv(tmp_path / "out" / f"{name}.csv")
+        np.testing.assert_allclose(result["a"], df["a"].clip(low, high))
+
+    again = run_batch(tmp_path / "in", tmp_path / "out", operation="cap_percentile", workers=2, log=logged.append)
+    assert (again["processed"], again["skipped"]) == (0, 3)
+
+
+def test_crashed_worker_only_fails_its_file(tmp_path):
+    (tmp_path / "in").mkdir()
+    frames = _write_inputs(tmp_path / "in", ["a", "b", "crash", "d", "e", "grow"])
+    CrashingPipeline().save(tmp_path / "pipeline.pkl")
+
+    logged = []
+    summary = run_batch(tmp_path / "in", tmp_path / "out", pipeline_path=tmp_path / "pipeline.pkl", workers=1,
+                        memory_limit_mb=256, log=logged.append)
+
+    records = load_manifest(tmp_path / "out")
+    assert set(records) == {"a.csv", "b.csv", "d.csv", "e.csv"}
+    assert summary["failed"] == 2
+    assert any("crash.csv: worker process crashed" in line for line in logged)
+    assert any("grow.csv: exceeded the memory limit" in line for line in logged)
+    for name in records:
+        df = frames[name[:-4]]
+        np.testing.assert_allclose(pd.read_csv(tmp_path / "out" / name)["a"], df["a"] * 2)
+    assert not [path for path in os.listdir(tmp_path / "out") if path.endswith(".part")]
@@ -0,0 +1,321 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    import resource  # Per-process memory limits are only available on Unix
+except ImportError:
+    resource = None
+
+from chunked import DEFAULT_CHUNKSIZE, OPERATIONS, detect_numeric_columns, process_file
+from data_io import INPUT_TYPES, file_format_from_name, read_bytes, write_dataframe
+from pipeline import Pipeline
+
+# Completed files are recorded here, one JSON object per line, so that an
+# interrupted batch can resume where it stopped
+MANIFEST_NAME = "_trim_manifest.jsonl"
+
+# Pipelines loaded by the current worker process, keyed by file path
+_pipelines = {}
+
+
+def file_signature(path):
+    """
+    Size and modification time of a file, used to detect changed inputs on resume.
+    """
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def load_manifest(out_dir):
+    """
+    Return the manifest records of the files completed by earlier runs, by input file name.
+    """
+    done = {}
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # A line cut short by a crash
+            if record.get("status") == "done":
+                done[record["file"]] = record
+            else:
+                done.pop(record["file"], None)
+    return done
+
+
+def append_manifest(out_dir, record):
+    with open(os.path.join(out_dir, MANIFEST_NAME), "a") as f:
+        f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def is_done(record, in_path, out_path):
+    return (record is not None and os.path.exists(out_path)
+            and record["size"] == file_signature(in_path)["size"]
+            and record["mtime_ns"] == file_signature(in_path)["mtime_ns"])
+
+
+def data_segment_bytes():
+    """
+    Private writable memory (heap and anonymous mappings) currently used by
+    this process (Linux), or 0 when unknown.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmData:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+def limit_memory(memory_limit_mb):
+    """
+    Worker initializer: allow the worker process memory_limit_mb more data
+    memory than it uses once the readers are loaded, so a file that needs
+    more memory fails with MemoryError instead of exhausting the machine.
+
+    The limit is on the data segment (RLIMIT_DATA), which holds the arrays
+    of the file being cleaned, rather than on the address space, which
+    also counts thread stacks, shared libraries and reserved but unused
+    mappings and so fails much earlier than the memory really used.
+    """
+    if memory_limit_mb:
+        # Load the lazily imported readers and writers before the limit applies
+        import pyarrow.csv  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+        limit = data_segment_bytes() + int(memory_limit_mb) * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_DATA, (limit, limit))
+
+
+def _get_pipeline(pipeline_path):
+    if pipeline_path not in _pipelines:
+        _pipelines[pipeline_path] = Pipeline.load(pipeline_path)
+    return _pipelines[pipeline_path]
+
+
+def clean_file(in_path, out_path, pipeline_path=None, operation=None, columns=None,
+               chunksize=DEFAULT_CHUNKSIZE, params=None):
+    """
+    Clean one file, either by replaying a recorded pipeline or by applying a
+    chunked operation.
+
+    The result is written next to its final name and renamed once complete,
+    so a crash never leaves a partial output that looks finished.
+
+    Returns:
+    dict: Rows read and written, input bytes and elapsed seconds.
+    """
+    start = time.perf_counter()
+    partial_path = out_path + ".part"
+    # The partial output marks the file as started, even if the worker dies
+    open(partial_path, "wb").close()
+
+    try:
+        if pipeline_path is not None:
+            with open(in_path, "rb") as f:
+                df = read_bytes(f.read(), file_format_from_name(in_path))
+            result = _get_pipeline(pipeline_path).apply(df)
+            with open(partial_path, "wb") as f:
+                write_dataframe(result, f, file_format_from_name(out_path))
+            rows, rows_out = len(df), len(result)
+        else:
+            if operation != "bool_to_int" and not columns:
+                columns = detect_numeric_columns(in_path)
+            summary = process_file(in_path, partial_path, operation, columns or [], chunksize, **(params or {}))
+            rows = rows_out = summary["rows"]
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    os.replace(partial_path, out_path)
+    return {"rows": rows, "rows_out": rows_out, "bytes": os.path.getsize(in_path),
+            "seconds": time.perf_counter() - start}
+
+
+def find_inputs(in_dir, pattern):
+    return sorted(path for path in glob.glob(os.path.join(in_dir, pattern)) if os.path.isfile(path))
+
+
+def output_path(in_path, out_dir, output_format):
+    return os.path.join(out_dir, f"{os.path.splitext(os.path.basename(in_path))[0]}.{output_format}")
+
+
+def remove_partial(out_path):
+    """
+    Remove the partial output of a file; returns whether there was one,
+    i.e. whether a worker had started cleaning the file.
+    """
+    try:
+        os.remove(out_path + ".part")
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def run_batch(in_dir, out_dir, pipeline_path=None, operation=None, columns=None, pattern="*.csv",
+              output_format="csv", workers=None, memory_limit_mb=None, chunksize=DEFAULT_CHUNKSIZE,
+              params=None, resume=True, log=print):
+    """
+    Clean every matching file of a directory with a pool of worker processes.
+
+    Each worker process cleans a single file and is then replaced, so the
+    memory of one file is returned to the system before the next starts
+    and the memory limit applies to every file afresh. If a worker dies,
+    e.g. killed for using too much memory, the files it and the other
+    workers were cleaning are recorded as crashed and a new pool cleans
+    the files that had not started.
+
+    Parameters:
+    in_dir (str): Directory with the input files.
+    out_dir (str): Directory for the cleaned files and the manifest.
+    pipeline_path (str): Pipeline downloaded from the upload page, replayed on every file.
+    operation (str): Chunked operation (a key of chunked.OPERATIONS), used when no pipeline is given.
+    columns (list): Columns for the chunked operation; numeric columns are detected if omitted.
+    pattern (str): Glob pattern selecting the input files.
+    output_format (str): 'csv' or 'parquet'.
+    workers (int): Number of worker processes, one per CPU if omitted.
+    memory_limit_mb (int): Memory each worker may use for the file it is cleaning.
+    chunksize (int): Rows per chunk for chunked operations.
+    params (dict): Extra parameters of the chunked operation.
+    resume (bool): Skip files completed by an earlier run with unchanged input.
+    log (callable): Receives one line of progress per file.
+
+    Returns:
+    dict: Files processed, skipped and failed, rows, bytes and wall time.
+    """
+    if (pipeline_path is None) == (operation is None):
+        raise ValueError("Give either a pipeline file or a chunked operation.")
+    if operation is not None and output_format != "csv":
+        raise ValueError("Chunked operations write CSV files only.")
+    if memory_limit_mb and resource is None:
+        raise ValueError("Per-file memory limits are not supported on this platform.")
+    if pipeline_path is not None:
+        pipeline_path = os.path.abspath(pipeline_path)
+        Pipeline.load(pipeline_path)  # Fail early on a bad pipeline file
+
+    os.makedirs(out_dir, exist_ok=True)
+    done = load_manifest(out_dir) if resume else {}
+
+    pending = []
+    skipped = 0
+    for in_path in find_inputs(in_dir, pattern):
+        out_path = output_path(in_path, out_dir, output_format)
+        if os.path.abspath(out_path) == os.path.abspath(in_path):
+            raise ValueError("The output directory must be different from the input directory.")
+        if is_done(done.get(os.path.basename(in_path)), in_path, out_path):
+            skipped += 1
+        else:
+            pending.append((in_path, out_path))
+
+    summary = {"processed": 0, "skipped": skipped, "failed": 0, "rows": 0, "bytes": 0, "seconds": 0.0}
+    start = time.perf_counter()
+
+    while pending:
+        for _, out_path in pending:
+            remove_partial(out_path)  # Left over by a crashed run
+        not_started = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=limit_memory, initargs=(memory_limit_mb,),
+                                 max_tasks_per_child=1) as pool:
+            futures = {
+                pool.submit(clean_file, in_path, out_path, pipeline_path, operation, columns, chunksize, params): (in_path, out_path)
+                for in_path, out_path in pending
+            }
+            for future in as_completed(futures):
+                in_path, out_path = futures[future]
+                record = dict(file=os.path.basename(in_path), output=os.path.basename(out_path), **file_signature(in_path))
+                try:
+                    result = future.result()
+                except MemoryError:
+                    record.update(status="failed", error=f"exceeded the memory limit of {memory_limit_mb} MB")
+                except BrokenProcessPool:
+                    if not remove_partial(out_path):
+                        not_started.append((in_path, out_path))
+                        continue
+                    record.update(status="failed", error="worker process crashed")
+                except Exception as e:
+                    record.update(status="failed", error=str(e))
+                else:
+                    record.update(status="done", **result)
+
+                append_manifest(out_dir, record)
+                if record["status"] == "done":
+                    summary["processed"] += 1
+                    summary["rows"] += record["rows"]
+                    summary["bytes"] += record["bytes"]
+                    log(f"done    {record['file']}: {record['rows']} rows in {record['seconds']:.2f} s")
+                else:
+                    summary["failed"] += 1
+                    log(f"failed  {record['file']}: {record['error']}")
+
+        if not_started and len(not_started) == len(pending):
+            # No file had started, so the pool cannot start workers at all
+            raise RuntimeError("Worker processes could not be started.")
+        if not_started:
+            log(f"restarting the worker pool for {len(not_started)} file(s)")
+        pending = not_started
+
+    summary["seconds"] = time.perf_counter() - start
+    return summary
+
+
+def format_summary(summary):
+    seconds = max(summary["seconds"], 1e-9)
+    megabytes = summary["bytes"] / (1024 * 1024)
+    return (f"{summary['processed']} file(s) processed, {summary['skipped']} skipped, {summary['failed']} failed\n"
+            f"{summary['rows']} rows, {megabytes:.1f} MB in {summary['seconds']:.1f} s: "
+            f"{summary['rows'] / seconds:,.0f} rows/s, {megabytes / seconds:.1f} MB/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply the same cleaning steps to every file of a directory.")
+    parser.add_argument("input_dir", help="Directory with the files to clean")
+    parser.add_argument("output_dir", help="Directory for the cleaned files and the resume manifest")
+    steps = parser.add_mutually_exclusive_group(required=True)
+    steps.add_argument("--pipeline", help="Pipeline file downloaded from the upload page (only load trusted files)")
+    steps.add_argument("--operation", choices=[op for op in OPERATIONS if op != "null_counts"],
+                       help="Chunked operation for files too large to load at once (CSV only)")
+    parser.add_argument("--columns", nargs="+", help="Columns for --operation (default: all numeric columns)")
+    parser.add_argument("--lower-percentile", type=float, default=0.1, help="Lower percentile for cap_percentile")
+    parser.add_argument("--upper-percentile", type=float, default=99.9, help="Upper percentile for cap_percentile")
+    parser.add_argument("--pattern", default="*.csv", help=f"Glob pattern of the input files ({', '.join(INPUT_TYPES)})")
+    parser.add_argument("--output-format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--memory-limit-mb", type=int, default=None, help="Memory each worker may use for one file")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Rows per chunk for --operation")
+    parser.add_argument("--no-resume", action="store_true", help="Process every file again, ignoring the manifest")
+    args = parser.parse_args(argv)
+
+    params = {}
+    if args.operation == "cap_percentile":
+        params = {"lower_percentile": args.lower_percentile, "upper_percentile": args.upper_percentile}
+
+    try:
+        summary = run_batch(args.input_dir, args.output_dir, pipeline_path=args.pipeline, operation=args.operation,
+                            columns=args.columns, pattern=args.pattern, output_format=args.output_format,
+                            workers=args.workers, memory_limit_mb=args.memory_limit_mb, chunksize=args.chunksize,
+                            params=params, resume=not args.no_resume)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(format_summary(summary))
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    # Run from the importable modules, so unpickled pipeline steps resolve in the workers
+    from trim_batch import main
+    sys.exit(main())